@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Adaptive DPI benchmark: accuracy proxy vs. pixels and preprocessing time.
+
+Generates a synthetic corpus of A4 pages with known font sizes, line
+spacing and amounts of text (plus blank and table-like pages). Each page's
+DPI is chosen from a 72 DPI thumbnail for several MIN_TEXT_HEIGHT_PX
+settings. The page is then drawn, enhanced and PNG-encoded at that DPI,
+the way pdftoppm renders a PDF page directly at the requested resolution.
+
+Without OCR in the loop, accuracy is measured against Textract's
+documented minimum text height of 15 pixels: a page is "at risk" when its
+smallest font renders below that at the chosen DPI.
+
+Usage:
+    python benchmarks/bench_adaptive_dpi.py [--pages 40] [--seed 0]
+"""
+import io
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config import ADAPTIVE_DPI_CANDIDATES, ADAPTIVE_THUMBNAIL_DPI, IMAGE_FORMAT
+from src.preprocess import estimate_text_metrics, choose_dpi, enhance_image
+from benchmarks.synthetic import WORDS
+
+MASTER_DPI = 300
+PAGE_INCHES = (8.27, 11.69)  # A4
+TEXTRACT_MIN_TEXT_PX = 15
+FONT_SIZES_PT = [6, 7, 8, 9, 10, 11, 12, 14, 16, 20, 24]
+
+
+def make_spec(rng):
+    """Pick the layout of one synthetic page."""
+    kind = rng.choices(['text', 'table', 'blank'], weights=[6, 3, 1])[0]
+    font_pt = rng.choice(FONT_SIZES_PT)
+    return {
+        'kind': kind,
+        # Body text is the smallest font; headings are the same size or larger
+        'font_pt': None if kind == 'blank' else font_pt,
+        'heading_pt': font_pt * rng.choice([1.0, 1.5, 2.0]),
+        'spacing': rng.uniform(1.1, 1.8),
+        'fill': rng.uniform(0.2, 1.0),
+        'columns': rng.randint(3, 6) if kind == 'table' else 1,
+        'seed': rng.random(),
+    }
+
+
+def draw_page(spec, dpi):
+    """Draw a page at the given DPI."""
+    width, height = (round(inches * dpi) for inches in PAGE_INCHES)
+    image = Image.new('L', (width, height), 255)
+    if spec['kind'] == 'blank':
+        return image
+
+    rng = random.Random(spec['seed'])
+    draw = ImageDraw.Draw(image)
+    to_px = dpi / 72
+    margin = round(72 * to_px)
+    y = margin
+    bottom = margin + round(spec['fill'] * (height - 2 * margin))
+    columns = spec['columns']
+    column_width = (width - 2 * margin) // columns
+
+    draw.text((margin, y), 'Underhållsplan', fill=0, font=ImageFont.load_default(size=spec['heading_pt'] * to_px))
+    y += round(spec['heading_pt'] * 2 * to_px)
+    font = ImageFont.load_default(size=spec['font_pt'] * to_px)
+    while y < bottom:
+        for column in range(columns):
+            words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 12 // columns + 1)))
+            draw.text((margin + column * column_width + round(3 * to_px), y), words, fill=0, font=font)
+        y += round(spec['font_pt'] * spec['spacing'] * to_px)
+        if spec['kind'] == 'table':
+            draw.line([(margin, y - round(to_px)), (width - margin, y - round(to_px))], fill=0,
+                      width=max(1, round(to_px / 2)))
+    return image
+
+
+def encode_at(spec, dpi):
+    """Draw, enhance and PNG-encode a page at dpi; return the encoded bytes."""
+    buffer = io.BytesIO()
+    enhance_image(draw_page(spec, dpi)).save(buffer, IMAGE_FORMAT)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Adaptive DPI benchmark')
+    parser.add_argument('--pages', type=int, default=40, help='Number of synthetic pages')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    specs = [make_spec(rng) for _ in range(args.pages)]
+    thumbnails = [draw_page(spec, ADAPTIVE_THUMBNAIL_DPI) for spec in specs]
+
+    start = time.perf_counter()
+    metrics = [estimate_text_metrics(thumbnail, ADAPTIVE_THUMBNAIL_DPI) for thumbnail in thumbnails]
+    estimate_ms = (time.perf_counter() - start) * 1000 / len(specs)
+
+    estimated = [(m['small_text_pt'], spec['font_pt']) for m, spec in zip(metrics, specs)
+                 if m['small_text_pt'] and spec['font_pt']]
+    error = sum(abs(est - true) / true for est, true in estimated) / max(1, len(estimated))
+    print(f"Pages: {args.pages}, thumbnail analysis {estimate_ms:.1f} ms/page, "
+          f"mean text height error {error:.0%}")
+
+    start = time.perf_counter()
+    baseline_bytes = sum(len(encode_at(spec, MASTER_DPI)) for spec in specs)
+    baseline_seconds = time.perf_counter() - start
+
+    print(f"{'min text px':<13}{'DPI mix':<28}{'at risk':>8}{'pixels':>9}{'bytes':>8}{'time':>8}")
+    print(f"{'fixed 300':<13}{'300:' + str(args.pages):<28}{0:>8}{'100%':>9}{'100%':>8}{'100%':>8}")
+    for min_text_px in (15, 20, 24, 30):
+        chosen = [choose_dpi(m, MASTER_DPI, ADAPTIVE_DPI_CANDIDATES, min_text_px) for m in metrics]
+        at_risk = sum(1 for dpi, spec in zip(chosen, specs)
+                      if spec['font_pt'] and spec['font_pt'] * dpi / 72 < TEXTRACT_MIN_TEXT_PX)
+        pixels = sum((dpi / MASTER_DPI) ** 2 for dpi in chosen) / len(chosen)
+        start = time.perf_counter()
+        total_bytes = sum(len(encode_at(spec, dpi)) for spec, dpi in zip(specs, chosen))
+        seconds = time.perf_counter() - start
+        mix = ' '.join(f"{dpi}:{chosen.count(dpi)}" for dpi in ADAPTIVE_DPI_CANDIDATES if dpi in chosen)
+        print(f"{min_text_px:<13}{mix:<28}{at_risk:>8}{pixels:>9.0%}"
+              f"{total_bytes / baseline_bytes:>8.0%}{seconds / baseline_seconds:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: raw Textract block dicts vs. BlockStore.
+
+Builds a synthetic 500-page response and compares the memory retained by
+the list of block dicts plus the Id -> block map that TableExtractor used to
+build, against a BlockStore built one page at a time.
+
+Usage:
+    python benchmarks/bench_block_store.py [--pages 500]
+"""
+import sys
+import gc
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.block_store import BlockStore
+from benchmarks.synthetic import make_responses
+
+
+def measure(build):
+    """Return (result, retained bytes, seconds) for a build function."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def build_dicts(pages):
+    blocks = []
+    for response in make_responses(pages):
+        blocks.extend(response['Blocks'])
+    blocks_map = {block['Id']: block for block in blocks}
+    return blocks, blocks_map
+
+
+def build_store(pages):
+    return BlockStore.from_responses(make_responses(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BlockStore memory benchmark')
+    parser.add_argument('--pages', type=int, default=500, help='Number of synthetic pages')
+    args = parser.parse_args()
+
+    (blocks, _), dict_bytes, dict_time = measure(lambda: build_dicts(args.pages))
+    block_count = len(blocks)
+    del blocks
+    store, store_bytes, store_time = measure(lambda: build_store(args.pages))
+
+    print(f"Pages: {args.pages}, blocks: {block_count}")
+    print(f"dicts + blocks_map: {dict_bytes / 2**20:8.1f} MiB  ({dict_time:.2f}s)")
+    print(f"BlockStore:         {store_bytes / 2**20:8.1f} MiB  ({store_time:.2f}s)")
+    print(f"Reduction:          {dict_bytes / store_bytes:8.1f}x")
+    assert len(store) == block_count
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Feature routing benchmark: classification accuracy, time and Textract cost.
+
+Draws synthetic 300 DPI pages of known kinds (prose in one to three
+columns, cover pages, ruled and unruled tables, key-value forms) in the
+mix of a typical maintenance plan, and routes each one. Reports the
+confusion between the expected and chosen routes, the classification
+time per page and the Textract cost of the routed pages relative to
+sending every page with TABLES and FORMS.
+
+Usage:
+    python benchmarks/bench_feature_routing.py [--pages 100] [--seed 0]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.page_classifier import layout_metrics, choose_route, ROUTES
+from benchmarks.synthetic import WORDS
+
+PAGE_SIZE = (2480, 3508)  # A4 at 300 DPI
+MARGIN = 300
+
+# USD per page, AWS list prices (first million pages a month)
+PRICES = {'text': 0.0015, 'tables': 0.015, 'tables_forms': 0.065}
+
+# Page kind -> (expected route, share of pages)
+KINDS = {
+    'prose': ('text', 0.45),
+    'prose_2col': ('text', 0.1),
+    'prose_3col': ('text', 0.05),
+    'cover': ('text', 0.1),
+    'ruled_table': ('tables', 0.15),
+    'unruled_table': ('tables', 0.05),
+    'form': ('tables_forms', 0.1),
+}
+
+
+def font(points):
+    return ImageFont.load_default(size=points * 300 / 72)
+
+
+def fill_line(draw, rng, width, text_font):
+    """Random words filling most of a line of the given width."""
+    line = ''
+    limit = width * rng.uniform(0.85, 1.0)
+    while True:
+        longer = (line + ' ' + rng.choice(WORDS)).strip()
+        if draw.textlength(longer, font=text_font) > limit:
+            return line
+        line = longer
+
+
+def draw_page(kind, rng):
+    """Draw one page of a kind."""
+    image = Image.new('L', PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    body = font(rng.choice([9, 10, 11]))
+    width, height = PAGE_SIZE
+    draw.text((MARGIN, 200), 'Underhållsplan', fill=0, font=font(18))
+
+    if kind.startswith('prose'):
+        columns = 1 if kind == 'prose' else int(kind[-4])
+        gutter = 60
+        column_width = (width - 2 * MARGIN - (columns - 1) * gutter) // columns
+        for column in range(columns):
+            for y in range(400, height - MARGIN, 60):
+                draw.text((MARGIN + column * (column_width + gutter), y),
+                          fill_line(draw, rng, column_width, body), fill=0, font=body)
+    elif kind == 'cover':
+        draw.text((600, 1200), 'Underhållsplan 2024-2033', fill=0, font=font(28))
+        draw.text((600, 1500), 'Brf Exempel', fill=0, font=font(16))
+    elif kind == 'ruled_table':
+        xs = [MARGIN, 700, 1500, 1900, width - MARGIN]
+        rows = rng.randint(10, 35)
+        for row in range(rows + 1):
+            y = 400 + row * 80
+            draw.line([(xs[0], y), (xs[-1], y)], fill=0, width=3)
+            if row < rows:
+                for left in xs[:-1]:
+                    draw.text((left + 15, y + 20), rng.choice(WORDS), fill=0, font=body)
+        for x in xs:
+            draw.line([(x, 400), (x, 400 + rows * 80)], fill=0, width=3)
+    elif kind == 'unruled_table':
+        for y in range(400, 400 + rng.randint(10, 35) * 70, 70):
+            for x in (MARGIN, 800, 1500, 2000):
+                draw.text((x, y), rng.choice(WORDS), fill=0, font=body)
+    elif kind == 'form':
+        labels = ['Föreningens namn', 'Org.nr', 'Fastighetsbeteckning', 'Adress', 'Byggår',
+                  'Antal lägenheter', 'Planperiod', 'Upprättad av']
+        for i, label in enumerate(labels[:rng.randint(4, len(labels))]):
+            y = 400 + i * 90
+            draw.text((MARGIN, y), label + ':', fill=0, font=body)
+            draw.text((1100, y), ' '.join(rng.choice(WORDS) for _ in range(2)), fill=0, font=body)
+        for y in range(1300, height - MARGIN, 60):
+            draw.text((MARGIN, y), fill_line(draw, rng, width - 2 * MARGIN, body), fill=0, font=body)
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature routing benchmark')
+    parser.add_argument('--pages', type=int, default=100, help='Number of synthetic pages')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    kinds = rng.choices(list(KINDS), weights=[share for _, share in KINDS.values()], k=args.pages)
+
+    confusion = {}
+    seconds = 0.0
+    for kind in kinds:
+        image = draw_page(kind, rng)
+        start = time.perf_counter()
+        route = choose_route(layout_metrics(image))
+        seconds += time.perf_counter() - start
+        confusion.setdefault(kind, {}).setdefault(route, 0)
+        confusion[kind][route] += 1
+
+    print(f"Pages: {args.pages}, classification {seconds * 1000 / args.pages:.1f} ms/page")
+    print(f"{'kind':<15}{'expected':<14}" + ''.join(f"{route:>14}" for route in ROUTES))
+    routed_cost = 0.0
+    missed = 0
+    for kind, (expected, _) in KINDS.items():
+        counts = confusion.get(kind, {})
+        print(f"{kind:<15}{expected:<14}" + ''.join(f"{counts.get(route, 0):>14}" for route in ROUTES))
+        for route, count in counts.items():
+            routed_cost += PRICES[route] * count
+            # A page routed to fewer features than it needs loses its tables or forms
+            if list(ROUTES).index(route) < list(ROUTES).index(expected):
+                missed += count
+
+    baseline_cost = PRICES['tables_forms'] * args.pages
+    print(f"Textract cost: ${routed_cost:.2f} routed vs. ${baseline_cost:.2f} with TABLES+FORMS "
+          f"everywhere ({routed_cost / baseline_cost:.0%}); {missed} pages under-featured")
+
+
+if __name__ == '__main__':
+    main()
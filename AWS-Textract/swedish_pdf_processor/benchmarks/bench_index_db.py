@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Query benchmark: SQLite index vs. re-reading _maintenance.json files.
+
+Generates synthetic processed documents (page text, a maintenance table
+and the matching extract_maintenance_data output), writes one
+_maintenance.json per document and upserts all of them into a
+DocumentIndex. Then it times typical corpus queries against both.
+
+Usage:
+    python benchmarks/bench_index_db.py [--documents 10000] [--repeat 5]
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import serialization
+from src.index_db import DocumentIndex
+from benchmarks.synthetic import WORDS
+
+CATEGORIES = ['Tak', 'Fasader', 'Fönster', 'Ventilation', 'VVS', 'El', 'Mark', 'Hiss']
+ACTIONS = ['Byte av takbeläggning', 'Målning av fasad', 'Översyn av fönster', 'Rensning av ventilation',
+           'Stambyte', 'Byte av elcentral', 'Omläggning av asfalt', 'Renovering av hiss']
+
+
+def make_document(i, rng):
+    """Return (combined result, maintenance data, pages) for one synthetic document."""
+    items = {}
+    rows = [['År', 'Kategori', 'Åtgärd', 'Kostnad']]
+    total_cost = 0
+    for _ in range(rng.randint(10, 30)):
+        year = str(rng.randint(2024, 2040))
+        category = rng.choice(CATEGORIES)
+        action = rng.choice(ACTIONS)
+        cost = float(rng.randrange(5000, 500000, 500))
+        items.setdefault(year, []).append({'category': category, 'action': action, 'cost': cost})
+        rows.append([year, category, action, f"{cost:.0f}"])
+        total_cost += cost
+    maintenance_data = {'yearly_maintenance': items, 'categories': sorted({row[1] for row in rows[1:]}),
+                        'total_cost': total_cost}
+
+    pages = []
+    for page in range(1, rng.randint(2, 5) + 1):
+        text = ' '.join(rng.choice(WORDS + ACTIONS) for _ in range(150))
+        pages.append({'page': page, 'text': text, 'tables': [rows] if page == 1 else []})
+    result = {
+        'text': '\n\n'.join(page['text'] for page in pages),
+        'tables': [rows],
+        'document_id': f"doc-{i:06d}",
+        'timestamp': '20250101_000000',
+        'source_file': f"brf_{i:06d}.pdf",
+        'page_count': len(pages),
+    }
+    return result, maintenance_data, pages
+
+
+def scan_json(paths, category, year, min_cost):
+    """Answer the item query by reading every _maintenance.json file."""
+    matches = []
+    for path in paths:
+        data = serialization.load(path)
+        for item in data['yearly_maintenance'].get(str(year), []):
+            if item['category'].lower() == category.lower() and (item['cost'] or 0) >= min_cost:
+                matches.append(item)
+    return matches
+
+
+def best_time(func, repeat):
+    """Return (result, best seconds) over several runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite index query benchmark')
+    parser.add_argument('--documents', type=int, default=10000, help='Number of synthetic documents')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions per query')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        json_paths = []
+        index = DocumentIndex(work_dir / 'index.db')
+
+        start = time.perf_counter()
+        for i in range(args.documents):
+            result, maintenance_data, pages = make_document(i, rng)
+            path = work_dir / f"doc_{i:06d}_maintenance.json"
+            serialization.dump(maintenance_data, path, compact=True)
+            json_paths.append(path)
+            index.upsert_document(result, maintenance_data, pages)
+        build_seconds = time.perf_counter() - start
+        db_mib = (work_dir / 'index.db').stat().st_size / 2**20
+        print(f"Documents: {args.documents}, indexed in {build_seconds:.1f}s "
+              f"({args.documents / build_seconds:.0f} docs/s), database {db_mib:.1f} MiB")
+
+        queries = [
+            ("items: Tak, 2027, >= 100 000 kr",
+             lambda: index.find_maintenance(category='Tak', year=2027, min_cost=100000)),
+            ("items: 2030-2032, >= 400 000 kr",
+             lambda: index.find_maintenance(year=2030, year_to=2032, min_cost=400000)),
+            ("cost per year: Tak", lambda: index.summary_by_year('Tak')),
+            ("full text: stambyte", lambda: index.search_text('stambyte', limit=100)),
+            ("full text: \"byte av elcentral\"", lambda: index.search_text('"byte av elcentral"', limit=100)),
+        ]
+        print(f"{'query':<36}{'results':>10}{'ms':>12}")
+        for name, query in queries:
+            rows, seconds = best_time(query, args.repeat)
+            print(f"{name:<36}{len(rows):>10}{seconds * 1000:>12.2f}")
+
+        rows, seconds = best_time(lambda: scan_json(json_paths, 'Tak', 2027, 100000), 1)
+        print(f"{'JSON scan: Tak, 2027, >= 100 000 kr':<36}{len(rows):>10}{seconds * 1000:>12.2f}")
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Key-value benchmark: FORMS extraction time on form-dense pages.
+
+Generates synthetic form pages with an increasing number of key-value
+pairs and times extract_key_values on a BlockStore of each page. The time
+per pair stays flat as pages grow, since every KEY_VALUE_SET block and
+relationship is visited once. For comparison, pairs are also resolved the
+way extract_table_data resolves cells, by scanning the block list for the
+Ids of each relationship (quadratic; only run on the smaller pages).
+
+Usage:
+    python benchmarks/bench_key_values.py [--sizes 100,1000,10000,50000] [--seed 0]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.block_store import BlockStore
+from src.form_extractor import extract_key_values
+from benchmarks.synthetic import make_form_blocks
+
+# Largest page resolved by scanning the block list
+MAX_SCAN_PAIRS = 2000
+
+
+def _ids(block, rel_type):
+    return [block_id for relationship in block.get('Relationships', ())
+            if relationship['Type'] == rel_type for block_id in relationship['Ids']]
+
+
+def scan_key_values(blocks):
+    """Resolve key-value pairs by scanning all blocks for each relationship."""
+    pairs = []
+    for block in blocks:
+        if block['BlockType'] != 'KEY_VALUE_SET' or 'KEY' not in block.get('EntityTypes', ()):
+            continue
+        key_ids = _ids(block, 'CHILD')
+        value_ids = _ids(block, 'VALUE')
+        key = ' '.join(b['Text'] for b in blocks if b['Id'] in key_ids and b['BlockType'] == 'WORD')
+        word_ids = [i for value in blocks if value['Id'] in value_ids for i in _ids(value, 'CHILD')]
+        value = ' '.join(b['Text'] for b in blocks if b['Id'] in word_ids and b['BlockType'] == 'WORD')
+        pairs.append((key, value))
+    return pairs
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Key-value extraction benchmark')
+    parser.add_argument('--sizes', type=str, default='100,1000,10000,50000',
+                        help='Key-value pairs per page, comma-separated')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    # Load the diacritic lexicon before timing
+    extract_key_values(make_form_blocks(pairs=10))
+
+    print(f"{'pairs':>7}{'blocks':>9}{'store ms':>10}{'extract ms':>12}{'us/pair':>9}{'scan ms':>10}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        random.seed(args.seed)
+        blocks = make_form_blocks(pairs=size)
+        store, store_ms = timed(BlockStore.from_blocks, blocks)
+        pairs, extract_ms = timed(extract_key_values, store)
+        assert len(pairs) == size
+
+        scan = '-'
+        if size <= MAX_SCAN_PAIRS:
+            scanned, scan_ms = timed(scan_key_values, blocks)
+            assert len(scanned) == size
+            scan = f"{scan_ms:.1f}"
+        print(f"{size:>7}{len(blocks):>9}{store_ms:>10.1f}{extract_ms:>12.1f}"
+              f"{extract_ms * 1000 / size:>9.1f}{scan:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Layout benchmark: reading order and cell assignment on large pages.
+
+Generates synthetic pages with text columns and tables side by side, in
+Textract's top-to-bottom block order, at several sizes. For each page it
+times the response-order text extraction, layout reading order, and
+grid-indexed cell assignment against a pairwise scan of every cell. Order
+quality is reported as the number of times consecutive lines switch
+between regions (columns, tables); the minimum is the number of regions
+minus one.
+
+Usage:
+    python benchmarks/bench_layout.py [--sizes 1000,5000,20000] [--seed 0]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.layout import reading_order, assign_to_cells, block_box
+from benchmarks.synthetic import make_layout_blocks
+
+
+def region_switches(lines):
+    """Count consecutive lines belonging to different regions."""
+    regions = [line['Text'].split(':')[0] for line in lines]
+    return sum(1 for a, b in zip(regions, regions[1:]) if a != b)
+
+
+def pairwise_assign(blocks):
+    """Assign unlinked words to cells by testing every cell (O(words x cells))."""
+    cells = [block for block in blocks if block['BlockType'] == 'CELL']
+    linked = {child for cell in cells for relationship in cell.get('Relationships', ())
+              for child in relationship['Ids']}
+    assigned = {}
+    for block in blocks:
+        if block['BlockType'] != 'WORD' or block['Id'] in linked:
+            continue
+        left, top, width, height = block_box(block)
+        x, y = left + width / 2, top + height / 2
+        for cell in cells:
+            c_left, c_top, c_width, c_height = block_box(cell)
+            if c_left <= x <= c_left + c_width and c_top <= y <= c_top + c_height:
+                assigned.setdefault(cell['Id'], []).append(block['Id'])
+                break
+    return assigned
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Layout benchmark')
+    parser.add_argument('--sizes', type=str, default='1000,5000,20000',
+                        help='Approximate blocks per page, comma-separated')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7}{'regions':>9}{'switches':>10}{'layout':>8}"
+          f"{'order ms':>10}{'assign ms':>11}{'pairwise ms':>13}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        random.seed(args.seed)
+        # Two columns and two tables of about equal block counts
+        scale = size / 3545
+        blocks = make_layout_blocks(column_lines=max(5, round(150 * scale)),
+                                    table_rows=max(5, round(60 * scale)))
+
+        response_lines = [block for block in blocks if block['BlockType'] == 'LINE']
+        regions = len({line['Text'].split(':')[0] for line in response_lines})
+        ordered, order_ms = timed(reading_order, blocks)
+        assigned, assign_ms = timed(assign_to_cells, blocks)
+        pairwise, pairwise_ms = timed(pairwise_assign, blocks)
+        assert assigned == pairwise, "grid and pairwise assignment differ"
+
+        print(f"{len(blocks):>7}{regions:>9}{region_switches(response_lines):>10}"
+              f"{region_switches(ordered):>8}{order_ms:>10.1f}{assign_ms:>11.1f}{pairwise_ms:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Diacritic restoration benchmark: index build/load time and tokens/sec.
+
+Generates a synthetic Swedish-like lexicon with word frequencies, writes
+the mmap index and restores text whose diacritics were stripped (or
+written as digraphs), drawing tokens from a Zipf distribution. The old
+approach (one re.sub per SWEDISH_TERM_FIXES entry) is timed on the same
+text for comparison.
+
+Usage:
+    python benchmarks/bench_lexicon.py [--words 200000] [--tokens 200000]
+"""
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.lexicon import DiacriticRestorer, build_entries, write_index, STRIP, DIGRAPH, TOKEN_PATTERN
+from src.postprocess import SWEDISH_CHAR_FIXES, SWEDISH_TERM_FIXES
+
+SYLLABLES = ['un', 'der', 'håll', 'plan', 'åt', 'gärd', 'fön', 'ster', 'må', 'ning', 'dör', 'rar',
+             'vär', 'me', 'säk', 'er', 'het', 'för', 'valt', 'tak', 'fa', 'sad', 'stam', 'byte',
+             'ven', 'ti', 'la', 'tion', 'är', 'år', 'öv', 'rig', 'kost', 'nad', 'be', 'sikt']
+
+
+def make_lexicon(count, rng):
+    """Return word -> frequency for count distinct synthetic words."""
+    words = {}
+    while len(words) < count:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        words[word] = int(1_000_000 / (len(words) + 1))
+    return words
+
+
+def make_text(words, tokens, rng):
+    """
+    Return OCR-like text and the intended tokens.
+
+    Tokens are lexicon words, most with diacritics stripped or written as digraphs.
+    """
+    vocabulary = list(words)
+    weights = [words[word] for word in vocabulary]
+    damaged = []
+    intended = []
+    for word in rng.choices(vocabulary, weights=weights, k=tokens):
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        intended.append(word)
+        damage = rng.random()
+        if damage < 0.6:
+            word = word.translate(STRIP)
+        elif damage < 0.7:
+            word = word.translate(DIGRAPH)
+        damaged.append(word)
+    return ' '.join(damaged), intended
+
+
+def old_fix(text):
+    """The previous fix_swedish_characters: character fixes plus one re.sub per term."""
+    for bad, good in SWEDISH_CHAR_FIXES.items():
+        text = text.replace(bad, good)
+    for bad, good in SWEDISH_TERM_FIXES.items():
+        text = re.sub(r'\b' + re.escape(bad) + r'\b', good, text, flags=re.IGNORECASE)
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diacritic restoration benchmark')
+    parser.add_argument('--words', type=int, default=200000, help='Lexicon size')
+    parser.add_argument('--tokens', type=int, default=200000, help='Tokens of text to restore')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = make_lexicon(args.words, rng)
+    text, intended = make_text(words, args.tokens, rng)
+    token_count = len(TOKEN_PATTERN.findall(text))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        index_path = Path(work_dir) / 'lexicon.idx'
+        start = time.perf_counter()
+        entries = build_entries(words)
+        write_index(entries, index_path)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restorer = DiacriticRestorer(index_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"Lexicon: {len(words)} words, {len(entries)} keys, index {index_path.stat().st_size / 2**20:.1f} MiB, "
+              f"built in {build_seconds:.1f}s, opened in {load_ms:.2f} ms")
+
+        start = time.perf_counter()
+        for token in TOKEN_PATTERN.findall(text):
+            restorer._restore_token(token)
+        uncached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = restorer.restore_text(text)
+        cached = time.perf_counter() - start
+        restorer.close()
+
+    start = time.perf_counter()
+    old_fix(text)
+    old = time.perf_counter() - start
+
+    # Ambiguous keys resolve to the most frequent word, so 100% is not reachable
+    correct = sum(1 for a, b in zip(intended, restored.split(' ')) if a == b)
+
+    print(f"Tokens: {token_count}, restored to the intended word: {correct / len(intended):.1%}")
+    print(f"{'method':<34}{'tokens/s':>14}")
+    print(f"{'lexicon index, uncached lookups':<34}{token_count / uncached:>14,.0f}")
+    print(f"{'lexicon index, restore_text':<34}{token_count / cached:>14,.0f}")
+    print(f"{'previous re.sub per term':<34}{token_count / old:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Logging benchmark: overhead of hot-path logging on table-dense pages.
+
+Post-processes synthetic table-dense pages (text correction and table
+extraction, as in steps 3 and 4 of main.py) under several logging setups,
+writing to a console stream and a log file in a temporary directory:
+
+- off: only warnings are logged (the baseline)
+- sync: the former setup, handlers called by the logging thread, with the
+  per-cell and per-table messages of postprocess and table_extractor
+  logged (they used to be INFO)
+- queued: the same messages, written by a background listener thread
+  (as QueueHandler over a SimpleQueue)
+- queued + rate limited: as queued, with RateLimitFilter (setup_logging)
+- current: setup_logging, with the hot-path messages at DEBUG
+
+For each setup it reports the processing time (the best of --repeat runs),
+its overhead over the baseline, the time the listener needed to write the
+remaining records after processing ended, and the number of lines written.
+--console-ms simulates a slow console (e.g. a remote terminal or a log
+collector reading stdout) by waiting that long on every console write.
+
+Usage:
+    python benchmarks/bench_logging.py [--pages 20] [--repeat 3] [--console-ms 0] [--seed 0]
+"""
+import sys
+import time
+import atexit
+import random
+import logging
+import logging.handlers
+import argparse
+import queue
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import LOG_FORMAT
+from src.utils import setup_logging
+from src.postprocess import process_textract_response
+from src.table_extractor import TableExtractor
+from benchmarks.synthetic import make_page_blocks
+
+# Modules whose per-cell and per-table messages are the hot path
+HOT_PATH_LOGGERS = ['src.postprocess', 'src.table_extractor']
+
+
+def workload(pages):
+    """Post-process the pages and extract their tables."""
+    extractor = TableExtractor()
+    for blocks in pages:
+        process_textract_response({'Blocks': blocks})
+        extractor.extract_tables(blocks)
+
+
+class SlowStream:
+    """File stream that waits on every write, like a slow console."""
+
+    def __init__(self, path, seconds):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.seconds = seconds
+
+    def write(self, text):
+        if self.seconds:
+            time.sleep(self.seconds)
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+def handlers(directory, name, stream):
+    result = [logging.StreamHandler(stream), logging.FileHandler(directory / f"{name}.log", mode='w')]
+    for handler in result:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return result
+
+
+def configure(setup, directory, console_seconds):
+    """Install a logging setup; return its listener (or None)."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    for name in HOT_PATH_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG if setup in ('sync', 'queued', 'queued + rate limited')
+                                         else logging.NOTSET)
+
+    name = setup.replace(' ', '_').replace('+', '')
+    log_file = directory / f"{name}.log"
+    log_file.unlink(missing_ok=True)
+    stream = SlowStream(directory / f"{name}.console", console_seconds)
+    if setup == 'current' or setup == 'queued + rate limited':
+        return setup_logging(logging.INFO, log_file=log_file, stream=stream)
+    if setup == 'queued':
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(log_queue, *handlers(directory, name, stream))
+        listener.start()
+        root.setLevel(logging.INFO)
+        return listener
+    for handler in handlers(directory, name, stream):
+        root.addHandler(handler)
+    root.setLevel(logging.WARNING if setup == 'off' else logging.INFO)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Logging overhead benchmark')
+    parser.add_argument('--pages', type=int, default=20, help='Number of synthetic pages')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per setup; the fastest is reported')
+    parser.add_argument('--console-ms', type=float, default=0, help='Simulated latency per console write')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    pages = [make_page_blocks(page, lines=40, tables=4, table_rows=25, table_cols=6)
+             for page in range(1, args.pages + 1)]
+    # Load the diacritic lexicon and fill its word cache before timing
+    logging.getLogger().setLevel(logging.WARNING)
+    workload(pages)
+
+    setups = ['off', 'sync', 'queued', 'queued + rate limited', 'current']
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        print(f"Pages: {args.pages} ({sum(len(blocks) for blocks in pages)} blocks), "
+              f"console write {args.console_ms:g} ms")
+        print(f"{'setup':<24}{'seconds':>9}{'overhead':>10}{'drain s':>9}{'lines':>9}")
+        baseline = None
+        for setup in setups:
+            seconds = drain = float('inf')
+            for _ in range(max(1, args.repeat)):
+                listener = configure(setup, directory, args.console_ms / 1000)
+                start = time.perf_counter()
+                workload(pages)
+                run_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                if listener is not None:
+                    listener.stop()
+                    atexit.unregister(listener.stop)
+                drain_seconds = time.perf_counter() - start
+                for handler in logging.getLogger().handlers[:]:
+                    logging.getLogger().removeHandler(handler)
+                logging.shutdown()
+                if run_seconds < seconds:
+                    seconds, drain = run_seconds, drain_seconds
+
+            name = setup.replace(' ', '_').replace('+', '')
+            lines = sum(1 for _ in open(directory / f"{name}.log", encoding='utf-8'))
+            baseline = baseline or seconds
+            print(f"{setup:<24}{seconds:>9.2f}{(seconds - baseline) / baseline:>10.0%}{drain:>9.2f}{lines:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark: wall time of pipelined vs. step-by-step page processing.
+
+Simulates the page stages of process_pdf with fixed per-page costs: CPU
+work for rasterization and post-processing (in worker processes), a wait
+for the Textract call (in threads) and an in-order write. The stages are
+run one after the other over all pages, as process_pdf does by default,
+and as a Pipeline. The ideal pipelined wall time is that of the slowest
+stage (pages x cost / workers), plus filling and draining the pipeline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--pages 40] [--render-ms 50] [--textract-ms 200]
+                                        [--postprocess-ms 25] [--write-ms 5]
+"""
+import sys
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.pipeline import Pipeline, Stage
+
+RENDER_PROCESSES = 2
+TEXTRACT_THREADS = 4
+POSTPROCESS_PROCESSES = 2
+
+
+def burn(seconds, item):
+    """Keep a CPU busy for a number of seconds."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return item
+
+
+def wait(seconds, item):
+    """Wait for a number of seconds, like a network call."""
+    time.sleep(seconds)
+    return item
+
+
+def run_steps(pages, costs):
+    """Run each stage over all pages before starting the next one."""
+    with ProcessPoolExecutor(RENDER_PROCESSES) as executor:
+        items = list(executor.map(partial(burn, costs['render']), pages))
+    with ThreadPoolExecutor(TEXTRACT_THREADS) as executor:
+        items = list(executor.map(partial(wait, costs['textract']), items))
+    with ProcessPoolExecutor(POSTPROCESS_PROCESSES) as executor:
+        items = list(executor.map(partial(burn, costs['postprocess']), items))
+    for item in items:
+        wait(costs['write'], item)
+    return items
+
+
+def run_pipeline(pages, costs):
+    """Run the stages as a pipeline, writing pages in order at the sink."""
+    pipeline = Pipeline([
+        Stage('render', partial(burn, costs['render']), RENDER_PROCESSES, processes=True),
+        Stage('textract', partial(wait, costs['textract']), TEXTRACT_THREADS),
+        Stage('postprocess', partial(burn, costs['postprocess']), POSTPROCESS_PROCESSES, processes=True),
+    ])
+    items = []
+    for item in pipeline.run(pages):
+        wait(costs['write'], item)
+        items.append(item)
+    return items, pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline benchmark')
+    parser.add_argument('--pages', type=int, default=40, help='Number of pages')
+    parser.add_argument('--render-ms', type=float, default=50, help='Rasterization CPU time per page')
+    parser.add_argument('--textract-ms', type=float, default=200, help='Textract latency per page')
+    parser.add_argument('--postprocess-ms', type=float, default=25, help='Post-processing CPU time per page')
+    parser.add_argument('--write-ms', type=float, default=5, help='Output time per page')
+    args = parser.parse_args()
+
+    costs = {'render': args.render_ms / 1000, 'textract': args.textract_ms / 1000,
+             'postprocess': args.postprocess_ms / 1000, 'write': args.write_ms / 1000}
+    workers = {'render': RENDER_PROCESSES, 'textract': TEXTRACT_THREADS,
+               'postprocess': POSTPROCESS_PROCESSES, 'write': 1}
+    stage_seconds = {name: args.pages * cost / workers[name] for name, cost in costs.items()}
+    pages = list(range(1, args.pages + 1))
+
+    start = time.perf_counter()
+    run_steps(pages, costs)
+    steps_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    items, stats = run_pipeline(pages, costs)
+    pipeline_seconds = time.perf_counter() - start
+    assert items == pages, "pages came out of order"
+
+    print(f"Pages: {args.pages}")
+    for name, seconds in stage_seconds.items():
+        line = f"  {name:<12}{workers[name]:>2} workers  {seconds:6.2f}s of work"
+        if name in stats:
+            line += (f"  (pipelined: busy {stats[name]['busy_seconds']:.2f}s, "
+                     f"blocked {stats[name]['blocked_seconds']:.2f}s over all workers)")
+        print(line)
+    slowest = max(stage_seconds.values())
+    print(f"Step by step: {steps_seconds:6.2f}s (sum of stages {sum(stage_seconds.values()):.2f}s)")
+    print(f"Pipelined:    {pipeline_seconds:6.2f}s (slowest stage {slowest:.2f}s, "
+          f"{pipeline_seconds / slowest:.2f}x)")
+    print(f"Speedup:      {steps_seconds / pipeline_seconds:6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
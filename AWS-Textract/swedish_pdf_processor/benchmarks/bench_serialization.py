@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: round-trip time and size per backend and format.
+
+Serializes a synthetic multi-page Textract response with every installed
+backend (stdlib json, orjson, msgspec) in indented and compact mode, plus
+msgpack when available.
+
+Usage:
+    python benchmarks/bench_serialization.py [--pages 50] [--repeat 5]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import serialization
+from benchmarks.synthetic import make_responses
+
+
+def available_backends():
+    backends = ['json']
+    if serialization.orjson is not None:
+        backends.append('orjson')
+    if serialization.msgspec is not None:
+        backends.append('msgspec')
+    return backends
+
+
+def time_round_trip(encode, decode, obj, repeat):
+    """Return (best encode seconds, best decode seconds, encoded size)."""
+    best_encode = best_decode = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = encode(obj)
+        best_encode = min(best_encode, time.perf_counter() - start)
+        start = time.perf_counter()
+        decode(data)
+        best_decode = min(best_decode, time.perf_counter() - start)
+    return best_encode, best_decode, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serialization benchmark')
+    parser.add_argument('--pages', type=int, default=50, help='Number of synthetic pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions per measurement')
+    args = parser.parse_args()
+
+    response = {'Blocks': []}
+    for page in make_responses(args.pages):
+        response['Blocks'].extend(page['Blocks'])
+
+    print(f"Pages: {args.pages}, blocks: {len(response['Blocks'])}")
+    print(f"{'format':<22}{'encode ms':>12}{'decode ms':>12}{'size MiB':>12}")
+
+    cases = []
+    for backend in available_backends():
+        for compact in (False, True):
+            name = f"{backend} ({'compact' if compact else 'indent'})"
+            cases.append((
+                name,
+                lambda obj, b=backend, c=compact: serialization.dumps(obj, compact=c, backend=b),
+                lambda data, b=backend: serialization.loads(data, backend=b),
+            ))
+    if serialization.MSGPACK_BACKEND:
+        cases.append((f"msgpack ({serialization.MSGPACK_BACKEND})",
+                      serialization.packb, serialization.unpackb))
+
+    for name, encode, decode in cases:
+        encode_time, decode_time, size = time_round_trip(encode, decode, response, args.repeat)
+        print(f"{name:<22}{encode_time * 1000:>12.1f}{decode_time * 1000:>12.1f}{size / 2**20:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
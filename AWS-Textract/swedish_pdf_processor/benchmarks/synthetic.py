@@ -0,0 +1,261 @@
+"""
+Synthetic Textract responses for benchmarks.
+
+The generated blocks follow the shape of real AnalyzeDocument output
+(PAGE/LINE/WORD/TABLE/CELL with geometry and CHILD relationships) so
+benchmarks can run without AWS access.
+"""
+import random
+import uuid
+
+WORDS = [
+    'Underhållsplan', 'åtgärd', 'Fasader', 'Tak', 'Ventilation', 'Installationer',
+    'målning', 'fönster', 'dörrar', 'byte', 'översyn', 'kr', '2025', '2027',
+    '150 000', 'Mark', 'läge', 'status', 'förvaltning', 'säkerhet',
+]
+
+
+def _polygon(left, top, width, height):
+    return [
+        {'X': left, 'Y': top},
+        {'X': left + width, 'Y': top},
+        {'X': left + width, 'Y': top + height},
+        {'X': left, 'Y': top + height},
+    ]
+
+
+def _block(block_type, left, top, width, height, page, **fields):
+    block = {
+        'BlockType': block_type,
+        'Confidence': random.uniform(80.0, 99.9),
+        'Geometry': {
+            'BoundingBox': {'Width': width, 'Height': height, 'Left': left, 'Top': top},
+            'Polygon': _polygon(left, top, width, height),
+        },
+        'Id': str(uuid.uuid4()),
+        'Page': page,
+    }
+    block.update(fields)
+    return block
+
+
+def make_page_blocks(page=1, lines=40, words_per_line=8, tables=2, table_rows=10, table_cols=4):
+    """
+    Build the blocks of one synthetic Textract page.
+
+    Args:
+        page (int): Page number
+        lines (int): Number of LINE blocks
+        words_per_line (int): WORD blocks per line
+        tables (int): Number of TABLE blocks
+        table_rows (int): Rows per table
+        table_cols (int): Columns per table
+
+    Returns:
+        list: Textract blocks
+    """
+    blocks = []
+    page_block = _block('PAGE', 0.0, 0.0, 1.0, 1.0, page)
+    page_block['Relationships'] = [{'Type': 'CHILD', 'Ids': []}]
+    blocks.append(page_block)
+
+    line_height = 0.5 / max(lines, 1)
+    for l in range(lines):
+        top = 0.05 + l * line_height
+        words = []
+        for w in range(words_per_line):
+            words.append(_block('WORD', 0.05 + w * 0.11, top, 0.1, line_height * 0.8, page,
+                                Text=random.choice(WORDS), TextType='PRINTED'))
+        line = _block('LINE', 0.05, top, 0.9, line_height * 0.8, page,
+                      Text=' '.join(word['Text'] for word in words),
+                      Relationships=[{'Type': 'CHILD', 'Ids': [word['Id'] for word in words]}])
+        page_block['Relationships'][0]['Ids'].append(line['Id'])
+        blocks.append(line)
+        blocks.extend(words)
+
+    table_height = 0.4 / max(tables, 1)
+    for t in range(tables):
+        table_top = 0.58 + t * table_height
+        row_height = table_height / table_rows
+        col_width = 0.9 / table_cols
+        cells = []
+        words = []
+        for r in range(table_rows):
+            for c in range(table_cols):
+                left = 0.05 + c * col_width
+                top = table_top + r * row_height
+                word = _block('WORD', left, top, col_width * 0.9, row_height * 0.8, page,
+                              Text=random.choice(WORDS), TextType='PRINTED')
+                words.append(word)
+                cells.append(_block('CELL', left, top, col_width, row_height, page,
+                                    RowIndex=r + 1, ColumnIndex=c + 1, RowSpan=1, ColumnSpan=1,
+                                    Relationships=[{'Type': 'CHILD', 'Ids': [word['Id']]}]))
+        table = _block('TABLE', 0.05, table_top, 0.9, table_height, page,
+                       Relationships=[{'Type': 'CHILD', 'Ids': [cell['Id'] for cell in cells]}])
+        page_block['Relationships'][0]['Ids'].append(table['Id'])
+        blocks.append(table)
+        blocks.extend(cells)
+        blocks.extend(words)
+
+    return blocks
+
+
+def make_layout_blocks(page=1, columns=2, column_lines=150, words_per_line=6, tables=2,
+                       table_rows=60, table_cols=4, unlinked_words=0.1):
+    """
+    Build the blocks of a page with text columns and tables side by side.
+
+    Blocks are returned top to bottom across the page, the way Textract
+    returns them, so the lines of neighbouring columns and tables are
+    interleaved. Every LINE's Text is "<region>:<index>", where region is
+    "heading", "column<i>", "caption" or "table<i>" and index is its reading
+    order position within the region.
+
+    Args:
+        page (int): Page number
+        columns (int): Number of text columns in the top half
+        column_lines (int): Lines per column
+        words_per_line (int): WORD blocks per text line
+        tables (int): Number of tables next to each other in the bottom half
+        table_rows (int): Rows per table
+        table_cols (int): Columns per table
+        unlinked_words (float): Share of table words not linked to their cell
+
+    Returns:
+        list: Textract blocks
+    """
+    rows = []  # (top, blocks) to be sorted into response order
+    heading = _block('LINE', 0.05, 0.01, 0.9, 0.012, page, Text='heading:0')
+    rows.append((0.01, [heading]))
+
+    column_width = 0.9 / columns
+    line_height = 0.44 / max(column_lines, 1)
+    word_width = column_width * 0.9 / words_per_line
+    for c in range(columns):
+        left = 0.05 + c * column_width
+        for l in range(column_lines):
+            top = 0.04 + l * line_height
+            words = [_block('WORD', left + w * word_width, top, word_width * 0.9, line_height * 0.8, page,
+                            Text=random.choice(WORDS), TextType='PRINTED')
+                     for w in range(words_per_line)]
+            line = _block('LINE', left, top, column_width * 0.9, line_height * 0.8, page,
+                          Text=f'column{c}:{l}',
+                          Relationships=[{'Type': 'CHILD', 'Ids': [word['Id'] for word in words]}])
+            rows.append((top, [line] + words))
+
+    caption = _block('LINE', 0.05, 0.485, 0.9, 0.01, page, Text='caption:0')
+    rows.append((0.485, [caption]))
+
+    table_width = 0.9 / tables
+    row_height = 0.46 / max(table_rows, 1)
+    col_width = table_width * 0.95 / table_cols
+    for t in range(tables):
+        table_left = 0.05 + t * table_width
+        cells = []
+        for r in range(table_rows):
+            top = 0.5 + r * row_height
+            for c in range(table_cols):
+                left = table_left + c * col_width
+                word = _block('WORD', left + 0.002, top + 0.001, col_width * 0.8, row_height * 0.7, page,
+                              Text=random.choice(WORDS), TextType='PRINTED')
+                line = _block('LINE', left + 0.002, top + 0.001, col_width * 0.8, row_height * 0.7, page,
+                              Text=f'table{t}:{r * table_cols + c}',
+                              Relationships=[{'Type': 'CHILD', 'Ids': [word['Id']]}])
+                linked = [] if random.random() < unlinked_words else [word['Id']]
+                cell = _block('CELL', left, top, col_width, row_height, page,
+                              RowIndex=r + 1, ColumnIndex=c + 1, RowSpan=1, ColumnSpan=1)
+                if linked:
+                    cell['Relationships'] = [{'Type': 'CHILD', 'Ids': linked}]
+                cells.append(cell)
+                rows.append((top, [line, word]))
+        table = _block('TABLE', table_left, 0.5, table_width * 0.95, 0.46, page,
+                       Relationships=[{'Type': 'CHILD', 'Ids': [cell['Id'] for cell in cells]}])
+        rows.append((0.5, [table] + cells))
+
+    blocks = [_block('PAGE', 0.0, 0.0, 1.0, 1.0, page)]
+    for _, row_blocks in sorted(rows, key=lambda row: row[0]):
+        blocks.extend(row_blocks)
+    return blocks
+
+
+FORM_LABELS = [
+    ('Föreningens namn', 'Brf Exempel'), ('Org.nr', '769600-1234'),
+    ('Fastighetsbeteckning', 'Exempel 1:23'), ('Planperiod', '2024 - 2033'),
+    ('Byggår', '1962'), ('Antal lägenheter', '48'), ('Upprättad av', 'Anna Andersson'),
+]
+
+
+def make_form_blocks(page=1, pairs=40, words_per_value=3, selection_share=0.1):
+    """
+    Build the blocks of a form page with key-value (FORMS) output.
+
+    The first pairs use the labels of a maintenance plan cover page, the
+    rest numbered labels. Each pair is a LINE with its words, a KEY block
+    whose CHILD words hold the label and a VALUE block holding the value
+    words, or a selection element.
+
+    Args:
+        page (int): Page number
+        pairs (int): Number of key-value pairs
+        words_per_value (int): WORD blocks per value
+        selection_share (float): Share of values that are check boxes
+
+    Returns:
+        list: Textract blocks
+    """
+    blocks = [_block('PAGE', 0.0, 0.0, 1.0, 1.0, page)]
+    line_height = 0.9 / max(pairs, 1)
+    for p in range(pairs):
+        top = 0.05 + p * line_height
+        height = line_height * 0.8
+        if p < len(FORM_LABELS):
+            label, value = FORM_LABELS[p]
+            value_texts = value.split()
+        else:
+            label = f'Fält {p}'
+            value_texts = [random.choice(WORDS) for _ in range(words_per_value)]
+        key_words = [_block('WORD', 0.05 + w * 0.08, top, 0.07, height, page, Text=text, TextType='PRINTED')
+                     for w, text in enumerate((label + ':').split())]
+        if p >= len(FORM_LABELS) and random.random() < selection_share:
+            value_children = [_block('SELECTION_ELEMENT', 0.4, top, 0.02, height, page,
+                                     SelectionStatus=random.choice(['SELECTED', 'NOT_SELECTED']))]
+        else:
+            value_children = [_block('WORD', 0.4 + w * 0.1, top, 0.09, height, page,
+                                     Text=text, TextType='PRINTED')
+                              for w, text in enumerate(value_texts)]
+        value_block = _block('KEY_VALUE_SET', 0.4, top, 0.5, height, page, EntityTypes=['VALUE'],
+                             Relationships=[{'Type': 'CHILD', 'Ids': [child['Id'] for child in value_children]}])
+        key_block = _block('KEY_VALUE_SET', 0.05, top, 0.3, height, page, EntityTypes=['KEY'],
+                           Relationships=[{'Type': 'VALUE', 'Ids': [value_block['Id']]},
+                                          {'Type': 'CHILD', 'Ids': [word['Id'] for word in key_words]}])
+        words = key_words + [child for child in value_children if child['BlockType'] == 'WORD']
+        line = _block('LINE', 0.05, top, 0.85, height, page, Text=' '.join(word['Text'] for word in words),
+                      Relationships=[{'Type': 'CHILD', 'Ids': [word['Id'] for word in words]}])
+        blocks.extend([line] + words + [key_block, value_block])
+        blocks.extend(child for child in value_children if child['BlockType'] != 'WORD')
+    return blocks
+
+
+def make_response(page=1, **kwargs):
+    """Build a synthetic single-page AnalyzeDocument response."""
+    return {
+        'DocumentMetadata': {'Pages': 1},
+        'Blocks': make_page_blocks(page, **kwargs),
+        'AnalyzeDocumentModelVersion': '1.0',
+    }
+
+
+def make_responses(pages, seed=0, **kwargs):
+    """
+    Yield synthetic responses for a multi-page document.
+
+    Args:
+        pages (int): Number of pages
+        seed (int): Random seed for reproducible output
+
+    Yields:
+        dict: One Textract response per page
+    """
+    random.seed(seed)
+    for page in range(1, pages + 1):
+        yield make_response(page, **kwargs)
@@ -22,8 +22,74 @@ PDF_DPI = 300  # Higher DPI for better OCR quality
 IMAGE_FORMAT = 'PNG'
 CONTRAST_FACTOR = 1.5  # Increase contrast by 50%
 
+# Adaptive per-page DPI (two-pass rendering)
+ADAPTIVE_DPI = False  # Pick each page's DPI from a low-resolution thumbnail
+ADAPTIVE_DPI_CANDIDATES = (150, 200, 250, 300)  # Render resolutions to choose from
+ADAPTIVE_THUMBNAIL_DPI = 72  # Thumbnail resolution (1 pixel = 1 point)
+MIN_TEXT_HEIGHT_PX = 24  # Smallest text line height to render (Textract needs at least 15 px)
+DENSE_PAGE_INK_ROWS = 0.85  # Share of thumbnail rows with ink above which lines may have merged
+
+# Re-OCR of low-confidence words and cells as high-DPI crops
+REOCR_ENABLED = False
+REOCR_CONFIDENCE_THRESHOLD = 80.0  # Textract confidence (0-100) below which a WORD or CELL is re-read
+REOCR_DPI = 600  # Resolution of the re-read crops
+REOCR_PADDING = 0.005  # Margin around each box, as a fraction of the page
+REOCR_MAX_REGIONS = 20  # Most crops re-read per page
+
+# Local table extraction from the text layer of born-digital pages
+LOCAL_TABLES_ENABLED = False
+LOCAL_TABLES_MIN_CONFIDENCE = 0.8  # Pages scoring lower (0-1) are sent to Textract
+LOCAL_TABLES_WORKERS = None  # Extraction processes (None: CPU count)
+
+# Layout analysis
+LAYOUT_READING_ORDER = True  # Order text by columns and tables instead of Textract's response order
+
 # Textract settings
 TEXTRACT_FEATURES = ['TABLES', 'FORMS']  # Enable table and form recognition
 
+# Per-page feature routing: text-only pages use DetectDocumentText, and
+# FORMS is only requested for pages with key-value rows
+FEATURE_ROUTING = False
+TABLE_MIN_RULES = 3  # Horizontal ruling lines that make a page a table page
+FORM_MIN_KEY_VALUE_ROWS = 3  # Label/value rows that make a page a form page
+
+# Execution planning (sync per-page calls vs. asynchronous S3 jobs)
+TEXTRACT_SYNC_TPS = 2  # AnalyzeDocument transactions per second available to us
+TEXTRACT_SYNC_MAX_BYTES = 10 * 1024 * 1024  # Synchronous API document size limit
+TEXTRACT_MAX_ASYNC_JOBS = 4  # Async jobs we may run at the same time
+ASYNC_MIN_PAGES_PER_JOB = 20  # Don't split documents into smaller async jobs
+LATENCY_HISTORY_PATH = OUTPUT_DIR / 'latency_history.json'
+
+# Scratch storage for rasterized page images
+SCRATCH_BUDGET_BYTES = None  # Max bytes of page images on disk at once (None: unlimited)
+SCRATCH_USE_TMPFS = False  # Keep page images in memory-backed tmpfs
+TMPFS_DIR = Path('/dev/shm')
+
+# Pipelined page processing: rasterization, Textract, post-processing and
+# output overlap instead of running one after the other over all pages
+PIPELINE_ENABLED = False
+PIPELINE_QUEUE_SIZE = 4  # Pages waiting in front of each stage
+PIPELINE_RENDER_PROCESSES = 2  # Rasterization and enhancement processes
+PIPELINE_POSTPROCESS_PROCESSES = 2  # Text correction, table and form extraction processes
+
+# Distributed page processing
+DISTRIBUTED_TIMEOUT_SECONDS = 3600  # Give up on a document's page results after this long (None: wait forever)
+
+# HTTP service
+SERVICE_MAX_UPLOAD_BYTES = 200 * 1024 * 1024  # Largest PDF accepted in a request body
+
+# Logging: records are written by a background thread, and each logging
+# call site may emit a burst of records, then a limited rate
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_RATE_BURST = 20  # Records a call site may log at once
+LOG_RATE_PER_SECOND = 2.0  # Records per second a call site may log after its burst
+
 # Swedish language settings
-SWEDISH_CHARS = ['å', 'ä', 'ö', 'Å', 'Ä', 'Ö']
\ No newline at end of file
+SWEDISH_CHARS = ['å', 'ä', 'ö', 'Å', 'Ä', 'Ö']
+
+# Diacritic restoration lexicon: a general Swedish word list (one word per line,
+# optionally followed by a frequency) plus our domain vocabulary
+LEXICON_WORDLIST_PATH = os.environ.get('SWEDISH_WORDLIST')
+DOMAIN_VOCABULARY_PATH = PROJECT_ROOT / 'data' / 'domain_vocabulary.txt'
+LEXICON_STOPWORDS_PATH = PROJECT_ROOT / 'data' / 'swedish_stopwords.txt'  # Plain words never restored
+LEXICON_INDEX_PATH = TEMP_DIR / 'lexicon.idx'  # Built from the above on first use
\ No newline at end of file
@@ -6,18 +6,23 @@ import os
 import sys
 import argparse
 import logging
-import json
 import time
+import uuid
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
-from config import OUTPUT_DIR
-from src.preprocess import preprocess_pdf
-from src.textract_client import TextractClient
-from src.postprocess import process_textract_response, save_processed_content
+from config import (OUTPUT_DIR, SCRATCH_BUDGET_BYTES, SCRATCH_USE_TMPFS, ADAPTIVE_DPI, REOCR_ENABLED,
+                    LOCAL_TABLES_ENABLED, FEATURE_ROUTING, PIPELINE_ENABLED, DISTRIBUTED_TIMEOUT_SECONDS)
+from src.postprocess import save_processed_content, combine_processed_pages
 from src.table_extractor import TableExtractor
-from src.utils import setup_logging, save_tables_to_excel
+from src.form_extractor import document_key_values
+from src.utils import setup_logging, StreamingExcelWriter
+from src.fingerprint import page_content_hashes, load_page_manifest, match_previous_pages, save_page_manifest
+from src.scratch import install_signal_cleanup
+from src.index_db import DocumentIndex
+from src.processing import PageSink, extract_local_pages, process_distributed, process_steps, process_pipelined
+from src import serialization
 
 def parse_args():
     """Parse command line arguments."""
@@ -27,15 +32,59 @@ def parse_args():
                         help='Output directory for processed files')
     parser.add_argument('--dpi', type=int, default=300,
                         help='DPI for image conversion (default: 300)')
+    parser.add_argument('--adaptive-dpi', action='store_true',
+                        help='Choose each page\'s DPI (at most --dpi) from a low-resolution thumbnail')
+    parser.add_argument('--reocr', action='store_true',
+                        help='Re-read low-confidence words and table cells as high-DPI crops')
+    parser.add_argument('--local-tables', action='store_true',
+                        help='Read text and tables of born-digital pages from the PDF itself; '
+                             'only pages where that is unreliable go to Textract')
+    parser.add_argument('--route-features', action='store_true',
+                        help='Request TABLES/FORMS only for pages that look like they need them; '
+                             'other pages use text detection')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap rasterization, Textract, post-processing and output page by page '
+                             '(uses sync Textract calls)')
     parser.add_argument('--region', type=str, default='eu-north-1',
                         help='AWS region for Textract (default: eu-north-1)')
     parser.add_argument('--async', action='store_true',
-                        help='Use asynchronous Textract API (for large documents)')
+                        help='Use asynchronous Textract API (for large documents); same as --mode async')
+    parser.add_argument('--mode', type=str, choices=['auto', 'sync', 'async'], default='auto',
+                        help='Textract execution mode; auto lets the planner choose (default: auto)')
+    parser.add_argument('--s3-bucket', type=str,
+                        help='S3 bucket for asynchronous Textract jobs')
+    parser.add_argument('--compact-json', action='store_true',
+                        help='Write JSON output without indentation')
+    parser.add_argument('--task-queue', type=str,
+                        help='Distribute pages to workers via this queue URL '
+                             '(sqlite:///path/queue.db#tasks or an SQS queue URL)')
+    parser.add_argument('--result-queue', type=str,
+                        help='Queue URL the workers publish page results to')
+    parser.add_argument('--staging-bucket', type=str,
+                        help='S3 bucket for staging the PDF and large page results for remote workers')
+    parser.add_argument('--distributed-timeout', type=float, default=DISTRIBUTED_TIMEOUT_SECONDS,
+                        help='Seconds to wait for the workers\' page results '
+                             f'(default: {DISTRIBUTED_TIMEOUT_SECONDS})')
+    parser.add_argument('--since', type=str,
+                        help='Previous run of this document (any of its output files); '
+                             'only changed pages are reprocessed')
+    parser.add_argument('--scratch-budget', type=int,
+                        help='Max MB of page images on disk at once; rasterization pauses '
+                             'while the budget is full (default: unlimited)')
+    parser.add_argument('--tmpfs', action='store_true',
+                        help='Keep page images on tmpfs (/dev/shm) instead of the temp directory')
+    parser.add_argument('--index-db', type=str,
+                        help='Also upsert the results into this SQLite index (see query_index.py)')
     parser.add_argument('--debug', action='store_true',
                         help='Enable debug logging')
     return parser.parse_args()
 
-def process_pdf(pdf_path, output_dir, dpi=300, region='eu-north-1', use_async=False):
+def process_pdf(pdf_path, output_dir, dpi=300, region='eu-north-1', use_async=False,
+                compact_json=False, task_queue=None, result_queue=None, staging_bucket=None,
+                mode='auto', s3_bucket=None, since=None, scratch_budget=SCRATCH_BUDGET_BYTES,
+                scratch_tmpfs=SCRATCH_USE_TMPFS, index_db=None, adaptive_dpi=ADAPTIVE_DPI,
+                reocr=REOCR_ENABLED, local_tables=LOCAL_TABLES_ENABLED, feature_routing=FEATURE_ROUTING,
+                pipeline=PIPELINE_ENABLED, distributed_timeout=DISTRIBUTED_TIMEOUT_SECONDS):
     """
     Process a PDF with Swedish content using AWS Textract.
     
@@ -45,12 +94,44 @@ def process_pdf(pdf_path, output_dir, dpi=300, region='eu-north-1', use_async=Fa
         dpi (int): DPI for image conversion
         region (str): AWS region
         use_async (bool): Use asynchronous Textract API
+        compact_json (bool): Write JSON output without indentation
+        task_queue (str): Queue URL for distributed page processing (optional)
+        result_queue (str): Queue URL for distributed page results
+        staging_bucket (str): S3 bucket for staging the PDF for remote workers
+        mode (str): 'auto', 'sync' or 'async' Textract execution
+        s3_bucket (str): S3 bucket for asynchronous Textract jobs
+        since (str): Previous run to reuse unchanged pages from (optional)
+        scratch_budget (int): Max bytes of page images on disk at once (None: unlimited)
+        scratch_tmpfs (bool): Keep page images on tmpfs
+        index_db (str): SQLite index to upsert the results into (optional)
+        adaptive_dpi (bool): Choose each page's DPI, up to dpi, from a thumbnail
+        reocr (bool): Re-read low-confidence words and cells as high-DPI crops
+        local_tables (bool): Extract born-digital pages locally, falling back to Textract
+        feature_routing (bool): Choose the Textract features of each page from its image
+        pipeline (bool): Run steps 1-4 as a pipeline of stages, page by page,
+            with sync Textract calls (see src/pipeline.py)
+        distributed_timeout (float): Seconds to wait for the page results of
+            distributed workers (None: wait forever)
         
     Returns:
         dict: Processed content
     """
     logger = logging.getLogger(__name__)
     
+    if task_queue:
+        if not result_queue:
+            raise ValueError("A result queue is required for distributed processing")
+        # Workers rasterize at a fixed DPI and call AnalyzeDocument on every page
+        unsupported = [name for name, enabled in (('since', since), ('local_tables', local_tables),
+                                                  ('reocr', reocr), ('feature_routing', feature_routing),
+                                                  ('adaptive_dpi', adaptive_dpi), ('pipeline', pipeline))
+                       if enabled]
+        if unsupported:
+            raise ValueError(f"Not supported with distributed processing: {', '.join(unsupported)}")
+    if pipeline and (use_async or mode == 'async'):
+        logger.warning("Pipelined processing needs sync Textract calls; running the steps one by one")
+        pipeline = False
+    
     # Create output directory if it doesn't exist
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
@@ -63,106 +144,132 @@ def process_pdf(pdf_path, output_dir, dpi=300, region='eu-north-1', use_async=Fa
     logger.info(f"Processing PDF: {pdf_path}")
     logger.info(f"Output will be saved to: {output_base}")
     
-    # Step 1: Preprocess PDF to high-quality images
-    logger.info("Step 1: Preprocessing PDF")
-    image_paths, doc_id = preprocess_pdf(pdf_path, output_dir, dpi)
-    logger.info(f"Created {len(image_paths)} preprocessed images")
-    
-    # Step 2: Process each page with Textract
-    logger.info("Step 2: Processing with AWS Textract")
-    textract_client = TextractClient(region_name=region)
-    
-    all_results = []
-    for i, image_path in enumerate(image_paths):
-        logger.info(f"Processing page {i+1}/{len(image_paths)}")
-        try:
-            response = textract_client.analyze_document(image_path)
-            all_results.append(response)
-        except Exception as e:
-            logger.error(f"Error processing page {i+1}: {str(e)}")
-            continue
-    
-    if not all_results:
-        logger.error("No pages were successfully processed")
-        return None
-    
-    # Step 3: Process and correct text with Swedish character fixes
-    logger.info("Step 3: Post-processing text with Swedish character fixes")
-    processed_pages = []
-    
-    for i, result in enumerate(all_results):
-        logger.info(f"Post-processing page {i+1}/{len(all_results)}")
-        processed_content = process_textract_response(result)
-        processed_pages.append(processed_content)
-    
-    # Step 4: Extract tables
-    logger.info("Step 4: Extracting tables")
-    table_extractor = TableExtractor()
-    all_tables = []
-    
-    for i, result in enumerate(all_results):
-        logger.info(f"Extracting tables from page {i+1}/{len(all_results)}")
-        tables = table_extractor.extract_tables(result['Blocks'])
-        all_tables.extend(tables)
-    
-    # Step 5: Save results
-    logger.info("Step 5: Saving results")
-    
-    # Combine all text from pages
-    combined_text = "\n\n".join([page['text'] for page in processed_pages])
-    
-    # Create a combined result
-    combined_result = {
-        'text': combined_text,
-        'tables': all_tables,
-        'document_id': doc_id,
-        'timestamp': timestamp,
-        'source_file': pdf_path,
-        'page_count': len(image_paths)
-    }
-    
-    # Save as text, JSON, and Excel
-    logger.info("Saving processed content")
-    
-    # Save plain text
-    text_path = output_base.with_suffix('.txt')
-    with open(text_path, 'w', encoding='utf-8') as f:
-        f.write(combined_text)
-    logger.info(f"Saved text to: {text_path}")
-    
-    # Save full content as JSON
-    json_path = output_base.with_suffix('.json')
-    with open(json_path, 'w', encoding='utf-8') as f:
-        # Create a serializable version of the result
-        serializable_result = {
-            'text': combined_result['text'],
-            'tables': combined_result['tables'],
-            'document_id': combined_result['document_id'],
-            'timestamp': combined_result['timestamp'],
-            'source_file': str(combined_result['source_file']),
-            'page_count': combined_result['page_count']
-        }
-        json.dump(serializable_result, f, ensure_ascii=False, indent=2)
-    logger.info(f"Saved JSON to: {json_path}")
-    
-    # Save tables to Excel if there are any
-    if all_tables:
-        excel_path = save_tables_to_excel(all_tables, output_base)
-        logger.info(f"Saved tables to Excel: {excel_path}")
+    process_start = time.time()
+    run_report = {'timestamp': timestamp, 'source_file': str(pdf_path)}
+    
+    # Fingerprint pages so this run can be reused by later --since runs
+    content_hashes = page_content_hashes(pdf_path)
+    page_count = len(content_hashes)
+    # The workbook is closed on errors too, so no truncated .xlsx is left behind
+    with StreamingExcelWriter(output_base) as excel_writer:
+        # Finished pages are written in page order: by the pipeline as they
+        # come out of it, otherwise once all pages are processed
+        sink = PageSink(excel_writer)
+        
+        if task_queue:
+            doc_id, page_records = process_distributed(pdf_path, content_hashes, dpi, task_queue, result_queue,
+                                                       staging_bucket, distributed_timeout)
+        else:
+            page_records = {}
+            previous = None
+            if since:
+                previous = load_page_manifest(since)
+                doc_id = previous['document_id']
+                page_records = match_previous_pages(
+                    {page: page_hash for page, page_hash in enumerate(content_hashes, 1)}, previous
+                )
+                reused_by_content = list(page_records)
+                run_report['previous_run'] = str(since)
+            else:
+                doc_id = str(uuid.uuid4())
+            
+            if local_tables:
+                candidates = [page for page in range(1, page_count + 1) if page not in page_records]
+                local_pages, run_report['local_tables'] = extract_local_pages(pdf_path, candidates, content_hashes)
+                page_records.update(local_pages)
+            
+            # Only pages whose content changed and that were not extracted
+            # locally are rasterized
+            pages = [page for page in range(1, page_count + 1) if page not in page_records]
+            options = dict(previous=previous, dpi=dpi, adaptive_dpi=adaptive_dpi, region=region,
+                           scratch_budget=scratch_budget, scratch_tmpfs=scratch_tmpfs,
+                           feature_routing=feature_routing, reocr=reocr)
+            processed = {}
+            if pages:
+                if pipeline:
+                    processed, report = process_pipelined(pdf_path, pages, content_hashes, sink, page_records,
+                                                          **options)
+                else:
+                    processed, report = process_steps(pdf_path, pages, content_hashes, s3_bucket=s3_bucket,
+                                                      mode='async' if use_async else mode, **options)
+                run_report.update(report)
+            
+            if since:
+                # The paths report the pages they reused because they render identically
+                reused_by_image = run_report.get('reused_pages', [])
+                run_report['reused_pages'] = sorted(reused_by_content + reused_by_image)
+                logger.info(f"Reused {len(run_report['reused_pages'])} unchanged pages, "
+                            f"reprocessed {len(pages) - len(reused_by_image)} of {page_count}")
+            page_records.update(processed)
+        
+        if not page_records:
+            logger.error("No pages were successfully processed")
+            return None
+        sink.write_remaining(page_records)
+        processed_pages = sink.pages
+        all_tables = sink.tables
+        
+        manifest = save_page_manifest(output_base, doc_id, pdf_path, page_records, compact_json)
+        logger.info(f"Saved page manifest to: {manifest}")
+        
+        # Step 5: Save results
+        logger.info("Step 5: Saving results")
+        
+        # Combine all text from pages into a combined result; pages reused from
+        # runs before form extraction have no key-value pairs
+        key_values = document_key_values(pair for page in processed_pages for pair in page.get('key_values', ()))
+        logger.info(f"Found {sum(1 for field in key_values if field != 'other')} document fields in form data")
+        combined_result = combine_processed_pages(
+            processed_pages, all_tables, doc_id, timestamp, pdf_path, page_count, key_values
+        )
+        combined_text = combined_result['text']
+        
+        # Save as text, JSON, and Excel
+        logger.info("Saving processed content")
+        
+        # Save plain text
+        text_path = output_base.with_suffix('.txt')
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(combined_text)
+        logger.info(f"Saved text to: {text_path}")
+        
+        # Save full content as JSON
+        json_path = output_base.with_suffix('.json')
+        serialization.dump(combined_result, json_path, compact=compact_json)
+        logger.info(f"Saved JSON to: {json_path}")
+        
+        # Finish the Excel workbook if there were any tables
+        excel_path = excel_writer.close()
+        if excel_path:
+            logger.info(f"Saved tables to Excel: {excel_path}")
     
     # Extract structured maintenance data
+    maintenance_data = None
     try:
         logger.info("Extracting structured maintenance data")
-        maintenance_data = table_extractor.extract_maintenance_data(all_tables)
+        maintenance_data = TableExtractor().extract_maintenance_data(all_tables)
         
         # Save maintenance data as JSON
         maintenance_path = output_base.with_name(f"{output_base.stem}_maintenance.json")
-        with open(maintenance_path, 'w', encoding='utf-8') as f:
-            json.dump(maintenance_data, f, ensure_ascii=False, indent=2)
+        serialization.dump(maintenance_data, maintenance_path, compact=compact_json)
         logger.info(f"Saved maintenance data to: {maintenance_path}")
     except Exception as e:
         logger.error(f"Error extracting maintenance data: {str(e)}")
     
+    # Add the document to the query index
+    if index_db:
+        with DocumentIndex(index_db) as index:
+            index.upsert_document(combined_result, maintenance_data, processed_pages)
+        logger.info(f"Indexed document in: {index_db}")
+    
+    # Save the run report
+    run_report['document_id'] = doc_id
+    run_report['page_count'] = page_count
+    run_report['total_seconds'] = round(time.time() - process_start, 2)
+    report_path = output_base.with_name(f"{output_base.stem}_report.json")
+    serialization.dump(run_report, report_path, compact=compact_json)
+    logger.info(f"Saved run report to: {report_path}")
+    
     logger.info("Processing complete!")
     return combined_result
 
@@ -178,6 +285,9 @@ def main():
     logger.info("Swedish PDF Processor")
     logger.info(f"Processing file: {args.pdf_path}")
     
+    # Run exit handlers on SIGTERM so scratch storage is cleaned up
+    install_signal_cleanup()
+    
     try:
         # Process the PDF
         start_time = time.time()
@@ -186,7 +296,23 @@ def main():
             args.output_dir,
             args.dpi,
             args.region,
-            getattr(args, 'async', False)
+            getattr(args, 'async', False),
+            args.compact_json,
+            task_queue=args.task_queue,
+            result_queue=args.result_queue,
+            staging_bucket=args.staging_bucket,
+            mode=args.mode,
+            s3_bucket=args.s3_bucket,
+            since=args.since,
+            scratch_budget=args.scratch_budget * 1024 * 1024 if args.scratch_budget else SCRATCH_BUDGET_BYTES,
+            scratch_tmpfs=args.tmpfs or SCRATCH_USE_TMPFS,
+            index_db=args.index_db,
+            adaptive_dpi=args.adaptive_dpi or ADAPTIVE_DPI,
+            reocr=args.reocr or REOCR_ENABLED,
+            local_tables=args.local_tables or LOCAL_TABLES_ENABLED,
+            feature_routing=args.route_features or FEATURE_ROUTING,
+            pipeline=args.pipeline or PIPELINE_ENABLED,
+            distributed_timeout=args.distributed_timeout
         )
         end_time = time.time()
         logger.info(f"Total processing time: {end_time - start_time:.2f} seconds")
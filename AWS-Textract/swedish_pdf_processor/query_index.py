@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Query the SQLite index that main.py fills with --index-db.
+
+Examples:
+    python query_index.py output/index.db items --category Tak --year 2027 --min-cost 100000
+    python query_index.py output/index.db search "takbyte"
+    python query_index.py output/index.db years --category Tak
+    python query_index.py output/index.db documents
+"""
+import sys
+import argparse
+
+from src.index_db import DocumentIndex
+from src import serialization
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Query the index of processed documents')
+    parser.add_argument('db_path', type=str, help='Path to the index database')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    items = commands.add_parser('items', help='Find maintenance items')
+    items.add_argument('--category', type=str, help='Category, e.g. Tak (case-insensitive)')
+    items.add_argument('--year', type=int, help='Planned year (or first year with --year-to)')
+    items.add_argument('--year-to', type=int, help='Last planned year of a range')
+    items.add_argument('--min-cost', type=float, help='Minimum cost in kr')
+    items.add_argument('--max-cost', type=float, help='Maximum cost in kr')
+    items.add_argument('--action', type=str, help='Text contained in the action description')
+    items.add_argument('--limit', type=int, default=100, help='Maximum number of results (default: 100)')
+
+    search = commands.add_parser('search', help='Full-text search over page text')
+    search.add_argument('query', type=str, help='FTS5 query, e.g. takbyte or "byte av tak"')
+    search.add_argument('--limit', type=int, default=20, help='Maximum number of results (default: 20)')
+
+    years = commands.add_parser('years', help='Planned cost per year')
+    years.add_argument('--category', type=str, help='Restrict to one category')
+
+    documents = commands.add_parser('documents', help='List indexed documents')
+    documents.add_argument('--limit', type=int, default=100, help='Maximum number of results (default: 100)')
+    return parser.parse_args()
+
+def print_rows(rows, columns):
+    """Print rows as tab-separated columns with a header."""
+    print('\t'.join(columns))
+    for row in rows:
+        print('\t'.join('' if row[column] is None else str(row[column]) for column in columns))
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+
+    with DocumentIndex(args.db_path) as index:
+        if args.command == 'items':
+            rows = index.find_maintenance(args.category, args.year, args.year_to, args.min_cost,
+                                          args.max_cost, args.action, args.limit)
+            columns = ['year', 'category', 'action', 'cost', 'source_file']
+        elif args.command == 'search':
+            rows = index.search_text(args.query, args.limit)
+            columns = ['source_file', 'page', 'snippet']
+        elif args.command == 'years':
+            rows = index.summary_by_year(args.category)
+            columns = ['year', 'items', 'total_cost']
+        else:
+            rows = index.documents(args.limit)
+            columns = ['document_id', 'source_file', 'timestamp', 'page_count', 'total_cost']
+
+    if args.json:
+        print(serialization.dumps(rows).decode('utf-8'))
+    else:
+        print_rows(rows, columns)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+HTTP service for processing Swedish PDFs with AWS Textract.
+
+Keeps clients, worker pools and the response cache warm across requests,
+avoiding the per-document startup cost of main.py.
+"""
+import argparse
+import logging
+from http.server import ThreadingHTTPServer
+
+from config import TEMP_DIR, SERVICE_MAX_UPLOAD_BYTES
+from src.document_service import DocumentService, make_handler
+from src.utils import setup_logging
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Serve Swedish PDF processing over HTTP')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port to listen on (default: 8080)')
+    parser.add_argument('--dpi', type=int, default=300,
+                        help='DPI for image conversion (default: 300)')
+    parser.add_argument('--region', type=str, default='eu-north-1',
+                        help='AWS region for Textract (default: eu-north-1)')
+    parser.add_argument('--textract-concurrency', type=int, default=8,
+                        help='Maximum concurrent Textract calls across all documents (default: 8)')
+    parser.add_argument('--raster-workers', type=int, default=None,
+                        help='Rasterization processes (default: CPU count)')
+    parser.add_argument('--max-jobs', type=int, default=4,
+                        help='Maximum documents processed at the same time (default: 4)')
+    parser.add_argument('--max-upload-mb', type=int, default=SERVICE_MAX_UPLOAD_BYTES // (1024 * 1024),
+                        help='Largest PDF accepted in a request body, in MB '
+                             f'(default: {SERVICE_MAX_UPLOAD_BYTES // (1024 * 1024)})')
+    parser.add_argument('--cache-dir', type=str, default=str(TEMP_DIR / 'response_cache'),
+                        help='Textract response cache directory')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    return parser.parse_args()
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+
+    log_level = logging.DEBUG if args.debug else logging.INFO
+    setup_logging(log_level)
+    logger = logging.getLogger(__name__)
+
+    service = DocumentService(
+        region_name=args.region,
+        dpi=args.dpi,
+        textract_concurrency=args.textract_concurrency,
+        raster_workers=args.raster_workers,
+        max_jobs=args.max_jobs,
+        cache_dir=args.cache_dir,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    logger.info(f"Listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+if __name__ == '__main__':
+    main()
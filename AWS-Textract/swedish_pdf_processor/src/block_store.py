@@ -0,0 +1,426 @@
+"""
+Compact, array-backed storage for Textract blocks.
+
+Large asynchronous jobs return hundreds of thousands of blocks, each one a
+nested dict with a geometry polygon, relationship lists and string IDs.
+BlockStore keeps the same information in flat columns instead:
+
+- block IDs are interned once and referred to by integer ordinals
+- type, confidence, bounding box, page and cell position live in arrays
+- relationships are stored CSR-style (one offsets array, one targets array)
+
+The store behaves like a read-only ``{Id: block}`` dict, where each block is a
+lightweight dict-like view, so code written against ``blocks_map`` keeps
+working. Geometry polygons are not kept; only the bounding box is.
+"""
+import sys
+import math
+from array import array
+from collections.abc import Mapping
+
+# Keys that are stored in dedicated columns; anything else goes to _extra
+_COLUMN_KEYS = frozenset([
+    'Id', 'BlockType', 'Confidence', 'Text', 'Page', 'Geometry', 'Relationships',
+    'RowIndex', 'ColumnIndex', 'RowSpan', 'ColumnSpan', 'EntityTypes', 'TextType',
+])
+
+_NAN = float('nan')
+
+
+class _Interner:
+    """Map small sets of repeated values to byte-sized codes."""
+
+    def __init__(self, initial=()):
+        self.values = []
+        self.codes = {}
+        for value in initial:
+            self.code(value)
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+class BlockView(Mapping):
+    """Read-only, dict-like view of a single block in a BlockStore."""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self):
+        """int: Row index of the block inside its store."""
+        return self._row
+
+    def _keys(self):
+        store, row = self._store, self._row
+        keys = ['Id', 'BlockType']
+        if not math.isnan(store._confidence[row]):
+            keys.append('Confidence')
+        if store._text[row] is not None:
+            keys.append('Text')
+        if store._page[row]:
+            keys.append('Page')
+        if not math.isnan(store._left[row]):
+            keys.append('Geometry')
+        if store._rel_offsets[row + 1] > store._rel_offsets[row]:
+            keys.append('Relationships')
+        keys.extend(key for key, column in _CELL_COLUMNS.items() if getattr(store, column)[row])
+        if store._entity[row]:
+            keys.append('EntityTypes')
+        if store._text_type[row]:
+            keys.append('TextType')
+        keys.extend(store._extra.get(row, ()))
+        return keys
+
+    def __getitem__(self, key):
+        store, row = self._store, self._row
+        if key == 'Id':
+            return store._ids[store._ordinal[row]]
+        if key == 'BlockType':
+            return store._block_types.values[store._type[row]]
+        if key == 'Text':
+            value = store._text[row]
+        elif key == 'Confidence':
+            value = store._confidence[row]
+            value = None if math.isnan(value) else value
+        elif key == 'Page':
+            value = store._page[row] or None
+        elif key == 'Geometry':
+            bbox = store.bbox(row)
+            value = {'BoundingBox': bbox} if bbox else None
+        elif key == 'Relationships':
+            value = store.relationships(row) or None
+        elif key in ('RowIndex', 'ColumnIndex', 'RowSpan', 'ColumnSpan'):
+            value = getattr(store, _CELL_COLUMNS[key])[row] or None
+        elif key == 'EntityTypes':
+            value = store._entity_types.values[store._entity[row]]
+            value = list(value) if value else None
+        elif key == 'TextType':
+            value = store._text_types.values[store._text_type[row]]
+        else:
+            value = store._extra.get(row, {}).get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"BlockView({dict(self)!r})"
+
+
+_CELL_COLUMNS = {
+    'RowIndex': '_row_index',
+    'ColumnIndex': '_col_index',
+    'RowSpan': '_row_span',
+    'ColumnSpan': '_col_span',
+}
+
+
+class BlockStore(Mapping):
+    """Memory-compact, columnar store of Textract blocks keyed by block Id."""
+
+    def __init__(self):
+        """Initialize an empty block store."""
+        # ID interning: ordinal -> Id string, Id string -> ordinal,
+        # ordinal -> row (-1 while a block is only known as a relationship target)
+        self._ids = []
+        self._ordinals = {}
+        self._row_of = array('i')
+
+        # Per-row columns
+        self._ordinal = array('I')
+        self._type = array('B')
+        # Doubles, so views return the Confidence and BoundingBox values Textract sent
+        self._confidence = array('d')
+        self._left = array('d')
+        self._top = array('d')
+        self._width = array('d')
+        self._height = array('d')
+        self._page = array('H')
+        self._row_index = array('H')
+        self._col_index = array('H')
+        self._row_span = array('H')
+        self._col_span = array('H')
+        self._entity = array('B')
+        self._text_type = array('B')
+        self._text = []
+        self._extra = {}
+
+        # CSR relationships: edges of row r are [_rel_offsets[r], _rel_offsets[r+1])
+        self._rel_offsets = array('I', [0])
+        self._rel_types = array('B')
+        self._rel_targets = array('I')
+
+        self._block_types = _Interner()
+        self._relationship_types = _Interner(['CHILD'])
+        self._entity_types = _Interner([()])
+        self._text_types = _Interner([None])
+
+    @classmethod
+    def from_blocks(cls, blocks, page=None):
+        """
+        Build a store from a list of Textract blocks.
+
+        As in a ``{Id: block}`` dict, the last block of a duplicated Id
+        wins and keeps the position of the first.
+
+        Args:
+            blocks (list): List of Textract blocks
+            page (int): Page number for blocks without a Page field (optional)
+
+        Returns:
+            BlockStore: The populated store
+        """
+        store = cls()
+        try:
+            store.extend(blocks, page)
+        except ValueError:
+            # Duplicated Ids are rare, so only then are the blocks deduplicated
+            store = cls()
+            store.extend({block['Id']: block for block in blocks}.values(), page)
+        return store
+
+    @classmethod
+    def from_responses(cls, responses):
+        """
+        Build a store from Textract responses, one response at a time.
+
+        Responses are only read, so passing a generator keeps at most one raw
+        response in memory alongside the compact store.
+
+        Args:
+            responses (iterable): Textract responses with a 'Blocks' list
+
+        Returns:
+            BlockStore: The populated store
+        """
+        store = cls()
+        for i, response in enumerate(responses):
+            store.extend(response['Blocks'], page=i + 1)
+        return store
+
+    def _intern(self, block_id):
+        ordinal = self._ordinals.get(block_id)
+        if ordinal is None:
+            ordinal = len(self._ids)
+            self._ids.append(block_id)
+            self._ordinals[block_id] = ordinal
+            self._row_of.append(-1)
+        return ordinal
+
+    def add_block(self, block, page=None):
+        """
+        Append a single Textract block to the store.
+
+        Args:
+            block (dict): Textract block
+            page (int): Page number used when the block has no Page field
+
+        Returns:
+            int: Row index of the stored block
+
+        Raises:
+            ValueError: If a block with the same Id is already stored
+        """
+        ordinal = self._intern(block['Id'])
+        if self._row_of[ordinal] != -1:
+            raise ValueError(f"Duplicate block Id: {block['Id']}")
+
+        row = len(self._ordinal)
+        self._row_of[ordinal] = row
+        self._ordinal.append(ordinal)
+        self._type.append(self._block_types.code(block['BlockType']))
+
+        confidence = block.get('Confidence')
+        self._confidence.append(_NAN if confidence is None else confidence)
+
+        bbox = block.get('Geometry', {}).get('BoundingBox')
+        if bbox:
+            self._left.append(bbox['Left'])
+            self._top.append(bbox['Top'])
+            self._width.append(bbox['Width'])
+            self._height.append(bbox['Height'])
+        else:
+            for column in (self._left, self._top, self._width, self._height):
+                column.append(_NAN)
+
+        self._page.append(block.get('Page') or page or 0)
+        self._row_index.append(block.get('RowIndex', 0))
+        self._col_index.append(block.get('ColumnIndex', 0))
+        self._row_span.append(block.get('RowSpan', 0))
+        self._col_span.append(block.get('ColumnSpan', 0))
+        self._entity.append(self._entity_types.code(tuple(block.get('EntityTypes', ()))))
+        self._text_type.append(self._text_types.code(block.get('TextType')))
+
+        text = block.get('Text')
+        self._text.append(sys.intern(text) if text is not None else None)
+
+        for relationship in block.get('Relationships', ()):
+            rel_type = self._relationship_types.code(relationship['Type'])
+            for target in relationship.get('Ids', ()):
+                self._rel_types.append(rel_type)
+                self._rel_targets.append(self._intern(target))
+        self._rel_offsets.append(len(self._rel_targets))
+
+        extra = {key: value for key, value in block.items() if key not in _COLUMN_KEYS}
+        if extra:
+            self._extra[row] = extra
+
+        return row
+
+    def extend(self, blocks, page=None):
+        """
+        Append Textract blocks to the store.
+
+        Args:
+            blocks (iterable): Textract blocks
+            page (int): Page number used for blocks without a Page field
+        """
+        for block in blocks:
+            self.add_block(block, page)
+
+    # Mapping interface (Id -> BlockView)
+
+    def __getitem__(self, block_id):
+        row = self.index(block_id)
+        if row is None:
+            raise KeyError(block_id)
+        return BlockView(self, row)
+
+    def __contains__(self, block_id):
+        return self.index(block_id) is not None
+
+    def __iter__(self):
+        ids, ordinal = self._ids, self._ordinal
+        return (ids[ordinal[row]] for row in range(len(ordinal)))
+
+    def __len__(self):
+        return len(self._ordinal)
+
+    # Row-level accessors
+
+    def index(self, block_id):
+        """Return the row of a block Id, or None if the block is not stored."""
+        ordinal = self._ordinals.get(block_id)
+        if ordinal is None:
+            return None
+        row = self._row_of[ordinal]
+        return row if row != -1 else None
+
+    def view(self, row):
+        """Return a dict-like view of the block stored at ``row``."""
+        return BlockView(self, row)
+
+    def blocks(self, block_type=None):
+        """
+        Iterate over stored blocks in insertion order.
+
+        Args:
+            block_type (str): Only yield blocks of this type (optional)
+
+        Yields:
+            BlockView: Dict-like view of each block
+        """
+        for row in self.rows(block_type):
+            yield BlockView(self, row)
+
+    def rows(self, block_type=None):
+        """Return the rows of all blocks, or of blocks of one type."""
+        if block_type is None:
+            return range(len(self._ordinal))
+        code = self._block_types.codes.get(block_type)
+        if code is None:
+            return []
+        return [row for row, value in enumerate(self._type) if value == code]
+
+    def block_type(self, row):
+        """Return the BlockType of a row."""
+        return self._block_types.values[self._type[row]]
+
+    def block_id(self, row):
+        """Return the Id of a row."""
+        return self._ids[self._ordinal[row]]
+
+    def text(self, row):
+        """Return the Text of a row, or None."""
+        return self._text[row]
+
+    def confidence(self, row):
+        """Return the Confidence of a row, or None."""
+        value = self._confidence[row]
+        return None if math.isnan(value) else value
+
+    def page(self, row):
+        """Return the page number of a row, or None if unknown."""
+        return self._page[row] or None
+
+    def bbox(self, row):
+        """Return the BoundingBox dict of a row, or None."""
+        if math.isnan(self._left[row]):
+            return None
+        return {
+            'Width': self._width[row],
+            'Height': self._height[row],
+            'Left': self._left[row],
+            'Top': self._top[row],
+        }
+
+    def cell_position(self, row):
+        """Return (RowIndex, ColumnIndex, RowSpan, ColumnSpan) of a CELL row."""
+        return (self._row_index[row], self._col_index[row],
+                self._row_span[row] or 1, self._col_span[row] or 1)
+
+    def entity_types(self, row):
+        """Return the EntityTypes tuple of a row (empty if none)."""
+        return self._entity_types.values[self._entity[row]]
+
+    def related(self, row, rel_type='CHILD'):
+        """
+        Return the rows related to ``row`` by a relationship type.
+
+        Targets that are referenced but not stored are skipped.
+
+        Args:
+            row (int): Source row
+            rel_type (str): Relationship type, e.g. 'CHILD' or 'VALUE'
+
+        Returns:
+            list: Target rows in relationship order
+        """
+        code = self._relationship_types.codes.get(rel_type)
+        if code is None:
+            return []
+        row_of, types, targets = self._row_of, self._rel_types, self._rel_targets
+        related = []
+        for edge in range(self._rel_offsets[row], self._rel_offsets[row + 1]):
+            if types[edge] == code:
+                target = row_of[targets[edge]]
+                if target != -1:
+                    related.append(target)
+        return related
+
+    def children(self, row):
+        """Return the CHILD rows of ``row``."""
+        return self.related(row, 'CHILD')
+
+    def relationships(self, row):
+        """Rebuild the Textract 'Relationships' list of a row."""
+        grouped = {}
+        ids, types, targets = self._ids, self._rel_types, self._rel_targets
+        for edge in range(self._rel_offsets[row], self._rel_offsets[row + 1]):
+            rel_type = self._relationship_types.values[types[edge]]
+            grouped.setdefault(rel_type, []).append(ids[targets[edge]])
+        return [{'Type': rel_type, 'Ids': rel_ids} for rel_type, rel_ids in grouped.items()]
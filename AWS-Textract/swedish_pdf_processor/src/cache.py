@@ -0,0 +1,88 @@
+"""
+On-disk cache of Textract responses keyed by page image content.
+"""
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+from src import serialization
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Cache Textract responses by a hash of the page image and feature types."""
+
+    def __init__(self, cache_dir):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory for cached responses
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, image_bytes, features=()):
+        """
+        Compute the cache key of a page image.
+
+        Args:
+            image_bytes (bytes): Encoded page image
+            features (list): Textract feature types used for the call
+
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256(image_bytes)
+        digest.update(','.join(sorted(features or ())).encode('ascii'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.cache"
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            dict: Cached Textract response, or None
+        """
+        path = self._path(key)
+        try:
+            response = serialization.load_cache(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {str(e)}")
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key, response):
+        """
+        Store a response.
+
+        Args:
+            key (str): Cache key
+            response (dict): Textract response
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        serialization.dump_cache(response, tmp_path)
+        os.replace(tmp_path, path)
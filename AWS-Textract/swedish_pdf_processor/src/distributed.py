@@ -0,0 +1,483 @@
+"""
+Distributed page processing over a message queue.
+
+A Coordinator splits a document into page tasks and publishes them to a task
+queue. Workers, on any number of hosts, rasterize, OCR and post-process one
+page per task and publish the result to a result queue. The coordinator
+collects the results for its document and returns them in page order.
+
+Two queue backends share the same interface:
+
+- SQSQueue: Amazon SQS, for multi-host deployments
+- SQLiteQueue: a file-backed queue for running coordinator and workers on
+  one machine (any number of processes can share the database file)
+"""
+import os
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+import boto3
+from pdf2image import pdfinfo_from_path
+
+from config import AWS_REGION
+from src import serialization
+from src.preprocess import preprocess_page
+from src.textract_client import TextractClient
+from src.postprocess import process_textract_response
+from src.table_extractor import TableExtractor
+from src.form_extractor import extract_key_values
+from src.block_store import BlockStore
+from src.utils import upload_to_s3, download_from_s3
+
+logger = logging.getLogger(__name__)
+
+# Seconds a received message stays hidden before it is handed out again
+DEFAULT_VISIBILITY_TIMEOUT = 600
+
+# Largest SQS message body
+SQS_MAX_MESSAGE_BYTES = 256 * 1024
+
+
+class SQLiteQueue:
+    """Message queue stored in a SQLite database file."""
+
+    # Messages of any size are accepted
+    max_message_bytes = None
+
+    def __init__(self, path, name='tasks', visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT,
+                 poll_interval=0.5):
+        """
+        Initialize the queue, creating the database if needed.
+
+        Args:
+            path (str): Path to the SQLite database file
+            name (str): Queue name; several queues can share one file
+            visibility_timeout (int): Seconds before an undeleted message is redelivered
+            poll_interval (float): Seconds between polls while waiting for a message
+        """
+        self.path = str(path)
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " queue TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " visible_at REAL NOT NULL,"
+            " receipt TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_queue ON messages (queue, visible_at, id)"
+        )
+
+    def send(self, message):
+        """
+        Publish a message.
+
+        Args:
+            message (dict): JSON-serializable message
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO messages (queue, body, visible_at) VALUES (?, ?, ?)",
+                (self.name, serialization.dumps(message, compact=True), time.time()),
+            )
+
+    def receive(self, wait_seconds=0):
+        """
+        Receive the next visible message, hiding it for the visibility timeout.
+
+        Args:
+            wait_seconds (float): How long to wait for a message
+
+        Returns:
+            tuple: (receipt, message), or None if no message arrived in time
+        """
+        deadline = time.time() + wait_seconds
+        while True:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    row = self._conn.execute(
+                        "SELECT id, body FROM messages WHERE queue = ? AND visible_at <= ?"
+                        " ORDER BY visible_at, id LIMIT 1",
+                        (self.name, now),
+                    ).fetchone()
+                    if row:
+                        receipt = uuid.uuid4().hex
+                        self._conn.execute(
+                            "UPDATE messages SET visible_at = ?, receipt = ? WHERE id = ?",
+                            (now + self.visibility_timeout, receipt, row[0]),
+                        )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            if row:
+                return receipt, serialization.loads(row[1])
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def delete(self, receipt):
+        """Delete a received message."""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE receipt = ?", (receipt,))
+
+    def release(self, receipt):
+        """Make a received message visible again immediately."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE messages SET visible_at = ?, receipt = NULL WHERE receipt = ?",
+                (time.time(), receipt),
+            )
+
+
+class SQSQueue:
+    """Amazon SQS queue with the same interface as SQLiteQueue."""
+
+    max_message_bytes = SQS_MAX_MESSAGE_BYTES
+
+    def __init__(self, queue_url, region_name=None, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        """
+        Initialize the queue.
+
+        Args:
+            queue_url (str): SQS queue URL
+            region_name (str): AWS region (default: taken from the queue URL)
+            visibility_timeout (int): Seconds before an undeleted message is redelivered
+        """
+        if region_name is None:
+            # https://sqs.<region>.amazonaws.com/<account>/<name>
+            host_parts = urlparse(queue_url).netloc.split('.')
+            region_name = host_parts[1] if len(host_parts) > 2 else AWS_REGION
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.client = boto3.client('sqs', region_name=region_name)
+
+    def send(self, message):
+        """Publish a message."""
+        body = serialization.dumps(message, compact=True).decode('utf-8')
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)
+
+    def receive(self, wait_seconds=0):
+        """Receive the next message using long polling (at most 20 seconds per call)."""
+        deadline = time.time() + wait_seconds
+        while True:
+            remaining = max(0, deadline - time.time())
+            response = self.client.receive_message(
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=1,
+                WaitTimeSeconds=int(min(20, remaining)),
+                VisibilityTimeout=self.visibility_timeout,
+            )
+            messages = response.get('Messages', [])
+            if messages:
+                return messages[0]['ReceiptHandle'], serialization.loads(messages[0]['Body'])
+            if time.time() >= deadline:
+                return None
+
+    def delete(self, receipt):
+        """Delete a received message."""
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt)
+
+    def release(self, receipt):
+        """Make a received message visible again immediately."""
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=receipt, VisibilityTimeout=0
+        )
+
+
+def open_queue(url):
+    """
+    Open a queue from a URL.
+
+    Supported forms:
+        sqlite:///path/to/queue.db#name  (name defaults to 'tasks')
+        https://sqs.<region>.amazonaws.com/<account>/<queue>
+
+    Args:
+        url (str): Queue URL
+
+    Returns:
+        SQLiteQueue or SQSQueue: The opened queue
+    """
+    if url.startswith('sqlite://'):
+        location, _, name = url[len('sqlite://'):].partition('#')
+        return SQLiteQueue(location, name or 'tasks')
+    if url.startswith('https://') and 'sqs' in urlparse(url).netloc:
+        return SQSQueue(url)
+    raise ValueError(f"Unsupported queue URL: {url}")
+
+
+def process_page_task(task, textract_client, table_extractor, work_dir):
+    """
+    Rasterize, OCR and post-process one page task.
+
+    Args:
+        task (dict): Page task published by the Coordinator
+        textract_client (TextractClient): Client for Textract calls
+        table_extractor (TableExtractor): Table extractor
+        work_dir (str): Scratch directory for the page image
+
+    Returns:
+        dict: Page result with 'text', 'tables' and 'key_values'
+    """
+    source = task['source']
+    if source.startswith('s3://'):
+        bucket, _, key = source[len('s3://'):].partition('/')
+        pdf_path = os.path.join(work_dir, f"{task['document_id']}.pdf")
+        if not os.path.exists(pdf_path):
+            # Keep only the current document's PDF in the scratch directory
+            for old_pdf in Path(work_dir).glob('*.pdf'):
+                old_pdf.unlink()
+            download_from_s3(bucket, key, pdf_path)
+    else:
+        pdf_path = source
+
+    image_path = preprocess_page(pdf_path, task['page'], work_dir, task['dpi'])
+    try:
+        response = textract_client.analyze_document(image_path)
+    finally:
+        os.remove(image_path)
+
+    processed_content = process_textract_response(response)
+    store = BlockStore.from_blocks(response['Blocks'])
+    return {
+        'text': processed_content['text'],
+        'tables': table_extractor.extract_tables(store),
+        'key_values': extract_key_values(store),
+    }
+
+
+def publish_result(result_queue, result, staging_bucket=None, work_dir=None):
+    """
+    Publish a page result, staging it in S3 if it is too large for a message.
+
+    A staged result is replaced by a message with its 'result_uri', which
+    Coordinator.collect downloads.
+
+    Args:
+        result_queue: Queue to publish the result to
+        result (dict): Page result with 'document_id' and 'page'
+        staging_bucket (str): S3 bucket for results over the message size limit
+        work_dir (str): Scratch directory for staged results
+
+    Raises:
+        ValueError: If the result is too large and there is no staging bucket
+    """
+    limit = result_queue.max_message_bytes
+    if limit is not None:
+        body = serialization.dumps(result, compact=True)
+        if len(body) > limit:
+            if not staging_bucket:
+                raise ValueError(f"Result of {len(body)} bytes exceeds the {limit} byte message limit "
+                                 f"and no staging bucket was given")
+            object_key = f"{result['document_id']}/results/page_{result['page']}.json"
+            result_path = os.path.join(work_dir or tempfile.gettempdir(),
+                                       f"{result['document_id']}_page_{result['page']}.json")
+            with open(result_path, 'wb') as f:
+                f.write(body)
+            try:
+                upload_to_s3(result_path, staging_bucket, object_key)
+            finally:
+                os.remove(result_path)
+            result = {
+                'document_id': result['document_id'],
+                'page': result['page'],
+                'result_uri': f"s3://{staging_bucket}/{object_key}",
+            }
+    result_queue.send(result)
+
+
+def run_worker(task_queue, result_queue, region=AWS_REGION, idle_timeout=None, wait_seconds=20):
+    """
+    Process page tasks until the task queue stays empty for idle_timeout.
+
+    Args:
+        task_queue: Queue to receive page tasks from
+        result_queue: Queue to publish page results to
+        region (str): AWS region for Textract
+        idle_timeout (float): Stop after this many idle seconds (default: run forever)
+        wait_seconds (float): Long-poll duration per receive call
+
+    Returns:
+        int: Number of tasks processed
+    """
+    textract_client = TextractClient(region_name=region)
+    table_extractor = TableExtractor()
+    work_dir = tempfile.mkdtemp(prefix='page_worker_')
+    processed = 0
+    idle_since = time.time()
+
+    try:
+        while True:
+            received = task_queue.receive(wait_seconds)
+            if received is None:
+                if idle_timeout is not None and time.time() - idle_since >= idle_timeout:
+                    logger.info(f"Worker idle for {idle_timeout}s, stopping")
+                    return processed
+                continue
+
+            receipt, task = received
+            # A malformed task fails in process_page_task and gets an error result
+            document_id, page = task.get('document_id'), task.get('page')
+            logger.info(f"Processing page {page} of document {document_id}")
+            result = {'document_id': document_id, 'page': page}
+            try:
+                result.update(process_page_task(task, textract_client, table_extractor, work_dir))
+            except Exception as e:
+                logger.error(f"Error processing page {page}: {str(e)}")
+                result['error'] = str(e)
+
+            try:
+                publish_result(result_queue, result, task.get('staging_bucket'), work_dir)
+            except Exception as e:
+                logger.error(f"Error publishing result of page {page}: {str(e)}")
+                try:
+                    result_queue.send({'document_id': document_id, 'page': page,
+                                       'error': f"Could not publish result: {str(e)}"})
+                except Exception as e:
+                    # The result queue is unavailable; let the task be redelivered
+                    logger.error(f"Error publishing error of page {page}: {str(e)}")
+                    task_queue.release(receipt)
+                    continue
+            task_queue.delete(receipt)
+            processed += 1
+            idle_since = time.time()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class Coordinator:
+    """Split documents into page tasks and reassemble the page results."""
+
+    def __init__(self, task_queue, result_queue):
+        """
+        Initialize the coordinator.
+
+        Args:
+            task_queue: Queue that page tasks are published to
+            result_queue: Queue that workers publish page results to
+        """
+        self.task_queue = task_queue
+        self.result_queue = result_queue
+
+    def submit(self, source, page_count, dpi, doc_id=None, staging_bucket=None):
+        """
+        Publish one task per page.
+
+        Args:
+            source (str): Local PDF path reachable by the workers, or an s3:// URI
+            page_count (int): Number of pages in the document
+            dpi (int): DPI for image conversion
+            doc_id (str): Document ID (default: a new UUID)
+            staging_bucket (str): S3 bucket for page results that are too large
+                for a message (optional)
+
+        Returns:
+            str: Document ID
+        """
+        doc_id = doc_id or str(uuid.uuid4())
+        for page in range(1, page_count + 1):
+            task = {
+                'document_id': doc_id,
+                'source': source,
+                'page': page,
+                'dpi': dpi,
+            }
+            if staging_bucket:
+                task['staging_bucket'] = staging_bucket
+            self.task_queue.send(task)
+        logger.info(f"Published {page_count} page tasks for document {doc_id}")
+        return doc_id
+
+    def collect(self, doc_id, page_count, timeout=None, wait_seconds=5):
+        """
+        Wait for all page results of a document.
+
+        Results for other documents are released back to the queue so that
+        several coordinators can share one result queue.
+
+        Args:
+            doc_id (str): Document ID
+            page_count (int): Number of pages to wait for
+            timeout (float): Give up after this many seconds (default: wait forever)
+            wait_seconds (float): Long-poll duration per receive call
+
+        Returns:
+            list: Page results ordered by page number
+        """
+        results = {}
+        deadline = time.time() + timeout if timeout is not None else None
+        while len(results) < page_count:
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(
+                    f"Received {len(results)}/{page_count} pages for document {doc_id}"
+                )
+            received = self.result_queue.receive(wait_seconds)
+            if received is None:
+                continue
+            receipt, result = received
+            if result.get('document_id') != doc_id:
+                self.result_queue.release(receipt)
+                continue
+            if 'result_uri' in result:
+                result = self._load_staged(result)
+            results[result['page']] = result
+            self.result_queue.delete(receipt)
+            logger.info(f"Received page {result['page']} ({len(results)}/{page_count})")
+        return [results[page] for page in sorted(results)]
+
+    def _load_staged(self, result):
+        """Download a page result that a worker staged in S3."""
+        bucket, _, object_key = result['result_uri'][len('s3://'):].partition('/')
+        try:
+            with tempfile.TemporaryDirectory(prefix='page_result_') as work_dir:
+                result_path = os.path.join(work_dir, 'result.json')
+                download_from_s3(bucket, object_key, result_path)
+                return serialization.load(result_path)
+        except Exception as e:
+            logger.error(f"Error loading result of page {result['page']}: {str(e)}")
+            return {'document_id': result['document_id'], 'page': result['page'],
+                    'error': f"Could not load staged result: {str(e)}"}
+
+    def process(self, pdf_path, dpi, staging_bucket=None, timeout=None):
+        """
+        Process a document on the workers and return its page results in order.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            dpi (int): DPI for image conversion
+            staging_bucket (str): S3 bucket to stage the PDF in for remote workers
+                (optional; without it workers must be able to read pdf_path)
+            timeout (float): Give up after this many seconds
+
+        Returns:
+            tuple: (document ID, list of page results)
+        """
+        page_count = pdfinfo_from_path(pdf_path)['Pages']
+        doc_id = str(uuid.uuid4())
+
+        if staging_bucket:
+            object_key = f"{doc_id}/{Path(pdf_path).name}"
+            upload_to_s3(str(pdf_path), staging_bucket, object_key)
+            source = f"s3://{staging_bucket}/{object_key}"
+        else:
+            source = str(Path(pdf_path).resolve())
+
+        self.submit(source, page_count, dpi, doc_id, staging_bucket)
+        return doc_id, self.collect(doc_id, page_count, timeout)
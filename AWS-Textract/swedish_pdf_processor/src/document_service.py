@@ -0,0 +1,362 @@
+"""
+Long-running document processing service.
+
+DocumentService keeps warm Textract and S3 clients, a rasterization process
+pool and the response cache across requests. Pages from all in-flight
+documents share one Textract thread pool, which acts as the global
+concurrency limit. make_handler() exposes the service over HTTP.
+"""
+import os
+import re
+import time
+import uuid
+import shutil
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import boto3
+from pdf2image import pdfinfo_from_path
+
+from config import PDF_DPI, TEMP_DIR, SERVICE_MAX_UPLOAD_BYTES
+from src import serialization
+from src.cache import ResponseCache
+from src.metrics import Metrics
+from src.preprocess import preprocess_page
+from src.textract_client import TextractClient
+from src.postprocess import process_textract_response, combine_processed_pages
+from src.table_extractor import TableExtractor
+from src.form_extractor import extract_key_values, document_key_values
+from src.block_store import BlockStore
+
+logger = logging.getLogger(__name__)
+
+# Number of finished jobs kept for status queries
+MAX_FINISHED_JOBS = 1000
+
+
+class DocumentService:
+    """Process PDFs with shared, warm resources."""
+
+    def __init__(self, region_name, dpi=PDF_DPI, textract_concurrency=8, raster_workers=None,
+                 max_jobs=4, cache_dir=None, work_dir=None, max_upload_bytes=SERVICE_MAX_UPLOAD_BYTES):
+        """
+        Initialize the service.
+
+        Args:
+            region_name (str): AWS region for Textract and S3
+            dpi (int): DPI for image conversion
+            textract_concurrency (int): Maximum concurrent Textract calls across all documents
+            raster_workers (int): Rasterization processes (default: CPU count)
+            max_jobs (int): Maximum documents processed at the same time
+            cache_dir (str): Directory for the Textract response cache (optional)
+            work_dir (str): Scratch directory for uploads and page images
+            max_upload_bytes (int): Largest request body accepted
+        """
+        self.dpi = dpi
+        self.max_upload_bytes = max_upload_bytes
+        self.work_dir = Path(work_dir) if work_dir else TEMP_DIR / 'service'
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        self.metrics = Metrics()
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.textract_client = TextractClient(region_name=region_name, cache=self.cache)
+        self.s3_client = boto3.client('s3', region_name=region_name)
+
+        self.raster_pool = ProcessPoolExecutor(max_workers=raster_workers)
+        self.textract_pool = ThreadPoolExecutor(max_workers=textract_concurrency,
+                                                thread_name_prefix='textract')
+        self.job_pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='job')
+
+        self.jobs = {}
+        self._jobs_lock = threading.Lock()
+
+        self.metrics.describe('documents_total', 'Documents processed, by status')
+        self.metrics.describe('pages_total', 'Pages sent to Textract')
+        self.metrics.describe('textract_seconds', 'Time spent in Textract calls')
+        self.metrics.describe('document_seconds', 'End-to-end document processing time')
+        self.metrics.describe('jobs_in_progress', 'Documents currently being processed')
+        self.metrics.describe('textract_inflight', 'Textract calls currently in flight')
+
+    def shutdown(self):
+        """Stop the worker pools."""
+        self.job_pool.shutdown(wait=True)
+        self.textract_pool.shutdown(wait=True)
+        self.raster_pool.shutdown(wait=True)
+
+    def download_s3_uri(self, s3_uri, job_id):
+        """
+        Download an s3://bucket/key document into the scratch directory.
+
+        Returns:
+            Path: Local file path
+        """
+        parsed = urlparse(s3_uri)
+        if parsed.scheme != 's3' or not parsed.netloc or not parsed.path.strip('/'):
+            raise ValueError(f"Invalid S3 URI: {s3_uri}")
+        local_path = self.work_dir / f"{job_id}.pdf"
+        self.s3_client.download_file(parsed.netloc, parsed.path.lstrip('/'), str(local_path))
+        return local_path
+
+    def submit(self, pdf_path, source, job_id=None):
+        """
+        Queue a document for processing.
+
+        Args:
+            pdf_path (str): Local path to the PDF (deleted when the job finishes)
+            source (str): Original file name or S3 URI, reported as source_file
+            job_id (str): Job ID (default: a new UUID)
+
+        Returns:
+            dict: Job record
+        """
+        job = {
+            'job_id': job_id or str(uuid.uuid4()),
+            'status': 'queued',
+            'source_file': source,
+            'submitted_at': datetime.now().isoformat(),
+        }
+        with self._jobs_lock:
+            self.jobs[job['job_id']] = job
+            self._prune_jobs()
+        future = self.job_pool.submit(self._run_job, job, Path(pdf_path))
+        self._update_job(job, future=future)
+        return job
+
+    def get_job(self, job_id):
+        """Return the job record for a job ID, or None."""
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def job_summary(self, job):
+        """Return a copy of a job record without its future."""
+        # Taken under the lock, since the job thread updates the record
+        with self._jobs_lock:
+            return {key: value for key, value in job.items() if key != 'future'}
+
+    def _update_job(self, job, **fields):
+        with self._jobs_lock:
+            job.update(fields)
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job['status'] in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _run_job(self, job, pdf_path):
+        self._update_job(job, status='running')
+        self.metrics.add('jobs_in_progress', 1)
+        start_time = time.time()
+        # Published together, so a finished job is never seen without its result
+        fields = {}
+        try:
+            fields['result'] = self.process_document(pdf_path, job['source_file'], job['job_id'])
+            fields['status'] = 'succeeded'
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {str(e)}", exc_info=True)
+            fields['error'] = str(e)
+            fields['status'] = 'failed'
+        finally:
+            fields['finished_at'] = datetime.now().isoformat()
+            self._update_job(job, **fields)
+            self.metrics.add('jobs_in_progress', -1)
+            self.metrics.inc('documents_total', labels={'status': job['status']})
+            self.metrics.observe('document_seconds', time.time() - start_time)
+            pdf_path.unlink(missing_ok=True)
+        return job.get('result')
+
+    def _analyze_page(self, image_path):
+        self.metrics.add('textract_inflight', 1)
+        start_time = time.time()
+        try:
+            return self.textract_client.analyze_document(image_path)
+        finally:
+            self.metrics.add('textract_inflight', -1)
+            self.metrics.observe('textract_seconds', time.time() - start_time)
+            self.metrics.inc('pages_total')
+            os.remove(image_path)
+
+    def process_document(self, pdf_path, source_file, doc_id=None):
+        """
+        Process a PDF and return a result shaped like the JSON process_pdf writes.
+
+        Pages are rasterized on the process pool and each page is sent to the
+        shared Textract pool as soon as its image is ready.
+
+        Every page is rendered at the service DPI and analyzed with TABLES
+        and FORMS. Unlike process_pdf, the service does not extract pages
+        locally, route features, re-read low-confidence regions, choose
+        DPIs per page or reuse pages of earlier runs, so its text and tables
+        can differ from those of main.py run with these options. It writes
+        no output files (Excel, maintenance data, page manifest, run report).
+
+        Args:
+            pdf_path (str): Local path to the PDF
+            source_file (str): Value reported as source_file
+            doc_id (str): Document ID (default: a new UUID)
+
+        Returns:
+            dict: Combined result
+        """
+        doc_id = doc_id or str(uuid.uuid4())
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        page_count = pdfinfo_from_path(str(pdf_path))['Pages']
+        page_dir = self.work_dir / doc_id
+
+        try:
+            raster_futures = {
+                self.raster_pool.submit(preprocess_page, str(pdf_path), page, page_dir, self.dpi): page
+                for page in range(1, page_count + 1)
+            }
+            ocr_futures = {}
+            for future in as_completed(raster_futures):
+                page = raster_futures[future]
+                try:
+                    ocr_futures[page] = self.textract_pool.submit(self._analyze_page, future.result())
+                except Exception as e:
+                    logger.error(f"Error preprocessing page {page}: {str(e)}")
+
+            responses = []
+            for page in sorted(ocr_futures):
+                try:
+                    responses.append(ocr_futures[page].result())
+                except Exception as e:
+                    logger.error(f"Error processing page {page}: {str(e)}")
+        finally:
+            shutil.rmtree(page_dir, ignore_errors=True)
+
+        if not responses:
+            raise RuntimeError("No pages were successfully processed")
+
+        table_extractor = TableExtractor()
+        processed_pages = []
+        all_tables = []
+        pairs = []
+        for response in responses:
+            processed_pages.append(process_textract_response(response))
+            store = BlockStore.from_blocks(response['Blocks'])
+            all_tables.extend(table_extractor.extract_tables(store))
+            pairs.extend(extract_key_values(store))
+
+        return combine_processed_pages(
+            processed_pages, all_tables, doc_id, timestamp, source_file, page_count,
+            document_key_values(pairs)
+        )
+
+    def render_metrics(self):
+        """Return the service metrics in the Prometheus text format."""
+        if self.cache is not None:
+            self.metrics.set('cache_hits', self.cache.hits)
+            self.metrics.set('cache_misses', self.cache.misses)
+        return self.metrics.render()
+
+
+def make_handler(service):
+    """
+    Build an HTTP request handler class bound to a DocumentService.
+
+    Endpoints:
+        POST /documents        PDF body (application/pdf) or JSON {"s3_uri": "s3://..."};
+                               add ?wait=true to get the result in the response
+        GET  /jobs/<job_id>    Job status, with the result once finished
+        GET  /metrics          Prometheus metrics
+        GET  /health           Liveness check
+
+    Args:
+        service (DocumentService): Service handling the requests
+
+    Returns:
+        type: BaseHTTPRequestHandler subclass
+    """
+
+    class DocumentRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} - {format % args}")
+
+        def _send(self, status, body, content_type='application/json'):
+            if not isinstance(body, bytes):
+                body = serialization.dumps(body, compact=True)
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif path == '/metrics':
+                self._send(200, service.render_metrics().encode('utf-8'),
+                           'text/plain; version=0.0.4; charset=utf-8')
+            elif path.startswith('/jobs/'):
+                job = service.get_job(path[len('/jobs/'):])
+                if job is None:
+                    self._send(404, {'error': 'Unknown job'})
+                else:
+                    self._send(200, service.job_summary(job))
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/documents':
+                self._send(404, {'error': 'Not found'})
+                return
+
+            # Reject bad lengths before reading the body, and close the
+            # connection since the body is left unread
+            length = self.headers.get('Content-Length')
+            if length is None:
+                self.close_connection = True
+                self._send(411, {'error': 'Content-Length required'})
+                return
+            try:
+                length = int(length)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                self.close_connection = True
+                self._send(400, {'error': f"Invalid Content-Length: {length}"})
+                return
+            if length > service.max_upload_bytes:
+                self.close_connection = True
+                self._send(413, {'error': f"Request body larger than {service.max_upload_bytes} bytes"})
+                return
+            body = self.rfile.read(length)
+            content_type = self.headers.get('Content-Type', 'application/pdf').split(';')[0]
+            job_id = str(uuid.uuid4())
+
+            try:
+                if content_type == 'application/json':
+                    s3_uri = serialization.loads(body).get('s3_uri', '')
+                    pdf_path = service.download_s3_uri(s3_uri, job_id)
+                    source = s3_uri
+                else:
+                    if not body:
+                        raise ValueError("Empty request body")
+                    pdf_path = service.work_dir / f"{job_id}.pdf"
+                    pdf_path.write_bytes(body)
+                    filename = self.headers.get('X-Filename', f"{job_id}.pdf")
+                    source = re.sub(r'[^\w.\- ]', '_', filename)
+            except Exception as e:
+                self._send(400, {'error': str(e)})
+                return
+
+            job = service.submit(pdf_path, source, job_id)
+            if parse_qs(url.query).get('wait', ['false'])[0].lower() in ('1', 'true', 'yes'):
+                job['future'].result()
+                summary = service.job_summary(job)
+                status = 200 if summary['status'] == 'succeeded' else 500
+                self._send(status, summary.get('result') or summary)
+            else:
+                self._send(202, service.job_summary(job))
+
+    return DocumentRequestHandler
@@ -0,0 +1,186 @@
+"""
+Page fingerprints and per-page result manifests for incremental reprocessing.
+
+Each run stores a page manifest next to its other output files. It holds
+two fingerprints per page and the page's processed text and tables:
+
+- content hash: the page's content streams and the XObjects they draw,
+  read from the PDF without rendering
+- image hash: the enhanced page image that was sent to Textract
+
+A later run given the manifest (--since) only re-rasterizes pages whose
+content hash is unknown. It only re-OCRs pages whose rendered image is
+also new, and takes every other page from the manifest.
+"""
+import hashlib
+import logging
+from pathlib import Path
+
+import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from src import serialization
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '_pages.json'
+
+# Suffixes of the other files a run writes, used to find its manifest
+_OUTPUT_SUFFIXES = ('_maintenance', '_report')
+
+
+def _hash_resources(resources, digest, seen, depth=0):
+    """Hash the XObjects (images and forms) a page or form draws."""
+    resources = resolve1(resources) or {}
+    xobjects = resolve1(resources.get('XObject')) or {}
+    for name in sorted(xobjects, key=str):
+        xobject = resolve1(xobjects[name])
+        if not isinstance(xobject, PDFStream):
+            continue
+        objid = getattr(xobject, 'objid', None)
+        if objid is not None:
+            if objid in seen:
+                continue
+            seen.add(objid)
+        digest.update(str(name).encode('utf-8'))
+        digest.update(xobject.get_rawdata() or b'')
+        # Form XObjects carry their own resources; follow them a few levels
+        if depth < 3 and 'Resources' in xobject.attrs:
+            _hash_resources(xobject.attrs['Resources'], digest, seen, depth + 1)
+
+
+def page_content_hashes(pdf_path):
+    """
+    Compute a content hash for every page of a PDF.
+
+    The hash covers the page box, rotation, content streams and the image
+    and form XObjects they reference, so it changes whenever the rendered
+    page can change, without rendering it.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        list: Hex digests, one per page in page order
+    """
+    hashes = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page_obj = page.page_obj
+            digest = hashlib.sha256()
+            digest.update(repr((page_obj.mediabox, page_obj.rotate)).encode('utf-8'))
+            for stream in page_obj.contents:
+                stream = resolve1(stream)
+                if isinstance(stream, PDFStream):
+                    digest.update(stream.get_rawdata() or b'')
+            _hash_resources(page_obj.resources, digest, set())
+            hashes.append(digest.hexdigest())
+    return hashes
+
+
+def file_hash(path):
+    """
+    Compute the SHA-256 of a file, e.g. a rendered page image.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(output_base):
+    """Return the page manifest path for a run's output base path."""
+    output_base = Path(output_base)
+    return output_base.with_name(f"{output_base.name}{MANIFEST_SUFFIX}")
+
+
+def resolve_manifest_path(previous_run):
+    """
+    Find the page manifest of a previous run.
+
+    Args:
+        previous_run (str): The manifest itself, or any output file or the
+            output base path of the previous run
+
+    Returns:
+        Path: Manifest path
+    """
+    path = Path(previous_run)
+    if path.name.endswith(MANIFEST_SUFFIX):
+        return path
+    if path.suffix in ('.json', '.txt', '.xlsx'):
+        path = path.with_suffix('')
+    for suffix in _OUTPUT_SUFFIXES:
+        if path.name.endswith(suffix):
+            path = path.with_name(path.name[:-len(suffix)])
+    return manifest_path(path)
+
+
+def save_page_manifest(output_base, document_id, source_file, page_records, compact=False):
+    """
+    Save the per-page fingerprints and results of a run.
+
+    Args:
+        output_base (Path): Output base path of the run
+        document_id (str): Document ID
+        source_file (str): Source PDF
+        page_records (dict): Page number -> record with content_hash,
+            image_hash, text, tables and key_values
+        compact (bool): Write JSON without indentation
+
+    Returns:
+        Path: Manifest path
+    """
+    path = manifest_path(output_base)
+    serialization.dump({
+        'document_id': document_id,
+        'source_file': str(source_file),
+        'pages': [dict(page_records[page], page=page) for page in sorted(page_records)],
+    }, path, compact=compact)
+    return path
+
+
+def load_page_manifest(previous_run):
+    """
+    Load the page manifest of a previous run.
+
+    Args:
+        previous_run (str): Manifest, output file or output base of the run
+
+    Returns:
+        dict: Manifest with 'document_id', 'source_file' and 'pages'
+    """
+    path = resolve_manifest_path(previous_run)
+    logger.info(f"Loading previous run from: {path}")
+    return serialization.load(path)
+
+
+def match_previous_pages(hashes, previous, key='content_hash'):
+    """
+    Find pages whose fingerprint already appears in a previous run.
+
+    Pages are matched by fingerprint, not position, so unchanged pages are
+    still found after pages have been inserted, removed or reordered.
+
+    Args:
+        hashes (dict): Page number -> fingerprint of the current document
+        previous (dict): Previous page manifest
+        key (str): Fingerprint to compare, 'content_hash' or 'image_hash'
+
+    Returns:
+        dict: Page number -> reused page record from the previous run
+    """
+    by_hash = {record[key]: record for record in previous['pages'] if record.get(key)}
+    matched = {}
+    for page, page_hash in hashes.items():
+        record = by_hash.get(page_hash)
+        if record is not None:
+            matched[page] = {k: v for k, v in record.items() if k != 'page'}
+    return matched
@@ -0,0 +1,134 @@
+"""
+Key-value (FORMS) extraction from Textract output.
+
+AnalyzeDocument with FORMS returns each form field as a pair of
+KEY_VALUE_SET blocks: a KEY block whose CHILD words hold the label, linked
+by a VALUE relationship to a VALUE block whose CHILD words (or selection
+element) hold the value. The pairs are resolved through the Id index of a
+BlockStore, visiting every KEY_VALUE_SET block and relationship once, so
+extraction is linear in the size of the page.
+
+Labels are matched against the fields of a maintenance plan's cover and
+summary pages ("Org.nr", "Planperiod", ...) to build one dict of document
+fields; other labels are kept under 'other'.
+"""
+import re
+import logging
+
+from src.postprocess import fix_swedish_characters
+from src.block_store import BlockStore
+
+logger = logging.getLogger(__name__)
+
+# Document field -> labels used for it in maintenance plans
+FORM_FIELDS = {
+    'association_name': ['Föreningens namn', 'Förening', 'Bostadsrättsförening', 'Brf', 'Beställare'],
+    'property_name': ['Fastighetsbeteckning', 'Fastighet', 'Fastighetens namn', 'Objekt'],
+    'organization_number': ['Org.nr', 'Org nr', 'Orgnr', 'Organisationsnummer'],
+    'plan_period': ['Planperiod', 'Planeringsperiod', 'Planens omfattning', 'Period'],
+    'address': ['Adress', 'Gatuadress', 'Besöksadress'],
+    'construction_year': ['Byggår', 'Byggnadsår', 'Nybyggnadsår'],
+    'apartments': ['Antal lägenheter', 'Antal lgh'],
+    'prepared_by': ['Upprättad av', 'Upprättat av', 'Handläggare'],
+    'date': ['Datum', 'Upprättad', 'Upprättad datum'],
+}
+
+ORGANIZATION_NUMBER = re.compile(r'\b(\d{6})\s*-?\s*(\d{4})\b')
+PLAN_PERIOD = re.compile(r'\b((?:19|20)\d{2})\s*[-–—]\s*((?:19|20)\d{2})\b')
+
+SELECTION_MARKS = {'SELECTED': '[X]', 'NOT_SELECTED': '[ ]'}
+
+
+def _label_key(label):
+    """Reduce a label to lowercase letters and digits ("Org. nr:" -> "orgnr")."""
+    return re.sub(r'\W+', '', label.lower())
+
+
+_FIELD_BY_LABEL = {_label_key(label): field for field, labels in FORM_FIELDS.items() for label in labels}
+
+
+def _block_text(store, row):
+    """Text of the CHILD words and selection elements of a KEY or VALUE block."""
+    parts = []
+    for child in store.children(row):
+        block_type = store.block_type(child)
+        if block_type == 'WORD':
+            parts.append(store.text(child))
+        elif block_type == 'SELECTION_ELEMENT':
+            parts.append(SELECTION_MARKS.get(store.view(child).get('SelectionStatus'), ''))
+    return ' '.join(part for part in parts if part)
+
+
+def extract_key_values(blocks):
+    """
+    Extract the key-value pairs of FORMS output.
+
+    Args:
+        blocks (list or BlockStore): Textract blocks, or a BlockStore built
+            from them
+
+    Returns:
+        list: Dicts with 'key', 'value' (Swedish character fixes applied),
+            'confidence' and 'page', in response order
+    """
+    store = blocks if isinstance(blocks, BlockStore) else BlockStore.from_blocks(blocks)
+    pairs = []
+    for row in store.rows('KEY_VALUE_SET'):
+        if 'KEY' not in store.entity_types(row):
+            continue
+        key = _block_text(store, row)
+        if not key:
+            continue
+        value = ' '.join(filter(None, (_block_text(store, value_row)
+                                       for value_row in store.related(row, 'VALUE'))))
+        confidence = store.confidence(row)
+        pairs.append({
+            'key': fix_swedish_characters(key),
+            'value': fix_swedish_characters(value),
+            'confidence': round(confidence, 1) if confidence is not None else None,
+            'page': store.page(row),
+        })
+    logger.debug(f"Extracted {len(pairs)} key-value pairs")
+    return pairs
+
+
+def _normalize(field, value):
+    """Bring organization numbers and plan periods to one format."""
+    if field == 'organization_number':
+        match = ORGANIZATION_NUMBER.search(value)
+        if match:
+            return f"{match.group(1)}-{match.group(2)}"
+    elif field == 'plan_period':
+        match = PLAN_PERIOD.search(value)
+        if match:
+            return f"{match.group(1)}-{match.group(2)}"
+    return value
+
+
+def document_key_values(pairs):
+    """
+    Combine the key-value pairs of a document into document fields.
+
+    The first non-empty value of a field, in page order, wins.
+
+    Args:
+        pairs (iterable): Key-value pairs from extract_key_values, in page order
+
+    Returns:
+        dict: Field name (see FORM_FIELDS) -> value, plus 'other': label ->
+            value for labels that are not document fields
+    """
+    fields = {}
+    other = {}
+    for pair in pairs:
+        key = pair['key'].strip().rstrip(':').strip()
+        value = pair['value'].strip()
+        if not value:
+            continue
+        field = _FIELD_BY_LABEL.get(_label_key(key))
+        if field:
+            fields.setdefault(field, _normalize(field, value))
+        else:
+            other.setdefault(key, value)
+    fields['other'] = other
+    return fields
@@ -0,0 +1,291 @@
+"""
+SQLite index of processed documents for querying across the whole corpus.
+
+Each run can be upserted into one database file that holds the document
+metadata, per-page text, tables and maintenance items. Maintenance items
+are indexed on category, year and cost, and the page text has an FTS5
+full-text index, so questions like "all Tak actions planned for 2027
+over 100 000 kr" don't require re-reading every _maintenance.json file.
+"""
+import sqlite3
+import logging
+from datetime import datetime
+
+from src import serialization
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    source_file TEXT,
+    timestamp TEXT,
+    page_count INTEGER,
+    total_cost REAL,
+    indexed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,
+    page INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_document ON pages(document_id, page);
+
+CREATE TABLE IF NOT EXISTS tables (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,
+    page INTEGER,
+    table_index INTEGER NOT NULL,
+    row_count INTEGER,
+    column_count INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tables_document ON tables(document_id, table_index);
+
+CREATE TABLE IF NOT EXISTS maintenance_items (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    category TEXT,
+    action TEXT,
+    cost REAL,
+    -- Lowercased category for case-insensitive matching; NOCASE only folds ASCII
+    category_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_category_key_year_cost ON maintenance_items(category_key, year, cost);
+CREATE INDEX IF NOT EXISTS idx_items_year_cost ON maintenance_items(year, cost);
+CREATE INDEX IF NOT EXISTS idx_items_cost ON maintenance_items(cost);
+CREATE INDEX IF NOT EXISTS idx_items_document ON maintenance_items(document_id);
+
+-- Full-text index over the page text, kept in sync by triggers. Diacritics
+-- are kept: å, ä and ö are letters of their own in Swedish ("ar" is not "år")
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text, content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS pages_after_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_after_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def maintenance_rows(maintenance_data):
+    """
+    Flatten extract_maintenance_data output into (year, category, action, cost) rows.
+
+    Args:
+        maintenance_data (dict): Output of TableExtractor.extract_maintenance_data
+
+    Returns:
+        list: Row tuples
+    """
+    rows = []
+    for year, items in (maintenance_data or {}).get('yearly_maintenance', {}).items():
+        year = _to_int(year)
+        if year is None:
+            continue
+        for item in items:
+            rows.append((year, str(item.get('category') or ''), str(item.get('action') or ''),
+                         item.get('cost')))
+    return rows
+
+
+class DocumentIndex:
+    """SQLite database of processed documents, pages, tables and maintenance items."""
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) an index database.
+
+        Args:
+            path (str): Database file, or ':memory:'
+        """
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ':memory:':
+            # WAL lets query tools read while a run is writing
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def upsert_document(self, result, maintenance_data=None, pages=None):
+        """
+        Insert a processed document, replacing any earlier version of it.
+
+        Args:
+            result (dict): Combined result as written to the document JSON
+            maintenance_data (dict): Output of extract_maintenance_data (optional)
+            pages (list): Per-page dicts with 'text', 'tables' and optionally
+                'page'. Without them the whole text and all tables are
+                stored as one page with an unknown page number.
+        """
+        document_id = result['document_id']
+        if pages is None:
+            pages = [{'page': None, 'text': result.get('text', ''), 'tables': result.get('tables', [])}]
+        items = maintenance_rows(maintenance_data)
+
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO documents (document_id, source_file, timestamp, page_count, total_cost, indexed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(document_id) DO UPDATE SET
+                       source_file = excluded.source_file, timestamp = excluded.timestamp,
+                       page_count = excluded.page_count, total_cost = excluded.total_cost,
+                       indexed_at = excluded.indexed_at""",
+                (document_id, str(result.get('source_file', '')), result.get('timestamp'),
+                 result.get('page_count'), (maintenance_data or {}).get('total_cost'),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+            for table_name in ('pages', 'tables', 'maintenance_items'):
+                self.conn.execute(f"DELETE FROM {table_name} WHERE document_id = ?", (document_id,))
+
+            table_rows = []
+            for i, page in enumerate(pages):
+                page_number = page.get('page', i + 1)
+                for table in page.get('tables') or []:
+                    table_rows.append((document_id, page_number, len(table_rows), len(table),
+                                       max((len(row) for row in table), default=0),
+                                       serialization.dumps(table, compact=True).decode('utf-8')))
+            self.conn.executemany(
+                "INSERT INTO pages (document_id, page, text) VALUES (?, ?, ?)",
+                [(document_id, page.get('page', i + 1), page.get('text') or '') for i, page in enumerate(pages)]
+            )
+            self.conn.executemany(
+                """INSERT INTO tables (document_id, page, table_index, row_count, column_count, data)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                table_rows
+            )
+            self.conn.executemany(
+                """INSERT INTO maintenance_items (document_id, year, category, action, cost, category_key)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(document_id,) + item + (item[1].lower(),) for item in items]
+            )
+        logger.info(f"Indexed document {document_id}: {len(pages)} pages, "
+                    f"{len(table_rows)} tables, {len(items)} maintenance items")
+
+    def delete_document(self, document_id):
+        """Remove a document and everything indexed for it."""
+        with self.conn:
+            self.conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+
+    def find_maintenance(self, category=None, year=None, year_to=None, min_cost=None, max_cost=None,
+                         action=None, limit=None):
+        """
+        Find maintenance items.
+
+        Args:
+            category (str): Category, case-insensitive exact match (e.g. 'Tak')
+            year (int): Year, or the first year of a range with year_to
+            year_to (int): Last year of the range (inclusive)
+            min_cost (float): Minimum cost in kr (inclusive)
+            max_cost (float): Maximum cost in kr (inclusive)
+            action (str): Substring of the action description
+            limit (int): Maximum number of items
+
+        Returns:
+            list: Item dicts with document_id, source_file, year, category, action and cost
+        """
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("i.category_key = ?")
+            params.append(category.lower())
+        if year is not None and year_to is not None:
+            conditions.append("i.year BETWEEN ? AND ?")
+            params.extend([year, year_to])
+        elif year is not None:
+            conditions.append("i.year = ?")
+            params.append(year)
+        if min_cost is not None:
+            conditions.append("i.cost >= ?")
+            params.append(min_cost)
+        if max_cost is not None:
+            conditions.append("i.cost <= ?")
+            params.append(max_cost)
+        if action is not None:
+            conditions.append("i.action LIKE ?")
+            params.append(f"%{action}%")
+
+        sql = """SELECT i.document_id, d.source_file, i.year, i.category, i.action, i.cost
+                 FROM maintenance_items i JOIN documents d USING (document_id)"""
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY i.year, i.cost DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def search_text(self, query, limit=20):
+        """
+        Full-text search over the page text.
+
+        Args:
+            query (str): FTS5 query, e.g. 'takbyte' or '"byte av tak"'
+            limit (int): Maximum number of pages
+
+        Returns:
+            list: Page dicts with document_id, source_file, page and a text snippet,
+                best matches first
+        """
+        sql = """SELECT p.document_id, d.source_file, p.page,
+                        snippet(pages_fts, 0, '[', ']', '...', 12) AS snippet
+                 FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid
+                 JOIN documents d USING (document_id)
+                 WHERE pages_fts MATCH ? ORDER BY rank LIMIT ?"""
+        return [dict(row) for row in self.conn.execute(sql, (query, limit))]
+
+    def documents(self, limit=None):
+        """
+        List indexed documents, most recently indexed first.
+
+        Returns:
+            list: Document dicts
+        """
+        sql = "SELECT * FROM documents ORDER BY indexed_at DESC"
+        params = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def summary_by_year(self, category=None):
+        """
+        Total planned cost and item count per year.
+
+        Args:
+            category (str): Restrict to one category (optional)
+
+        Returns:
+            list: Dicts with year, items and total_cost
+        """
+        sql = "SELECT year, COUNT(*) AS items, SUM(cost) AS total_cost FROM maintenance_items"
+        params = []
+        if category is not None:
+            sql += " WHERE category_key = ?"
+            params.append(category.lower())
+        sql += " GROUP BY year ORDER BY year"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
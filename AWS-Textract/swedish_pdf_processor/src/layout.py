@@ -0,0 +1,458 @@
+"""
+Layout analysis of Textract pages: columns, reading order and cell assignment.
+
+Textract returns LINE blocks roughly top to bottom, so the lines of a
+two-column page or of two tables side by side come out interleaved.
+This module orders them by layout instead:
+
+1. Lines inside a TABLE are grouped with the table and read row by row.
+2. Column gutters are found from the horizontal coverage of the remaining
+   lines and tables (a histogram with a fixed number of bins).
+3. Lines crossing a gutter (headings, footers) split the page into bands;
+   within a band each column is read top to bottom, recursively, so a
+   column may have columns of its own. Columns whose lines sit on the
+   same rows as those of the next column (labels and values, unruled
+   tables) are a grid rather than text flows, and are read row by row,
+   unless both columns are filled with full-width lines of text.
+4. A region without gutters is cut at its widest horizontal whitespace
+   gaps, and the pieces are laid out on their own (as in XY-cut).
+
+Geometric lookups (which cell or table contains a word) go through a
+uniform grid index over the bounding boxes instead of comparing every
+block with every other, so a page is laid out in O(n log n) time.
+
+Boxes are (left, top, width, height) tuples, normalized to the page.
+"""
+import bisect
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Side of a grid index cell, as a fraction of the page
+GRID_CELL_SIZE = 0.02
+
+# Bins of the horizontal coverage histogram used to find column gutters
+COLUMN_BINS = 500
+
+# Narrowest gutter between columns, as a fraction of the page width
+MIN_COLUMN_GAP = 0.015
+
+# Share of a region's elements that may cross a gutter (headings, footers)
+SPANNING_TOLERANCE = 0.1
+
+# Share of a column's items on the same row as an item of the next column
+# above which the columns are read as rows (labels and values, unruled tables)
+ROW_ALIGNED_SHARE = 0.5
+
+# A column is a text flow when it is at least this wide (page widths) and
+# most of its lines fill TEXT_FLOW_FILL of its width
+TEXT_FLOW_MIN_WIDTH = 0.2
+TEXT_FLOW_FILL = 0.75
+
+# A region is cut horizontally at gaps this many times wider than its median line gap
+BAND_GAP_FACTOR = 2.0
+
+# Regions are split into columns or bands at most this many levels deep
+MAX_LAYOUT_DEPTH = 6
+
+
+def block_box(block):
+    """
+    Return the bounding box of a block.
+
+    Args:
+        block (dict): Textract block, or a BlockView
+
+    Returns:
+        tuple: (left, top, width, height), or None without geometry
+    """
+    geometry = block.get('Geometry')
+    if not geometry:
+        return None
+    box = geometry['BoundingBox']
+    return box['Left'], box['Top'], box['Width'], box['Height']
+
+
+class GridIndex:
+    """Uniform grid over the page for finding the boxes at a point or in an area."""
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        """
+        Initialize an empty index.
+
+        Args:
+            cell_size (float): Side of a grid cell, as a fraction of the page
+        """
+        self.cell_size = cell_size
+        self._cells = defaultdict(list)
+        self._boxes = {}
+
+    def _span(self, start, length):
+        return range(int(start / self.cell_size), int((start + length) / self.cell_size) + 1)
+
+    def insert(self, key, box):
+        """
+        Add a box to the index.
+
+        Args:
+            key: Identifier returned by queries, e.g. a block Id
+            box (tuple): (left, top, width, height)
+        """
+        self._boxes[key] = box
+        for gx in self._span(box[0], box[2]):
+            for gy in self._span(box[1], box[3]):
+                self._cells[gx, gy].append(key)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def at(self, x, y):
+        """
+        Find the boxes containing a point.
+
+        Args:
+            x (float): Horizontal position
+            y (float): Vertical position
+
+        Returns:
+            list: Keys of the containing boxes, smallest box first
+        """
+        found = []
+        for key in self._cells.get((int(x / self.cell_size), int(y / self.cell_size)), ()):
+            left, top, width, height = self._boxes[key]
+            if left <= x <= left + width and top <= y <= top + height:
+                found.append(key)
+        if len(found) > 1:
+            found.sort(key=lambda key: self._boxes[key][2] * self._boxes[key][3])
+        return found
+
+    def overlapping(self, box):
+        """
+        Find the boxes intersecting an area.
+
+        Args:
+            box (tuple): (left, top, width, height)
+
+        Returns:
+            list: Keys of the intersecting boxes
+        """
+        seen = set()
+        found = []
+        right = box[0] + box[2]
+        bottom = box[1] + box[3]
+        for gx in self._span(box[0], box[2]):
+            for gy in self._span(box[1], box[3]):
+                for key in self._cells.get((gx, gy), ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    left, top, width, height = self._boxes[key]
+                    if left < right and box[0] < left + width and top < bottom and box[1] < top + height:
+                        found.append(key)
+        return found
+
+
+def _center(box):
+    return box[0] + box[2] / 2, box[1] + box[3] / 2
+
+
+def detect_columns(boxes, min_gap=MIN_COLUMN_GAP, bins=COLUMN_BINS):
+    """
+    Find the columns of a region from the horizontal coverage of its boxes.
+
+    A gutter is a run of at least min_gap (page widths) covered by no more
+    than SPANNING_TOLERANCE of the boxes, with text on both sides.
+
+    Args:
+        boxes (list): (left, top, width, height) of the lines and tables
+        min_gap (float): Narrowest gutter, as a fraction of the page width
+        bins (int): Histogram resolution
+
+    Returns:
+        list: Column (left, right) intervals, left to right
+    """
+    if not boxes:
+        return []
+    # Difference array: +1 where a box starts, -1 after it ends
+    diff = [0] * (bins + 1)
+    for left, _, width, _ in boxes:
+        start = min(bins - 1, max(0, int(left * bins)))
+        end = min(bins - 1, max(start, int((left + width) * bins)))
+        diff[start] += 1
+        diff[end + 1] -= 1
+
+    limit = int(len(boxes) * SPANNING_TOLERANCE)
+    covered = []
+    count = 0
+    for value in diff[:bins]:
+        count += value
+        covered.append(count > limit)
+    if not any(covered):
+        return [(min(box[0] for box in boxes), max(box[0] + box[2] for box in boxes))]
+
+    first = covered.index(True)
+    last = bins - 1 - covered[::-1].index(True)
+    min_bins = max(1, round(min_gap * bins))
+    columns = []
+    start = first
+    gap = 0
+    for i in range(first, last + 1):
+        if covered[i]:
+            if gap >= min_bins:
+                columns.append((start / bins, (i - gap) / bins))
+                start = i
+            gap = 0
+        else:
+            gap += 1
+    columns.append((start / bins, (last + 1) / bins))
+    return columns
+
+
+def _sort_rows(items):
+    """Sort items top to bottom, and items on the same text row left to right."""
+    items = sorted(items, key=lambda item: item[1][1])
+    ordered = []
+    row = []
+    row_middle = None
+    for item in items:
+        box = item[1]
+        if row and box[1] > row_middle:
+            ordered.extend(sorted(row, key=lambda item: item[1][0]))
+            row = []
+        if not row:
+            row_middle = box[1] + box[3] / 2
+        row.append(item)
+    ordered.extend(sorted(row, key=lambda item: item[1][0]))
+    return ordered
+
+
+def _is_text_flow(column, widths):
+    """Check whether most lines of a column fill its width, as running text does."""
+    column_width = column[1] - column[0]
+    if column_width < TEXT_FLOW_MIN_WIDTH or not widths:
+        return False
+    return sum(width >= TEXT_FLOW_FILL * column_width for width in widths) > len(widths) / 2
+
+
+def _is_grid(items, columns):
+    """
+    Check whether the columns of a region are row-aligned, like a grid.
+
+    An item has a counterpart in a neighbouring column when the vertical
+    centers of the two are less than half a (median) line height apart.
+    Lines of running text in two columns often line up as well, so two
+    text flows are never a grid.
+
+    Returns:
+        bool: True if most items of a column have a counterpart in the next one
+    """
+    column_lefts = [column[0] for column in columns]
+    centers = [[] for _ in columns]
+    widths = [[] for _ in columns]
+    heights = sorted(box[3] for _, box in items)
+    for _, (left, top, width, height) in items:
+        i = max(0, bisect.bisect_right(column_lefts, left + width / 2) - 1)
+        centers[i].append(top + height / 2)
+        widths[i].append(width)
+    tolerance = heights[len(heights) // 2] / 2
+    for column in centers:
+        column.sort()
+
+    def matched(column, other):
+        count = 0
+        for center in column:
+            i = bisect.bisect_left(other, center - tolerance)
+            if i < len(other) and other[i] <= center + tolerance:
+                count += 1
+        return count
+
+    for i, (left_column, right_column) in enumerate(zip(centers, centers[1:])):
+        if _is_text_flow(columns[i], widths[i]) and _is_text_flow(columns[i + 1], widths[i + 1]):
+            continue
+        for column, other in ((left_column, right_column), (right_column, left_column)):
+            if column and matched(column, other) > ROW_ALIGNED_SHARE * len(column):
+                return True
+    return False
+
+
+def _split_bands(items):
+    """Cut a region at horizontal gaps much wider than its usual line gap."""
+    items = sorted(items, key=lambda item: item[1][1])
+    gaps = []
+    bottom = items[0][1][1] + items[0][1][3]
+    for i, (_, box) in enumerate(items[1:], 1):
+        if box[1] > bottom:
+            gaps.append((box[1] - bottom, i))
+        bottom = max(bottom, box[1] + box[3])
+    if not gaps:
+        return [items]
+
+    sizes = sorted(size for size, _ in gaps)
+    threshold = BAND_GAP_FACTOR * sizes[len(sizes) // 2] if len(sizes) > 1 else 0
+    cuts = [i for size, i in gaps if size > threshold]
+    return [items[start:end] for start, end in zip([0] + cuts, cuts + [len(items)])]
+
+
+def _order_region(items, depth=0):
+    """
+    Order layout items (key, box) of a region by columns and bands.
+
+    Returns:
+        list: The items in reading order
+    """
+    if len(items) < 2 or depth >= MAX_LAYOUT_DEPTH:
+        return _sort_rows(items)
+    columns = detect_columns([box for _, box in items])
+    if len(columns) < 2:
+        bands = _split_bands(items)
+        if len(bands) < 2:
+            return _sort_rows(items)
+        return [item for band in bands for item in _order_region(band, depth + 1)]
+    if _is_grid(items, columns):
+        return _sort_rows(items)
+
+    gutters = [(left_column[1] + right_column[0]) / 2
+               for left_column, right_column in zip(columns, columns[1:])]
+    column_lefts = [column[0] for column in columns]
+
+    ordered = []
+    band = [[] for _ in columns]
+
+    def flush():
+        for column_items in band:
+            ordered.extend(_order_region(column_items, depth + 1))
+            column_items.clear()
+
+    for item in sorted(items, key=lambda item: item[1][1]):
+        left, _, width, _ = item[1]
+        # Crossing a gutter: the item spans columns and closes the band
+        if bisect.bisect_right(gutters, left) < bisect.bisect_left(gutters, left + width):
+            flush()
+            ordered.append(item)
+        else:
+            center = left + width / 2
+            band[max(0, bisect.bisect_right(column_lefts, center) - 1)].append(item)
+    flush()
+    return ordered
+
+
+def _page_items(blocks):
+    """Split the blocks of a page into lines, tables and cells with their boxes."""
+    lines, tables, cells, other = [], [], [], []
+    for block in blocks:
+        block_type = block['BlockType']
+        if block_type not in ('LINE', 'TABLE', 'CELL'):
+            continue
+        box = block_box(block)
+        if box is None:
+            if block_type == 'LINE':
+                other.append(block)
+            continue
+        {'LINE': lines, 'TABLE': tables, 'CELL': cells}[block_type].append((block, box))
+    return lines, tables, cells, other
+
+
+def reading_order(blocks):
+    """
+    Return the LINE blocks of a page in reading order.
+
+    Blocks of several pages are ordered page by page.
+
+    Args:
+        blocks (list): Textract blocks (or BlockViews) of one or more pages
+
+    Returns:
+        list: LINE blocks in reading order
+    """
+    by_page = defaultdict(list)
+    for block in blocks:
+        by_page[block.get('Page', 1)].append(block)
+
+    ordered = []
+    for page in sorted(by_page):
+        lines, tables, cells, other = _page_items(by_page[page])
+        table_index = GridIndex()
+        for i, (_, box) in enumerate(tables):
+            table_index.insert(i, box)
+        cell_index = GridIndex()
+        for i, (_, box) in enumerate(cells):
+            cell_index.insert(i, box)
+
+        # Lines inside a table are read with the table, row by row
+        table_lines = defaultdict(list)
+        items = []
+        for block, box in lines:
+            containing = table_index.at(*_center(box))
+            if containing:
+                table_lines[containing[0]].append((block, box))
+            else:
+                items.append((block, box))
+        items.extend((('table', i), box) for i, (_, box) in enumerate(tables) if i in table_lines)
+
+        for key, box in _order_region(items):
+            if isinstance(key, tuple):
+                ordered.extend(block for block, _ in _order_table_lines(table_lines[key[1]], cells, cell_index))
+            else:
+                ordered.append(key)
+        ordered.extend(other)
+    return ordered
+
+
+def _order_table_lines(lines, cells, cell_index):
+    """Order the lines of a table by the row and column of their cells."""
+    keyed = []
+    for block, box in lines:
+        containing = cell_index.at(*_center(box))
+        if containing:
+            cell = cells[containing[0]][0]
+            keyed.append(((cell.get('RowIndex', 0), cell.get('ColumnIndex', 0), box[1], box[0]), block, box))
+        else:
+            keyed.append(((0, 0, box[1], box[0]), block, box))
+    keyed.sort(key=lambda item: item[0])
+    return [(block, box) for _, block, box in keyed]
+
+
+def assign_to_cells(blocks, block_types=('WORD',)):
+    """
+    Find the table cells containing blocks that are not linked to any cell.
+
+    Textract links the words of a table to their CELL blocks, but words
+    added later (or missed by the table model) may not be. A block belongs
+    to the smallest cell containing its center.
+
+    Args:
+        blocks (list): Textract blocks (or BlockViews) of one or more pages
+        block_types (tuple): Types of blocks to assign
+
+    Returns:
+        dict: Cell Id -> list of block Ids, in reading order within the cell
+    """
+    by_page = defaultdict(list)
+    linked = set()
+    for block in blocks:
+        by_page[block.get('Page', 1)].append(block)
+        if block['BlockType'] == 'CELL':
+            for relationship in block.get('Relationships') or ():
+                if relationship['Type'] == 'CHILD':
+                    linked.update(relationship['Ids'])
+
+    assigned = defaultdict(list)
+    for page_blocks in by_page.values():
+        cell_index = GridIndex()
+        stray = []
+        for block in page_blocks:
+            box = block_box(block)
+            if box is None:
+                continue
+            if block['BlockType'] == 'CELL':
+                cell_index.insert(block['Id'], box)
+            elif block['BlockType'] in block_types and block['Id'] not in linked:
+                stray.append((block['Id'], box))
+        if not len(cell_index):
+            continue
+        for block_id, box in _sort_rows(stray):
+            containing = cell_index.at(*_center(box))
+            if containing:
+                assigned[containing[0]].append(block_id)
+    return dict(assigned)
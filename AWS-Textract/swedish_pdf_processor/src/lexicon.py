@@ -0,0 +1,349 @@
+"""
+Lexicon-backed restoration of Swedish diacritics.
+
+OCR output often loses diacritics ("atgard") or spells them as digraphs
+("foenster"). The restorer looks up every token in a precomputed index
+keyed on two forms of each lexicon word:
+
+- stripped: å/ä → a, ö → o ("åtgärd" → "atgard")
+- digraph: å → aa, ä → ae, ö → oe ("fönster" → "foenster")
+
+Each key maps to the most frequent lexicon word with that form. Flags
+record whether the key is itself a word, in which case tokens are left
+alone ("aerob" is not turned into "ärob", "var" not into "vår"), and
+whether several words of similar frequency share the key ("ar": "år" or
+"är"), in which case the token is left alone as well. Without a general
+word list most plain words are unknown, so only digraph keys are
+indexed. Lookups are O(1) expected.
+
+The index is an open-addressing hash table written to a flat file. It is
+opened with mmap, so loading takes the same time at any lexicon size and
+worker processes share the pages.
+
+File layout (little-endian):
+    header   magic, version, slot count, entry count, source fingerprint
+    slots    slot count x (64-bit key hash, 32-bit entry offset); offset 0 = empty
+    entries  key length (u16), key, word length (u16), word, flags (u8)
+"""
+import os
+import re
+import mmap
+import struct
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from config import LEXICON_WORDLIST_PATH, DOMAIN_VOCABULARY_PATH, LEXICON_STOPWORDS_PATH, LEXICON_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SVLX'
+VERSION = 2
+HEADER = struct.Struct('<4sIII32s')
+SLOT = struct.Struct('<QI')
+U16 = struct.Struct('<H')
+
+FLAG_PLAIN_WORD = 1  # The key itself is a lexicon word
+FLAG_AMBIGUOUS = 2  # Several lexicon words of similar frequency have the key
+
+# A key is ambiguous when its runner-up word has at least this share of the
+# count of its most frequent word
+AMBIGUITY_RATIO = 0.2
+
+# Weight of domain vocabulary words relative to word list counts
+DOMAIN_WEIGHT = 10 ** 9
+
+STRIP = str.maketrans({'å': 'a', 'ä': 'a', 'ö': 'o'})
+DIGRAPH = str.maketrans({'å': 'aa', 'ä': 'ae', 'ö': 'oe'})
+DIACRITICS = frozenset('åäöÅÄÖ')
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]+')
+
+
+def _hash(key_bytes):
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+
+
+def read_word_list(path, default_count=1):
+    """
+    Read a word list with one word per line, optionally followed by a count.
+
+    Lines starting with '#' are ignored.
+
+    Args:
+        path (str): Word list file (UTF-8)
+        default_count (int): Count of words without one
+
+    Returns:
+        dict: Lowercased word -> count
+    """
+    words = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            count = default_count
+            if len(parts) > 1:
+                try:
+                    count = int(parts[1])
+                except ValueError:
+                    pass
+            word = parts[0].lower()
+            words[word] = words.get(word, 0) + count
+    return words
+
+
+def build_entries(words, plain_words=(), stripped=True):
+    """
+    Compute the index entries for a lexicon.
+
+    Args:
+        words (dict): Lowercased word -> count
+        plain_words (iterable): Words that are never restored (stop list)
+        stripped (bool): Index stripped keys ("atgard") as well as digraph
+            keys ("aatgaerd"); without a general word list, stripped keys
+            would turn correct plain words into lexicon words
+
+    Returns:
+        dict: Key -> (word, flags)
+    """
+    candidates = {}
+    plain = set(word.lower() for word in plain_words)
+    for word, count in words.items():
+        if not DIACRITICS.intersection(word):
+            plain.add(word)
+            continue
+        keys = {word.translate(STRIP), word.translate(DIGRAPH)} if stripped else {word.translate(DIGRAPH)}
+        for key in keys:
+            candidates.setdefault(key, []).append((count, word))
+
+    entries = {}
+    for key, ranked in candidates.items():
+        ranked.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        flags = 0
+        if len(ranked) > 1 and ranked[1][0] >= AMBIGUITY_RATIO * ranked[0][0]:
+            flags = FLAG_AMBIGUOUS
+        entries[key] = (ranked[0][1], flags)
+    for word in plain:
+        restored, flags = entries.get(word, (word, 0))
+        entries[word] = (restored, flags | FLAG_PLAIN_WORD)
+    return entries
+
+
+def write_index(entries, path, fingerprint=b''):
+    """
+    Write index entries to a memory-mappable file (atomically).
+
+    Args:
+        entries (dict): Key -> (word, flags), from build_entries
+        path (str): Index file
+        fingerprint (bytes): Identifies the sources (up to 32 bytes)
+    """
+    slot_count = 1
+    while slot_count < max(2, len(entries) * 2):
+        slot_count *= 2
+    mask = slot_count - 1
+
+    blob = bytearray(b'\0')  # Offset 0 marks an empty slot
+    slots = [(0, 0)] * slot_count
+    for key, (word, flags) in entries.items():
+        key_bytes = key.encode('utf-8')
+        word_bytes = word.encode('utf-8')
+        offset = len(blob)
+        blob += U16.pack(len(key_bytes)) + key_bytes + U16.pack(len(word_bytes)) + word_bytes + bytes([flags])
+        key_hash = _hash(key_bytes)
+        i = key_hash & mask
+        while slots[i][1]:
+            i = (i + 1) & mask
+        slots[i] = (key_hash, offset)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, slot_count, len(entries), fingerprint[:32].ljust(32, b'\0')))
+        f.write(b''.join(SLOT.pack(*slot) for slot in slots))
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class DiacriticRestorer:
+    """Restore missing Swedish diacritics token by token from an mmapped index."""
+
+    def __init__(self, index_path):
+        """
+        Open an index file.
+
+        Args:
+            index_path (str): Index written by write_index
+        """
+        self.index_path = str(index_path)
+        with open(self.index_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_count, self.entry_count, fingerprint = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{index_path} is not a lexicon index (version {VERSION})")
+        self.fingerprint = fingerprint.rstrip(b'\0')
+        self._mask = self.slot_count - 1
+        self._entries_offset = HEADER.size + self.slot_count * SLOT.size
+        self.restore_token = lru_cache(maxsize=65536)(self._restore_token)
+
+    def lookup(self, key):
+        """
+        Look up a lowercased, diacritic-free key.
+
+        Returns:
+            tuple: (word, flags), or None if the key is not in the index
+        """
+        key_bytes = key.encode('utf-8')
+        key_hash = _hash(key_bytes)
+        data = self._map
+        i = key_hash & self._mask
+        while True:
+            slot_hash, offset = SLOT.unpack_from(data, HEADER.size + i * SLOT.size)
+            if not offset:
+                return None
+            if slot_hash == key_hash:
+                position = self._entries_offset + offset
+                key_length = U16.unpack_from(data, position)[0]
+                position += 2
+                if data[position:position + key_length] == key_bytes:
+                    position += key_length
+                    word_length = U16.unpack_from(data, position)[0]
+                    position += 2
+                    word = data[position:position + word_length].decode('utf-8')
+                    return word, data[position + word_length]
+            i = (i + 1) & self._mask
+
+    def _restore_token(self, token):
+        if DIACRITICS.intersection(token):
+            return token
+        entry = self.lookup(token.lower())
+        if entry is None or entry[1] & (FLAG_PLAIN_WORD | FLAG_AMBIGUOUS):
+            return token
+        return match_case(token, entry[0])
+
+    def restore_text(self, text):
+        """
+        Restore diacritics in every token of a text.
+
+        Args:
+            text (str): OCR text
+
+        Returns:
+            str: Text with restored diacritics
+        """
+        return TOKEN_PATTERN.sub(lambda match: self.restore_token(match.group(0)), text)
+
+    def close(self):
+        """Unmap the index."""
+        self._map.close()
+
+
+def match_case(token, word):
+    """Give a restored word the capitalization of the OCR token."""
+    if token.isupper() and len(token) > 1:
+        return word.upper()
+    if token[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+def source_fingerprint(paths, extra_words=()):
+    """Fingerprint the lexicon sources by path, size and mtime, plus extra words."""
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    for word in sorted(extra_words):
+        digest.update(word.encode('utf-8') + b'\n')
+    return digest.digest()
+
+
+def build_index(index_path, wordlist_path=None, domain_path=None, extra_words=(), fingerprint=b'',
+                stopwords_path=None):
+    """
+    Build an index from a Swedish word list and domain vocabulary.
+
+    Domain words win over word list words with the same stripped form.
+    Without a word list only digraph spellings are restored.
+
+    Args:
+        index_path (str): Index file to write
+        wordlist_path (str): General Swedish word list (optional)
+        domain_path (str): Domain vocabulary (optional)
+        extra_words (iterable): Additional domain words
+        fingerprint (bytes): Source fingerprint stored in the index
+        stopwords_path (str): Plain words that are never restored (optional)
+
+    Returns:
+        int: Number of index entries
+    """
+    words = {}
+    if wordlist_path:
+        words.update(read_word_list(wordlist_path))
+    else:
+        logger.warning("No general Swedish word list (SWEDISH_WORDLIST is not set); "
+                       "only digraph spellings such as 'foenster' are restored")
+    domain_words = dict.fromkeys((word.lower() for word in extra_words), DOMAIN_WEIGHT)
+    if domain_path:
+        domain_words.update(read_word_list(domain_path, default_count=DOMAIN_WEIGHT))
+    for word, count in domain_words.items():
+        words[word] = words.get(word, 0) + count
+    stopwords = read_word_list(stopwords_path) if stopwords_path else {}
+    entries = build_entries(words, stopwords, stripped=bool(wordlist_path))
+    write_index(entries, index_path, fingerprint)
+    logger.info(f"Built lexicon index with {len(entries)} entries from {len(words)} words: {index_path}")
+    return len(entries)
+
+
+_restorer = None
+_restorer_lock = threading.Lock()
+
+
+def get_restorer(extra_words=(), index_path=LEXICON_INDEX_PATH, wordlist_path=LEXICON_WORDLIST_PATH,
+                 domain_path=DOMAIN_VOCABULARY_PATH, stopwords_path=LEXICON_STOPWORDS_PATH):
+    """
+    Return the shared restorer, building or rebuilding its index when the sources changed.
+
+    Args:
+        extra_words (iterable): Additional domain words
+        index_path (str): Index file
+        wordlist_path (str): General Swedish word list (optional)
+        domain_path (str): Domain vocabulary (optional)
+        stopwords_path (str): Plain words that are never restored (optional)
+
+    Returns:
+        DiacriticRestorer: Restorer
+    """
+    global _restorer
+    if _restorer is not None:
+        return _restorer
+    with _restorer_lock:
+        if _restorer is None:
+            sources = [str(path) for path in (wordlist_path, domain_path, stopwords_path)
+                       if path and os.path.exists(path)]
+            extra_words = list(extra_words)
+            fingerprint = source_fingerprint(sources, extra_words)
+            restorer = None
+            if os.path.exists(index_path):
+                try:
+                    restorer = DiacriticRestorer(index_path)
+                except ValueError:
+                    restorer = None
+                if restorer is not None and restorer.fingerprint != fingerprint.rstrip(b'\0'):
+                    restorer.close()
+                    restorer = None
+            if restorer is None:
+                build_index(index_path,
+                            wordlist_path if wordlist_path and os.path.exists(wordlist_path) else None,
+                            domain_path if domain_path and os.path.exists(domain_path) else None,
+                            extra_words, fingerprint,
+                            stopwords_path if stopwords_path and os.path.exists(stopwords_path) else None)
+                restorer = DiacriticRestorer(index_path)
+            _restorer = restorer
+    return _restorer
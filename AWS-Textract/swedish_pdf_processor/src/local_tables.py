@@ -0,0 +1,229 @@
+"""
+Local table extraction from the text layer of born-digital PDFs.
+
+Pages produced by word processors and spreadsheets carry their text and
+table rulings as vector content, so their tables can be read with
+pdfplumber instead of rasterizing the page and calling Textract with the
+TABLES feature. Tables come out in the same shape as
+TableExtractor.extract_tables: a 2D list of strings per table, with the
+content of merged cells repeated into every grid position they cover.
+
+Each page also gets a confidence score (0-1) telling how much the local
+result can be trusted. Pages without a text layer (scans), with broken
+font encodings or with text laid out in columns but no rulings (tables
+pdfplumber cannot see) score low and should go to Textract instead. So do
+pages largely covered by images, such as scans with a small text overlay
+(a header or page stamp): the text in the images is not in the text layer.
+
+Pages are extracted on a process pool; parsing PDF content is CPU bound.
+"""
+import os
+import bisect
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+from config import LOCAL_TABLES_WORKERS
+from src.postprocess import fix_swedish_characters
+
+logger = logging.getLogger(__name__)
+
+# Grid coordinates closer than this (in points) are the same line
+SNAP_TOLERANCE = 0.5
+
+# Horizontal gap (in points) between words that separates table columns
+COLUMN_GAP_PT = 20
+
+# Lines with this many column gaps, outside ruled tables, look like an unruled table
+MIN_COLUMN_GAPS = 2
+
+# Unruled table lines above which a page is left to Textract
+MAX_UNRULED_TABLE_LINES = 3
+
+# Pages per process pool task
+PAGES_PER_TASK = 4
+
+
+def expand_table(table):
+    """
+    Convert a pdfplumber table to a 2D list, expanding merged cells.
+
+    pdfplumber reports a merged cell once, at its top left grid position,
+    and None for the positions it covers. The grid is rebuilt from the
+    cell edges and the cell's text is repeated into every covered position.
+
+    Args:
+        table (pdfplumber.table.Table): Table found on a page
+
+    Returns:
+        list: 2D array of table data
+    """
+    cells = []
+    for row, texts in zip(table.rows, table.extract()):
+        for bbox, text in zip(row.cells, texts):
+            if bbox is not None:
+                cells.append((bbox, ' '.join((text or '').split())))
+    if not cells:
+        return []
+
+    xs = _grid_lines(bbox[0] for bbox, _ in cells)
+    ys = _grid_lines(bbox[1] for bbox, _ in cells)
+    grid = [[''] * len(xs) for _ in ys]
+    for (x0, top, x1, bottom), text in cells:
+        col = bisect.bisect_left(xs, x0 - SNAP_TOLERANCE)
+        row = bisect.bisect_left(ys, top - SNAP_TOLERANCE)
+        col_end = max(col + 1, bisect.bisect_left(xs, x1 - SNAP_TOLERANCE))
+        row_end = max(row + 1, bisect.bisect_left(ys, bottom - SNAP_TOLERANCE))
+        for r in range(row, row_end):
+            for c in range(col, col_end):
+                grid[r][c] = text
+    return grid
+
+
+def _grid_lines(values):
+    lines = []
+    for value in sorted(values):
+        if not lines or value - lines[-1] > SNAP_TOLERANCE:
+            lines.append(value)
+    return lines
+
+
+def _unruled_table_lines(words, table_boxes):
+    """Count text lines outside ruled tables whose words are spread over columns."""
+    lines = {}
+    for word in words:
+        center_x = (word['x0'] + word['x1']) / 2
+        center_y = (word['top'] + word['bottom']) / 2
+        if any(x0 <= center_x <= x1 and top <= center_y <= bottom for x0, top, x1, bottom in table_boxes):
+            continue
+        lines.setdefault(round(word['top']), []).append(word)
+
+    count = 0
+    for line_words in lines.values():
+        line_words.sort(key=lambda word: word['x0'])
+        gaps = sum(1 for left, right in zip(line_words, line_words[1:])
+                   if right['x0'] - left['x1'] > COLUMN_GAP_PT)
+        if gaps >= MIN_COLUMN_GAPS:
+            count += 1
+    return count
+
+
+def _image_share(page):
+    """Share of the page area covered by images (overlaps counted once per image)."""
+    x0, top, x1, bottom = page.bbox
+    area = (x1 - x0) * (bottom - top)
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for image in page.images:
+        width = min(image['x1'], x1) - max(image['x0'], x0)
+        height = min(image['bottom'], bottom) - max(image['top'], top)
+        if width > 0 and height > 0:
+            covered += width * height
+    return min(1.0, covered / area)
+
+
+def extract_page(page):
+    """
+    Extract the text and tables of one page from its text layer.
+
+    Args:
+        page (pdfplumber.page.Page): PDF page
+
+    Returns:
+        dict: 'text', 'tables' (2D lists, without Swedish character fixes),
+            'confidence' (0-1) and 'reason' (why the confidence is low)
+    """
+    chars = page.chars
+    if not chars:
+        return {'text': '', 'tables': [], 'confidence': 0.0, 'reason': 'no text layer'}
+
+    # Glyphs without a Unicode mapping come out as "(cid:123)"
+    broken = sum(1 for char in chars if char['text'].startswith('(cid:') or char['text'] == '\ufffd')
+    confidence = 1 - broken / len(chars)
+    reason = 'broken font encoding' if broken else ''
+
+    # Text inside images is missing from the text layer
+    image_share = _image_share(page)
+    if 1 - image_share < confidence:
+        confidence = 1 - image_share
+        reason = f"images cover {image_share:.0%} of the page"
+
+    tables = []
+    table_boxes = []
+    for table in page.find_tables():
+        grid = expand_table(table)
+        # A single row or column is a framed paragraph, not a table
+        if len(grid) < 2 or len(grid[0]) < 2:
+            continue
+        table_boxes.append(table.bbox)
+        if not any(cell for row in grid for cell in row):
+            # Rulings without text: the table's content is an image
+            confidence = 0.0
+            reason = 'table without text'
+            continue
+        tables.append(grid)
+
+    if _unruled_table_lines(page.extract_words(), table_boxes) > MAX_UNRULED_TABLE_LINES:
+        confidence = min(confidence, 0.5)
+        reason = 'columns without rulings'
+
+    return {
+        'text': page.extract_text() or '',
+        'tables': tables,
+        'confidence': round(confidence, 3),
+        'reason': reason,
+    }
+
+
+def _extract_pages(pdf_path, page_numbers):
+    """Process pool task: extract a few pages of one PDF."""
+    results = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number in page_numbers:
+            page = pdf.pages[page_number - 1]
+            results[page_number] = extract_page(page)
+            # Drop the page's parsed objects before moving on (Page.close
+            # is missing from older pdfplumber releases)
+            close = getattr(page, 'close', None)
+            if close is not None:
+                close()
+    return results
+
+
+def extract_tables_local(pdf_path, pages, max_workers=LOCAL_TABLES_WORKERS):
+    """
+    Extract the text and tables of pages locally, on a process pool.
+
+    Swedish character fixes are applied to the text and every table cell,
+    as for Textract output.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (list): 1-based page numbers
+        max_workers (int): Worker processes (default: CPU count)
+
+    Returns:
+        dict: Page number -> result of extract_page
+    """
+    pages = list(pages)
+    chunks = [pages[i:i + PAGES_PER_TASK] for i in range(0, len(pages), PAGES_PER_TASK)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    results = {}
+    if max_workers <= 1:
+        for chunk in chunks:
+            results.update(_extract_pages(pdf_path, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_results in executor.map(_extract_pages, [pdf_path] * len(chunks), chunks):
+                results.update(chunk_results)
+    logger.info(f"Extracted {len(results)} pages locally with {max_workers} processes")
+
+    for result in results.values():
+        result['text'] = fix_swedish_characters(result['text'])
+        for table in result['tables']:
+            for row in table:
+                row[:] = [fix_swedish_characters(cell) for cell in row]
+    return results
@@ -0,0 +1,89 @@
+"""
+Minimal thread-safe metrics registry with Prometheus text exposition.
+"""
+import threading
+
+
+class Metrics:
+    """Counters, gauges and summaries rendered in the Prometheus text format."""
+
+    def __init__(self, prefix='swedish_pdf'):
+        """
+        Initialize an empty registry.
+
+        Args:
+            prefix (str): Prefix added to every metric name
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+        self._help = {}
+
+    def _key(self, name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def describe(self, name, text):
+        """Set the HELP text of a metric."""
+        self._help[name] = text
+
+    def inc(self, name, value=1, labels=None):
+        """Increase a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        """Set a gauge."""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add(self, name, value, labels=None):
+        """Add to a gauge (use a negative value to decrease it)."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        """Record an observation in a summary (exposed as _sum and _count)."""
+        key = self._key(name, labels)
+        with self._lock:
+            total, count = self._summaries.get(key, (0.0, 0))
+            self._summaries[key] = (total + value, count + 1)
+
+    def value(self, name, labels=None):
+        """Return the current value of a counter or gauge (0 if unset)."""
+        key = self._key(name, labels)
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            sections = [
+                ('counter', self._counters, lambda value: [('', value)]),
+                ('gauge', self._gauges, lambda value: [('', value)]),
+                ('summary', self._summaries, lambda value: [('_sum', value[0]), ('_count', value[1])]),
+            ]
+            for metric_type, values, samples in sections:
+                seen = set()
+                for (name, labels), value in sorted(values.items()):
+                    full_name = f"{self.prefix}_{name}"
+                    if name not in seen:
+                        seen.add(name)
+                        if name in self._help:
+                            lines.append(f"# HELP {full_name} {self._help[name]}")
+                        lines.append(f"# TYPE {full_name} {metric_type}")
+                    label_text = ''
+                    if labels:
+                        label_text = '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+                    for suffix, sample in samples(value):
+                        lines.append(f"{full_name}{suffix}{label_text} {sample}")
+        return '\n'.join(lines) + '\n'
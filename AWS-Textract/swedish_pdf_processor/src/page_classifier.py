@@ -0,0 +1,207 @@
+"""
+Per-page selection of Textract features from the page image.
+
+AnalyzeDocument with TABLES and FORMS costs many times more than
+DetectDocumentText and takes longer, yet most pages of a maintenance plan
+are prose or cover pages. Each enhanced page image is downscaled and
+checked for:
+
+- ruling lines: long horizontal and vertical runs of ink (table grids,
+  rule-separated rows, form fields)
+- aligned columns: text lines whose ink is split by wide gaps that start
+  at the same positions on several lines (unruled tables); columns of
+  prose are told apart by filling the space up to the next column
+- key-value rows: consecutive lines of short labels followed by values
+  that start at a shared position ("Organisationsnummer    769600-1234")
+
+The page is then routed to one of:
+
+- 'text': DetectDocumentText, no tables or forms
+- 'tables': AnalyzeDocument with TABLES
+- 'tables_forms': AnalyzeDocument with TABLES and FORMS
+
+When unsure, the classifier errs towards the richer feature set.
+"""
+import logging
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+from config import TEXTRACT_FEATURES, TABLE_MIN_RULES, FORM_MIN_KEY_VALUE_ROWS
+
+logger = logging.getLogger(__name__)
+
+ROUTES = {
+    'text': [],
+    'tables': ['TABLES'],
+    'tables_forms': ['TABLES', 'FORMS'],
+}
+
+# Width the page image is reduced to before analysis
+CLASSIFIER_WIDTH = 600
+
+# Downscaled pixels darker than this (about a fifth of the original pixels
+# dark) are ink, so that thin ruling lines survive the reduction
+INK_LEVEL = 200
+
+# Shortest ruling lines, as a fraction of the page width and height
+RULE_MIN_WIDTH = 0.2
+RULE_MIN_HEIGHT = 0.04
+
+# Narrowest gap between the columns of a text line, as a fraction of the page width
+COLUMN_GAP = 0.03
+
+# Column starts closer than this (fraction of the page width) are aligned
+ALIGN_TOLERANCE = 0.015
+
+# Text lines that must share a column start for it to count
+MIN_ALIGNED_ROWS = 3
+
+# Share of the space up to the next column above which columns hold prose
+MAX_TABLE_COLUMN_FILL = 0.6
+
+# Widest key (label) of a key-value row, as a fraction of the page width
+MAX_KEY_WIDTH = 0.25
+
+
+def _count_rules(ink, length):
+    """Count the lines of at least length ink pixels along axis 1."""
+    if ink.shape[1] < length:
+        return 0
+    runs = np.zeros((ink.shape[0], ink.shape[1] + 1), dtype=np.int32)
+    np.cumsum(ink, axis=1, out=runs[:, 1:])
+    has_rule = ((runs[:, length:] - runs[:, :-length]) == length).any(axis=1)
+    # Adjacent rows belong to the same (thick) line
+    return int(np.count_nonzero(has_rule[1:] & ~has_rule[:-1]) + has_rule[0])
+
+
+def _text_rows(ink):
+    """Return (top, bottom) row ranges of the text lines of a page."""
+    has_ink = ink.any(axis=1)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], has_ink.astype(np.int8), [0]))))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def _segments(columns_with_ink, min_gap):
+    """Split a text line into ink segments separated by at least min_gap blank columns."""
+    xs = np.flatnonzero(columns_with_ink)
+    if not len(xs):
+        return []
+    breaks = np.flatnonzero(np.diff(xs) > min_gap)
+    starts = np.concatenate(([xs[0]], xs[breaks + 1]))
+    ends = np.concatenate((xs[breaks], [xs[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def layout_metrics(image):
+    """
+    Measure the table and form cues of a page image.
+
+    Args:
+        image (PIL.Image): Page image, e.g. the enhanced page
+
+    Returns:
+        dict: 'horizontal_rules', 'vertical_rules', 'aligned_columns'
+            (column starts shared by several text lines), 'column_fill'
+            (median share of the space to the next column filled with ink)
+            and 'key_value_rows'
+    """
+    gray = image.convert('L')
+    if gray.width > CLASSIFIER_WIDTH:
+        gray = gray.resize((CLASSIFIER_WIDTH, max(1, round(gray.height * CLASSIFIER_WIDTH / gray.width))),
+                           Image.BOX)
+    ink = np.asarray(gray) < INK_LEVEL
+    height, width = ink.shape
+
+    horizontal_rules = _count_rules(ink, max(2, int(RULE_MIN_WIDTH * width)))
+    vertical_rules = _count_rules(ink.T, max(2, int(RULE_MIN_HEIGHT * height)))
+
+    # Column starts of each text line, snapped to the alignment tolerance
+    min_gap = max(2, int(COLUMN_GAP * width))
+    bin_width = max(1, ALIGN_TOLERANCE * width)
+    starts = Counter()
+    fills = []
+    key_value_rows = 0
+    run_column, run_key_ends = None, []
+    for top, bottom in _text_rows(ink):
+        segments = _segments(ink[top:bottom].any(axis=0), min_gap)
+        # Runs of consecutive lines with a short key and a value at the same position
+        value_column = None
+        if len(segments) == 2 and segments[0][1] - segments[0][0] < MAX_KEY_WIDTH * width:
+            value_column = round(segments[1][0] / bin_width)
+        if value_column is None or value_column != run_column:
+            key_value_rows = max(key_value_rows, _key_value_run(run_key_ends, bin_width))
+            run_column, run_key_ends = value_column, []
+        if value_column is not None:
+            run_key_ends.append(segments[0][1])
+        if len(segments) < 2:
+            continue
+        line_bins = {round(start / bin_width) for start, _ in segments[1:]}
+        starts.update(line_bins)
+        fills.extend((end - start) / (next_start - start)
+                     for (start, end), (next_start, _) in zip(segments, segments[1:]))
+    key_value_rows = max(key_value_rows, _key_value_run(run_key_ends, bin_width))
+
+    aligned = {column for column, count in starts.items() if count >= MIN_ALIGNED_ROWS}
+    return {
+        'horizontal_rules': horizontal_rules,
+        'vertical_rules': vertical_rules,
+        'aligned_columns': _merge_neighbours(aligned),
+        'column_fill': round(float(np.median(fills)), 2) if fills else None,
+        'key_value_rows': key_value_rows,
+    }
+
+
+def _key_value_run(key_ends, bin_width):
+    """Length of a run of key-value candidate lines, if their keys differ in length."""
+    # The lines of a narrow text column end at about the same position
+    if len(key_ends) < 2 or max(key_ends) - min(key_ends) < 2 * bin_width:
+        return 0
+    return len(key_ends)
+
+
+def _merge_neighbours(bins):
+    """Count groups of adjacent bins as one column (starts near a bin edge)."""
+    return sum(1 for column in bins if column - 1 not in bins)
+
+
+def choose_route(metrics):
+    """
+    Choose the Textract route for a page from its layout metrics.
+
+    Args:
+        metrics (dict): Output of layout_metrics
+
+    Returns:
+        str: 'text', 'tables' or 'tables_forms'
+    """
+    has_form = metrics['key_value_rows'] >= FORM_MIN_KEY_VALUE_ROWS
+    has_table = (metrics['horizontal_rules'] >= TABLE_MIN_RULES
+                 or (metrics['horizontal_rules'] >= 2 and metrics['vertical_rules'] >= 2)
+                 or (metrics['aligned_columns'] >= 2 and metrics['column_fill'] < MAX_TABLE_COLUMN_FILL))
+    if has_form:
+        return 'tables_forms'
+    if has_table:
+        return 'tables'
+    return 'text'
+
+
+def route_features(image_path, allowed=TEXTRACT_FEATURES):
+    """
+    Classify a page image and return the Textract features it needs.
+
+    Args:
+        image_path (str): Enhanced page image
+        allowed (list): Features that may be used (default: TEXTRACT_FEATURES)
+
+    Returns:
+        tuple: (route name, feature list); an empty list means DetectDocumentText
+    """
+    with Image.open(image_path) as image:
+        image.draft('L', (CLASSIFIER_WIDTH, CLASSIFIER_WIDTH * 2))
+        metrics = layout_metrics(image)
+    route = choose_route(metrics)
+    features = [feature for feature in ROUTES[route] if feature in allowed]
+    logger.debug(f"Routed {image_path} to {route}: {metrics}")
+    return route, features
@@ -0,0 +1,251 @@
+"""
+Pipelined execution of per-page stages connected by bounded queues.
+
+Running each processing step over all pages before starting the next one
+leaves the CPU idle while Textract calls are in flight, and the network
+idle while pages are rasterized or post-processed. A Pipeline runs the
+steps as a chain of stages instead, each with its own workers:
+
+- thread stages, for I/O such as Textract calls or scratch storage
+- process stages, for CPU-bound work such as rasterization; their
+  function and items must be picklable (module-level functions, or
+  functools.partial of them)
+
+Stages are connected by bounded queues, and at most a fixed number of
+items are in flight between the source and the sink. When a stage falls
+behind, the queues in front of it fill up and the earlier stages block
+(backpressure), so memory use does not grow with the document. Results
+come out of the sink in input order, so the caller can write them as
+they arrive. Wall time approaches that of the slowest stage rather than
+the sum of all stages.
+"""
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for a stopped pipeline while blocked on a queue
+POLL_SECONDS = 0.1
+
+# Marks the end of the items in a queue
+_DONE = object()
+
+
+class _Failure:
+    """An item that failed in a stage; it skips the remaining stages."""
+
+    __slots__ = ('stage', 'error')
+
+    def __init__(self, stage, error):
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """One step of a pipeline: a function applied to every item."""
+
+    def __init__(self, name, func, workers=1, processes=False):
+        """
+        Initialize a stage.
+
+        Args:
+            name (str): Stage name, used in logs and statistics
+            func (callable): Function called with each item; its return value
+                is the item passed to the next stage
+            workers (int): Items processed at the same time
+            processes (bool): Run func in worker processes instead of threads
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.processes = processes
+
+
+class Pipeline:
+    """Run items through a chain of stages connected by bounded queues."""
+
+    def __init__(self, stages, queue_size=PIPELINE_QUEUE_SIZE, skip_errors=False):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages (list): Stages, in processing order
+            queue_size (int): Items waiting in front of each stage
+            skip_errors (bool): Log failed items and yield None for them
+                instead of stopping the pipeline and raising
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.skip_errors = skip_errors
+        # Items between the source and the sink, including the ones
+        # waiting to be yielded in order
+        self.max_in_flight = sum(stage.workers for stage in stages) + self.queue_size * (len(stages) + 1)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get(self, inbox, stop):
+        while not stop.is_set():
+            try:
+                return inbox.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, outbox, entry, stop):
+        while not stop.is_set():
+            try:
+                outbox.put(entry, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _count(self, stage, key, value):
+        with self._lock:
+            self._stats[stage.name][key] += value
+
+    def _work(self, stage, inbox, outbox, pool, remaining, stop):
+        """Worker loop: take items from the inbox, process them, pass them on."""
+        while True:
+            start = time.perf_counter()
+            entry = self._get(inbox, stop)
+            self._count(stage, 'idle_seconds', time.perf_counter() - start)
+            if entry is None:
+                return
+            if entry is _DONE:
+                # Let the other workers of the stage see the end too; the
+                # last one to finish passes it on
+                self._put(inbox, _DONE, stop)
+                with self._lock:
+                    remaining[stage.name] -= 1
+                    last = not remaining[stage.name]
+                if last:
+                    self._put(outbox, _DONE, stop)
+                return
+
+            index, item = entry
+            if item is not None and not isinstance(item, _Failure):
+                start = time.perf_counter()
+                try:
+                    if pool is not None:
+                        item = pool.submit(stage.func, item).result()
+                    else:
+                        item = stage.func(item)
+                except Exception as e:
+                    item = _Failure(stage.name, e)
+                self._count(stage, 'busy_seconds', time.perf_counter() - start)
+                self._count(stage, 'items', 1)
+
+            start = time.perf_counter()
+            if not self._put(outbox, (index, item), stop):
+                return
+            self._count(stage, 'blocked_seconds', time.perf_counter() - start)
+
+    def _feed(self, items, outbox, in_flight, stop, feed_error):
+        """Source: put the input items into the first queue."""
+        try:
+            for entry in enumerate(items):
+                while not in_flight.acquire(timeout=POLL_SECONDS):
+                    if stop.is_set():
+                        return
+                if not self._put(outbox, entry, stop):
+                    return
+        except Exception as e:
+            feed_error.append(e)
+        self._put(outbox, _DONE, stop)
+
+    def run(self, items):
+        """
+        Process items through all stages.
+
+        Items that are None pass through the stages untouched, e.g. pages
+        that need no further work.
+
+        Args:
+            items (iterable): Input items; consumed as the pipeline has room
+
+        Yields:
+            The result of the last stage for each item, in input order
+            (None for failed items when skip_errors is set)
+
+        Raises:
+            Exception: The error of the first failed item (unless
+                skip_errors is set), or of the items iterable
+        """
+        stop = threading.Event()
+        in_flight = threading.Semaphore(self.max_in_flight)
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        remaining = {stage.name: stage.workers for stage in self.stages}
+        self._stats = {stage.name: {'workers': stage.workers, 'processes': stage.processes, 'items': 0,
+                                    'busy_seconds': 0.0, 'idle_seconds': 0.0, 'blocked_seconds': 0.0}
+                       for stage in self.stages}
+        feed_error = []
+        pools = []
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], in_flight, stop, feed_error),
+                                    name="pipeline-source", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            pool = None
+            if stage.processes:
+                pool = ProcessPoolExecutor(max_workers=stage.workers)
+                pools.append(pool)
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[i], queues[i + 1], pool, remaining, stop),
+                    name=f"pipeline-{stage.name}-{worker}", daemon=True
+                ))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            # Sink: hold results that arrive early until their turn comes
+            pending = {}
+            next_index = 0
+            while True:
+                entry = self._get(queues[-1], stop)
+                if entry is _DONE or entry is None:
+                    break
+                index, item = entry
+                pending[index] = item
+                while next_index in pending:
+                    item = pending.pop(next_index)
+                    in_flight.release()
+                    if isinstance(item, _Failure):
+                        if not self.skip_errors:
+                            raise item.error
+                        logger.error(f"Error in pipeline stage {item.stage} for item {next_index + 1}: "
+                                     f"{str(item.error)}")
+                        item = None
+                    next_index += 1
+                    yield item
+            if feed_error:
+                raise feed_error[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            for pool in pools:
+                pool.shutdown(cancel_futures=True)
+            self.wall_seconds = time.perf_counter() - start
+
+    def stats(self):
+        """
+        Return per-stage statistics of the last run.
+
+        'busy_seconds' is time spent processing items, 'idle_seconds' time
+        waiting for input and 'blocked_seconds' time waiting for room in
+        the next queue (backpressure), summed over the stage's workers.
+
+        Returns:
+            dict: Stage name -> statistics
+        """
+        return {name: {key: round(value, 2) if isinstance(value, float) else value
+                       for key, value in stats.items()}
+                for name, stats in self._stats.items()}
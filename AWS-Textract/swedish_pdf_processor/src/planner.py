@@ -0,0 +1,281 @@
+"""
+Execution planning: synchronous page fan-out vs. asynchronous Textract jobs.
+
+The planner predicts the wall time of each strategy from the page count,
+page image sizes, available quota and measured historical latencies, and
+picks the fastest feasible one:
+
+- 'sync': one AnalyzeDocument call per page, several in parallel
+- 'async': one StartDocumentAnalysis job for the whole document
+- 'async_split': several jobs over page ranges, run in parallel and merged
+"""
+import math
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (TEXTRACT_SYNC_TPS, TEXTRACT_SYNC_MAX_BYTES, TEXTRACT_MAX_ASYNC_JOBS,
+                    ASYNC_MIN_PAGES_PER_JOB, LATENCY_HISTORY_PATH)
+from src import serialization
+
+logger = logging.getLogger(__name__)
+
+# Starting estimates used until real measurements have been recorded
+DEFAULT_LATENCIES = {
+    'sync_page_seconds': 3.0,  # One AnalyzeDocument call
+    'async_job_seconds': 20.0,  # Fixed cost of an async job (upload, queueing, polling)
+    'async_page_seconds': 0.5,  # Additional cost per page inside an async job
+}
+
+# Weight of a new measurement in the moving averages
+SMOOTHING = 0.3
+
+
+class LatencyHistory:
+    """Exponentially smoothed Textract latencies, persisted as JSON."""
+
+    def __init__(self, path=LATENCY_HISTORY_PATH):
+        """
+        Load the history, falling back to defaults.
+
+        Args:
+            path (str): JSON file holding the history
+        """
+        self.path = path
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self._lock = threading.Lock()
+        try:
+            self.latencies.update(serialization.load(path))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable latency history {path}: {str(e)}")
+
+    def get(self, name):
+        """Return the current estimate of a latency."""
+        return self.latencies[name]
+
+    def update(self, name, value):
+        """Blend a new measurement into a latency estimate."""
+        with self._lock:
+            self.latencies[name] = (1 - SMOOTHING) * self.latencies[name] + SMOOTHING * value
+
+    def record_sync_page(self, seconds):
+        """Record the duration of one synchronous page call."""
+        self.update('sync_page_seconds', seconds)
+
+    def record_async_job(self, page_count, seconds):
+        """
+        Record the duration of one async job.
+
+        The fixed and per-page parts cannot be separated from one sample, so
+        the current per-page estimate is used to attribute the remainder to
+        the fixed cost, and vice versa.
+        """
+        per_page = self.latencies['async_page_seconds']
+        fixed = self.latencies['async_job_seconds']
+        self.update('async_job_seconds', max(0.0, seconds - per_page * page_count))
+        if page_count:
+            self.update('async_page_seconds', max(0.0, (seconds - fixed) / page_count))
+
+    def save(self):
+        """Write the history to disk."""
+        with self._lock:
+            serialization.dump(self.latencies, self.path)
+
+
+def split_page_ranges(page_count, parts):
+    """
+    Split pages 1..page_count into contiguous, nearly equal ranges.
+
+    Args:
+        page_count (int): Number of pages
+        parts (int): Number of ranges
+
+    Returns:
+        list: [first_page, last_page] pairs, 1-based and inclusive
+    """
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    first = 1
+    for i in range(parts):
+        last = first + size - 1 + (1 if i < remainder else 0)
+        ranges.append([first, last])
+        first = last + 1
+    return ranges
+
+
+class ExecutionPlanner:
+    """Choose between synchronous fan-out and asynchronous Textract jobs."""
+
+    def __init__(self, history=None, sync_tps=TEXTRACT_SYNC_TPS, async_job_slots=TEXTRACT_MAX_ASYNC_JOBS,
+                 min_pages_per_job=ASYNC_MIN_PAGES_PER_JOB):
+        """
+        Initialize the planner.
+
+        Args:
+            history (LatencyHistory): Measured latencies (default: load from disk)
+            sync_tps (float): Synchronous calls per second currently available
+            async_job_slots (int): Async jobs that may currently be started
+            min_pages_per_job (int): Smallest page range worth its own async job
+        """
+        self.history = history or LatencyHistory()
+        self.sync_tps = sync_tps
+        self.async_job_slots = async_job_slots
+        self.min_pages_per_job = min_pages_per_job
+
+    def sync_concurrency(self):
+        """Number of synchronous calls to keep in flight to use the TPS quota."""
+        return max(1, math.ceil(self.sync_tps * self.history.get('sync_page_seconds')))
+
+    def predict_sync(self, page_count):
+        """Predicted seconds for synchronous fan-out over all pages."""
+        page_seconds = self.history.get('sync_page_seconds')
+        waves = math.ceil(page_count / self.sync_concurrency())
+        # Whichever is slower: the call latency or the rate limit
+        return max(waves * page_seconds, page_count / self.sync_tps)
+
+    def predict_async(self, page_count, jobs=1):
+        """Predicted seconds for async jobs over equal page ranges, run in parallel."""
+        pages_per_job = math.ceil(page_count / jobs)
+        return self.history.get('async_job_seconds') + pages_per_job * self.history.get('async_page_seconds')
+
+    def plan(self, page_count, page_bytes=None, async_available=True, mode='auto'):
+        """
+        Choose an execution strategy.
+
+        Args:
+            page_count (int): Number of pages
+            page_bytes (list): Encoded size of each page image (optional)
+            async_available (bool): Whether an S3 bucket is available for async jobs
+            mode (str): 'auto', or 'sync'/'async' to force a strategy
+
+        Returns:
+            dict: Plan with 'mode', 'page_ranges', 'predicted_seconds', 'reason'
+                and the predictions of all feasible candidates
+        """
+        candidates = {}
+        reasons = []
+
+        oversized = [i + 1 for i, size in enumerate(page_bytes or []) if size > TEXTRACT_SYNC_MAX_BYTES]
+        if oversized:
+            reasons.append(f"pages {oversized} exceed the synchronous size limit")
+        elif mode in ('auto', 'sync'):
+            candidates['sync'] = ([[1, page_count]], self.predict_sync(page_count))
+
+        if async_available and mode in ('auto', 'async'):
+            candidates['async'] = ([[1, page_count]], self.predict_async(page_count))
+            max_jobs = min(self.async_job_slots, page_count // self.min_pages_per_job)
+            if max_jobs > 1:
+                ranges = split_page_ranges(page_count, max_jobs)
+                candidates['async_split'] = (ranges, self.predict_async(page_count, len(ranges)))
+        elif not async_available:
+            reasons.append("no S3 bucket for async jobs")
+
+        if not candidates:
+            # Nothing feasible was allowed; fall back to synchronous calls
+            reasons.append(f"mode '{mode}' not feasible, falling back to sync")
+            candidates['sync'] = ([[1, page_count]], self.predict_sync(page_count))
+
+        chosen = min(candidates, key=lambda name: candidates[name][1])
+        page_ranges, predicted = candidates[chosen]
+        if mode != 'auto':
+            reasons.append(f"forced {mode}")
+        reasons.append(f"{chosen} predicted fastest at {predicted:.1f}s")
+
+        return {
+            'mode': chosen,
+            'page_ranges': page_ranges,
+            'predicted_seconds': round(predicted, 2),
+            'sync_concurrency': self.sync_concurrency(),
+            'candidates': {name: round(seconds, 2) for name, (_, seconds) in candidates.items()},
+            'reason': '; '.join(reasons),
+        }
+
+
+def execute_plan(plan, textract_client, image_paths, bucket=None, key_prefix='textract-jobs',
+                 history=None, on_page_done=None, features_for=None):
+    """
+    Run Textract over page images according to a plan.
+
+    Page failures are logged and leave a None in place of the response.
+    Measured latencies are recorded in the history. In sync mode the
+    images may come from an iterator; each page is submitted as soon as
+    the iterator yields it.
+
+    Args:
+        plan (dict): Plan from ExecutionPlanner.plan
+        textract_client (TextractClient): Textract client
+        image_paths (iterable): Page images, in page order (a list for async modes)
+        bucket (str): S3 bucket for async jobs
+        key_prefix (str): S3 key prefix for async job inputs
+        history (LatencyHistory): History to record measurements in (optional)
+        on_page_done (callable): Called with each image path once its page has
+            been analyzed or has failed, e.g. to delete the image (optional)
+        features_for (callable): Returns the Textract features of a page image,
+            an empty list for text detection only (default: TEXTRACT_FEATURES).
+            An async job uses the features of all of its pages.
+
+    Returns:
+        list: Textract response (or None if it failed) for each image, in page order
+    """
+    def analyze_sync(image_path):
+        start_time = time.time()
+        try:
+            features = features_for(image_path) if features_for is not None else None
+            response = textract_client.analyze_document(image_path, features)
+        finally:
+            if on_page_done is not None:
+                on_page_done(image_path)
+        if history is not None:
+            history.record_sync_page(time.time() - start_time)
+        return response
+
+    def analyze_range(page_range):
+        first, last = page_range
+        key = f"{key_prefix}/{uuid.uuid4()}_{first}-{last}.tiff"
+        features = None
+        if features_for is not None:
+            features = []
+            for image_path in image_paths[first - 1:last]:
+                features.extend(feature for feature in features_for(image_path) if feature not in features)
+        start_time = time.time()
+        try:
+            responses = textract_client.analyze_pages_async(image_paths[first - 1:last], bucket, key, features)
+        finally:
+            if on_page_done is not None:
+                for image_path in image_paths[first - 1:last]:
+                    on_page_done(image_path)
+        if history is not None:
+            history.record_async_job(last - first + 1, time.time() - start_time)
+        return responses
+
+    results = []
+    if plan['mode'] == 'sync':
+        with ThreadPoolExecutor(max_workers=plan['sync_concurrency']) as executor:
+            futures = [executor.submit(analyze_sync, path) for path in image_paths]
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Error processing page {i+1}: {str(e)}")
+                    results.append(None)
+    else:
+        with ThreadPoolExecutor(max_workers=len(plan['page_ranges'])) as executor:
+            futures = [executor.submit(analyze_range, page_range) for page_range in plan['page_ranges']]
+            for (first, last), future in zip(plan['page_ranges'], futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    logger.error(f"Error processing pages {first}-{last}: {str(e)}")
+                    results.extend([None] * (last - first + 1))
+
+    if history is not None:
+        try:
+            history.save()
+        except OSError as e:
+            logger.warning(f"Could not save latency history: {str(e)}")
+    return results
@@ -2,27 +2,34 @@
 Post-processing module for correcting Swedish characters in OCR output.
 """
 import logging
-import re
-import json
 from pathlib import Path
 
+from config import LAYOUT_READING_ORDER
+from src import serialization
+from src.lexicon import get_restorer
+from src.layout import reading_order
+
 logger = logging.getLogger(__name__)
 
-# Swedish character correction dictionary
+# Swedish character correction dictionary. Digraphs such as "ae" and "oe"
+# are not listed: they are legitimate in many words, so they are resolved
+# per word by the lexicon instead.
 SWEDISH_CHAR_FIXES = {
     # Character-level fixes
-    "a ̊": "å", "a˚": "å", "aa": "å", "a°": "å", "aº": "å",
-    "a ̈": "ä", "ae": "ä", "a¨": "ä",
-    "o ̈": "ö", "oe": "ö", "o¨": "ö",
+    "a ̊": "å", "a˚": "å", "a°": "å", "aº": "å",
+    "a ̈": "ä", "a¨": "ä",
+    "o ̈": "ö", "o¨": "ö",
     # UTF-8 encoding issues
     "Ã¥": "å", "Ã¤": "ä", "Ã¶": "ö",
     # Capital letter variants
     "A ̊": "Å", "A˚": "Å", "A°": "Å", "Aº": "Å",
-    "A ̈": "Ä", "AE": "Ä", "A¨": "Ä",
-    "O ̈": "Ö", "OE": "Ö", "O¨": "Ö",
+    "A ̈": "Ä", "A¨": "Ä",
+    "O ̈": "Ö", "O¨": "Ö",
 }
 
-# Common Swedish maintenance terms with character issues
+# Common Swedish maintenance terms with character issues. The corrected
+# terms are added to the diacritic restoration lexicon as domain vocabulary
+# (see also data/domain_vocabulary.txt).
 SWEDISH_TERM_FIXES = {
     # Common maintenance terms
     "underha ̊llsplan": "underhållsplan",
@@ -63,34 +70,33 @@ def fix_swedish_characters(text):
     if not text:
         return text
         
-    logger.info("Applying Swedish character fixes")
+    logger.debug("Applying Swedish character fixes")
     
     # First fix individual characters
     for bad, good in SWEDISH_CHAR_FIXES.items():
         text = text.replace(bad, good)
     
-    # Then fix common terms
-    for bad, good in SWEDISH_TERM_FIXES.items():
-        # Use word boundary to avoid partial word replacements
-        text = re.sub(r'\b' + re.escape(bad) + r'\b', good, text, flags=re.IGNORECASE)
-    
-    return text
+    # Then restore missing diacritics word by word from the lexicon
+    return get_restorer(_domain_terms()).restore_text(text)
 
-def extract_text_from_blocks(blocks):
+def _domain_terms():
+    """Return the single-word corrected terms of SWEDISH_TERM_FIXES."""
+    return [word for term in SWEDISH_TERM_FIXES.values() for word in term.split()]
+
+def extract_text_from_blocks(blocks, layout=LAYOUT_READING_ORDER):
     """
     Extract text from Textract blocks.
     
     Args:
         blocks (list): List of Textract blocks
+        layout (bool): Order lines by columns and tables (see src/layout.py)
+            instead of the response order
         
     Returns:
         str: Extracted text
     """
-    text = ""
-    for block in blocks:
-        if block['BlockType'] == 'LINE':
-            text += block['Text'] + "\n"
-    return text
+    lines = reading_order(blocks) if layout else (block for block in blocks if block['BlockType'] == 'LINE')
+    return "".join(line['Text'] + "\n" for line in lines)
 
 def process_textract_response(response):
     """
@@ -102,7 +108,7 @@ def process_textract_response(response):
     Returns:
         dict: Processed response with corrected text
     """
-    logger.info("Processing Textract response")
+    logger.debug("Processing Textract response")
     
     # Extract all blocks
     blocks = response['Blocks']
@@ -129,6 +135,30 @@ def process_textract_response(response):
         'tables': tables
     }
 
+def extract_page_content(response):
+    """
+    Post-process one page response into its text, tables and form fields.
+    
+    Runs in pipeline worker processes, so it only takes the response.
+    
+    Args:
+        response (dict): Textract response of one page
+        
+    Returns:
+        dict: 'text', 'tables' and 'key_values' of the page
+    """
+    # Imported here: both modules import this one
+    from src.table_extractor import TableExtractor
+    from src.form_extractor import extract_key_values
+    from src.block_store import BlockStore
+    
+    store = BlockStore.from_blocks(response['Blocks'])
+    return {
+        'text': fix_swedish_characters(extract_text_from_blocks(response['Blocks'])),
+        'tables': TableExtractor().extract_tables(store),
+        'key_values': extract_key_values(store),
+    }
+
 def extract_table_data(table_block, all_blocks):
     """
     Extract data from a table block.
@@ -169,6 +199,36 @@ def extract_table_data(table_block, all_blocks):
     
     return table
 
+def combine_processed_pages(processed_pages, tables, document_id, timestamp, source_file, page_count,
+                            key_values=None):
+    """
+    Combine per-page processed content into the document result.
+    
+    This is the structure written to the document JSON file.
+    
+    Args:
+        processed_pages (list): Processed content of each page, in page order
+        tables (list): All extracted tables, in page order
+        document_id (str): Unique document ID
+        timestamp (str): Processing timestamp
+        source_file (str): Path or URI of the source PDF
+        page_count (int): Number of pages in the document
+        key_values (dict): Document fields from form data (optional, see
+            src/form_extractor.py)
+        
+    Returns:
+        dict: Combined, JSON-serializable result
+    """
+    return {
+        'text': "\n\n".join([page['text'] for page in processed_pages]),
+        'tables': tables,
+        'document_id': document_id,
+        'timestamp': timestamp,
+        'source_file': str(source_file),
+        'page_count': page_count,
+        'key_values': key_values or {}
+    }
+
 def save_processed_content(processed_content, output_path):
     """
     Save processed content to output file.
@@ -193,5 +253,4 @@ def save_processed_content(processed_content, output_path):
                 writer.writerows(table)
     
     # Save full content as JSON
-    with open(output_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
-        json.dump(processed_content, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    serialization.dump(processed_content, output_path.with_suffix('.json'))
\ No newline at end of file
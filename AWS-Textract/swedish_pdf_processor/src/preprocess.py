@@ -1,15 +1,19 @@
 """
 PDF preprocessing module for improving OCR quality.
 """
+import io
 import os
 import logging
 from pathlib import Path
 import uuid
+import queue
+import threading
 from pdf2image import convert_from_path
 from PIL import Image, ImageEnhance, ImageFilter
 import tempfile
 
-from config import PDF_DPI, IMAGE_FORMAT, CONTRAST_FACTOR, TEMP_DIR
+from config import (PDF_DPI, IMAGE_FORMAT, CONTRAST_FACTOR, TEMP_DIR, ADAPTIVE_DPI_CANDIDATES,
+                    ADAPTIVE_THUMBNAIL_DPI, MIN_TEXT_HEIGHT_PX, DENSE_PAGE_INK_ROWS)
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +66,213 @@ def preprocess_pdf(pdf_path, output_dir=None, dpi=PDF_DPI):
         logger.error(f"Error preprocessing PDF: {str(e)}")
         raise
 
+def preprocess_page(pdf_path, page_number, output_dir=None, dpi=PDF_DPI):
+    """
+    Convert a single PDF page to an enhanced image.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        output_dir (str): Directory to save the image
+        dpi (int): Resolution for the output image
+        
+    Returns:
+        str: Path to the generated image
+    """
+    output_dir = Path(output_dir) if output_dir is not None else TEMP_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    enhanced_img = render_page(pdf_path, page_number, dpi)
+    img_path = os.path.join(output_dir, f"page_{page_number}.{IMAGE_FORMAT.lower()}")
+    enhanced_img.save(img_path, IMAGE_FORMAT)
+    return img_path
+
+def render_page(pdf_path, page_number, dpi=PDF_DPI):
+    """
+    Rasterize and enhance a single PDF page in memory.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        dpi (int): Resolution for the image
+        
+    Returns:
+        PIL.Image: Enhanced page image
+    """
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    if not images:
+        raise ValueError(f"Page {page_number} not found in {pdf_path}")
+    return enhance_image(images[0])
+
+def render_page_png(pdf_path, page_number, dpi=PDF_DPI, adaptive=False):
+    """
+    Rasterize, enhance and encode a single page, e.g. in a worker process.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        dpi (int): Resolution for the image (the maximum when adaptive)
+        adaptive (bool): Choose the page's DPI from a thumbnail
+        
+    Returns:
+        tuple: (page number, DPI used, encoded image bytes in IMAGE_FORMAT)
+    """
+    render_dpi = select_page_dpi(pdf_path, page_number, dpi)[0] if adaptive else dpi
+    buffer = io.BytesIO()
+    render_page(pdf_path, page_number, render_dpi).save(buffer, IMAGE_FORMAT)
+    return page_number, render_dpi, buffer.getvalue()
+
+# Rows whose average level is below this (about 0.5% dark pixels) contain ink
+INK_ROW_LEVEL = 254
+
+# Ink bands taller than this are pictures or merged lines, not single text lines
+MAX_TEXT_LINE_PT = 72
+
+def estimate_text_metrics(image, dpi):
+    """
+    Estimate text line heights and density from a page's row projection.
+    
+    The page is binarized and averaged per row. Runs of consecutive rows
+    containing ink are taken as text lines; their heights approximate the
+    font size. Runs taller than MAX_TEXT_LINE_PT are ignored.
+    
+    Args:
+        image (PIL.Image): Page image, e.g. a low-resolution thumbnail
+        dpi (int): Resolution of the image
+        
+    Returns:
+        dict: 'lines' (number of text lines), 'small_text_pt' (20th
+            percentile line height in points, None if no text),
+            'median_text_pt' and 'ink_rows' (share of rows with ink)
+    """
+    gray = image.convert('L')
+    binary = gray.point(lambda value: 0 if value < 128 else 255)
+    # Averaging each row down to one pixel gives the row projection
+    profile = list(binary.resize((1, binary.height), Image.BOX).getdata())
+    
+    max_run = MAX_TEXT_LINE_PT * dpi / 72
+    heights = []
+    run = 0
+    for value in profile + [255]:
+        if value < INK_ROW_LEVEL:
+            run += 1
+        elif run:
+            # Single rows are rules and underlines rather than text
+            if 1 < run <= max_run:
+                heights.append(run)
+            run = 0
+    
+    ink_rows = sum(1 for value in profile if value < INK_ROW_LEVEL) / max(1, len(profile))
+    if not heights:
+        return {'lines': 0, 'small_text_pt': None, 'median_text_pt': None, 'ink_rows': round(ink_rows, 3)}
+    
+    heights.sort()
+    to_points = 72 / dpi
+    return {
+        'lines': len(heights),
+        'small_text_pt': round(heights[int(0.2 * (len(heights) - 1))] * to_points, 1),
+        'median_text_pt': round(heights[len(heights) // 2] * to_points, 1),
+        'ink_rows': round(ink_rows, 3),
+    }
+
+def choose_dpi(metrics, max_dpi=PDF_DPI, candidates=ADAPTIVE_DPI_CANDIDATES,
+               min_text_px=MIN_TEXT_HEIGHT_PX):
+    """
+    Choose the lowest DPI that renders the page's small text large enough.
+    
+    Args:
+        metrics (dict): Output of estimate_text_metrics
+        max_dpi (int): Highest DPI to use
+        candidates (tuple): DPIs to choose from
+        min_text_px (int): Required line height in pixels
+        
+    Returns:
+        int: Chosen DPI
+    """
+    candidates = sorted(dpi for dpi in candidates if dpi <= max_dpi) or [max_dpi]
+    if not metrics['small_text_pt']:
+        # Blank pages need little resolution; a page full of ink without
+        # separable lines (merged small print or a picture) gets the most
+        if metrics['ink_rows'] > DENSE_PAGE_INK_ROWS:
+            return candidates[-1]
+        return candidates[0]
+    
+    required = min_text_px * 72 / metrics['small_text_pt']
+    index = next((i for i, dpi in enumerate(candidates) if dpi >= required), len(candidates) - 1)
+    if metrics['ink_rows'] > DENSE_PAGE_INK_ROWS:
+        # Closely spaced lines merge in the thumbnail and look taller than they are
+        index = min(index + 1, len(candidates) - 1)
+    return candidates[index]
+
+def select_page_dpi(pdf_path, page_number, max_dpi=PDF_DPI):
+    """
+    Render a thumbnail of a page and choose the DPI for its full render.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        max_dpi (int): Highest DPI to use
+        
+    Returns:
+        tuple: (chosen DPI, text metrics)
+    """
+    thumbnails = convert_from_path(pdf_path, dpi=ADAPTIVE_THUMBNAIL_DPI, first_page=page_number,
+                                   last_page=page_number, grayscale=True)
+    if not thumbnails:
+        raise ValueError(f"Page {page_number} not found in {pdf_path}")
+    metrics = estimate_text_metrics(thumbnails[0], ADAPTIVE_THUMBNAIL_DPI)
+    return choose_dpi(metrics, max_dpi), metrics
+
+def iter_preprocessed_pages(pdf_path, pages, scratch, dpi=PDF_DPI, adaptive=False, page_dpi=None):
+    """
+    Rasterize pages into scratch storage on a background thread.
+    
+    Pages are yielded as soon as they are stored. When the scratch budget
+    is full, rasterization pauses until the consumer releases pages, so
+    the consumer must release each page once it is done with it.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (list): 1-based page numbers to rasterize, in order
+        scratch (ScratchSpace): Scratch storage for the images
+        dpi (int): Resolution for the images (the maximum when adaptive)
+        adaptive (bool): Choose each page's DPI from a thumbnail
+        page_dpi (dict): Filled with the DPI used for each page (optional)
+        
+    Yields:
+        tuple: (page number, image path)
+    """
+    ready = queue.Queue()
+    stop = threading.Event()
+    
+    def producer():
+        try:
+            for page in pages:
+                if stop.is_set():
+                    return
+                render_dpi = select_page_dpi(pdf_path, page, dpi)[0] if adaptive else dpi
+                if page_dpi is not None:
+                    page_dpi[page] = render_dpi
+                image = render_page(pdf_path, page, render_dpi)
+                ready.put((page, scratch.save_image(image, f"page_{page}")))
+            ready.put(None)
+        except Exception as e:
+            ready.put(e)
+    
+    thread = threading.Thread(target=producer, name="rasterize", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                logger.error(f"Error preprocessing PDF: {str(item)}")
+                raise item
+            yield item
+    finally:
+        stop.set()
+
 def enhance_image(image):
     """
     Apply image enhancements to improve OCR quality.
@@ -0,0 +1,459 @@
+"""
+Page processing paths of process_pdf.
+
+Each path turns pages of a PDF into page records, keyed by page number:
+dicts with 'content_hash', 'image_hash', 'dpi', 'text', 'tables' and
+'key_values' (plus 'route' or 'source' where they apply), as stored in the
+page manifest. process_pdf chooses a path and writes the outputs, the page
+manifest, the index and the run report once from the records:
+
+- process_distributed: workers process the pages from a queue
+- process_steps: each step runs over all pages before the next one starts
+- process_pipelined: the steps overlap page by page (see src/pipeline.py)
+
+Pages extracted locally (extract_local_pages) or reused from an earlier
+run are settled before a path runs; the paths only see the other pages.
+"""
+import os
+import time
+import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from config import (AWS_REGION, PDF_DPI, IMAGE_FORMAT, LOCAL_TABLES_MIN_CONFIDENCE, PIPELINE_RENDER_PROCESSES,
+                    PIPELINE_POSTPROCESS_PROCESSES, DISTRIBUTED_TIMEOUT_SECONDS)
+from src.preprocess import iter_preprocessed_pages, render_page_png
+from src.textract_client import TextractClient
+from src.postprocess import process_textract_response, extract_page_content
+from src.table_extractor import TableExtractor
+from src.form_extractor import extract_key_values
+from src.block_store import BlockStore
+from src.utils import StageSummary
+from src.distributed import Coordinator, open_queue
+from src.planner import ExecutionPlanner, execute_plan
+from src.fingerprint import file_hash, match_previous_pages
+from src.scratch import ScratchSpace
+from src.reocr import reocr_page, page_sizes
+from src.local_tables import extract_tables_local
+from src.page_classifier import route_features
+from src.pipeline import Pipeline, Stage
+
+logger = logging.getLogger(__name__)
+
+
+class PageSink:
+    """Collect finished pages in page order, streaming their tables to Excel."""
+
+    def __init__(self, excel_writer):
+        """
+        Initialize the sink.
+
+        Args:
+            excel_writer (StreamingExcelWriter): Workbook the tables are added to
+        """
+        self.excel_writer = excel_writer
+        self.pages = []
+        self.tables = []
+        self.written = set()
+
+    def write(self, page, record):
+        """Add a page; pages must be written in page order."""
+        self.pages.append(dict(record, page=page))
+        self.excel_writer.add_tables(record['tables'])
+        self.tables.extend(record['tables'])
+        self.written.add(page)
+
+    def write_remaining(self, page_records):
+        """Add the pages of page_records that have not been written yet, in page order."""
+        for page in sorted(page_records):
+            if page not in self.written:
+                self.write(page, page_records[page])
+
+
+class _PageImages:
+    """What is learned about each rendered page: image hash, DPI and feature route."""
+
+    def __init__(self, content_hashes, dpi, previous=None):
+        """
+        Initialize the page facts.
+
+        Args:
+            content_hashes (list): Content hash of every page of the document
+            dpi (int): DPI of pages rendered without adaptive DPI
+            previous (dict): Page manifest of an earlier run (optional)
+        """
+        self.content_hashes = content_hashes
+        self.dpi = dpi
+        self.previous = previous
+        self.image_hashes = {}
+        self.page_dpi = {}
+        self.routes = {}
+        self.ocr_pages = []
+        self.reused = {}
+        self._page_of = {}
+
+    def add(self, page, path):
+        """
+        Hash a rendered page image.
+
+        Pages whose content changed but that render identically to a page of
+        the earlier run need no OCR; their earlier record is kept in reused.
+
+        Returns:
+            bool: True if the page needs OCR
+        """
+        self.image_hashes[page] = file_hash(path)
+        if self.previous:
+            reused = match_previous_pages({page: self.image_hashes[page]}, self.previous, key='image_hash')
+            if reused:
+                self.reused.update(reused)
+                return False
+        self.ocr_pages.append(page)
+        self._page_of[path] = page
+        return True
+
+    def features_for(self, path):
+        """Choose the Textract features of a page image."""
+        route, features = route_features(path)
+        self.routes[self._page_of[path]] = route
+        return features
+
+    def record(self, page, content):
+        """Build the record of an analyzed page from its text, tables and key-value pairs."""
+        record = {
+            'content_hash': self.content_hashes[page - 1],
+            'image_hash': self.image_hashes[page],
+            'dpi': self.page_dpi.get(page, self.dpi),
+            **content,
+        }
+        if page in self.routes:
+            record['route'] = self.routes[page]
+        return record
+
+    def report(self, adaptive_dpi=False, feature_routing=False):
+        """Return the run report entries for the rendered pages."""
+        report = {}
+        if self.previous:
+            report['reused_pages'] = sorted(self.reused)
+        if feature_routing:
+            report['routes'] = dict(Counter(self.routes.values()))
+            logger.info(f"Feature routing: {report['routes']}")
+        if adaptive_dpi:
+            report['page_dpi'] = self.page_dpi
+        return report
+
+
+def _sum_stats(page_stats):
+    return {key: sum(stats[key] for stats in page_stats) for key in page_stats[0]}
+
+
+def extract_local_pages(pdf_path, pages, content_hashes):
+    """
+    Extract pages with a usable text layer locally, skipping rasterization and Textract.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (list): Candidate page numbers
+        content_hashes (list): Content hash of every page of the document
+
+    Returns:
+        tuple: (page records of the pages extracted locally, run report entry
+            with the local 'pages' and the 'fallback' reason of the others)
+    """
+    logger.info("Extracting text and tables locally from the PDF's text layer")
+    records = {}
+    fallback = {}
+    for page, result in extract_tables_local(pdf_path, pages).items():
+        if result['confidence'] < LOCAL_TABLES_MIN_CONFIDENCE:
+            fallback[page] = result['reason']
+            continue
+        records[page] = {
+            'content_hash': content_hashes[page - 1],
+            'image_hash': None,
+            'source': 'local',
+            'text': result['text'],
+            'tables': result['tables'],
+            'key_values': [],
+        }
+    logger.info(f"Extracted {len(records)} pages locally, {len(fallback)} fall back to Textract")
+    return records, {'pages': sorted(records), 'fallback': fallback}
+
+
+def process_distributed(pdf_path, content_hashes, dpi, task_queue, result_queue, staging_bucket=None,
+                        timeout=DISTRIBUTED_TIMEOUT_SECONDS):
+    """
+    Process all pages on distributed workers (steps 1-4).
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        content_hashes (list): Content hash of every page of the document
+        dpi (int): DPI for image conversion
+        task_queue (str): Queue URL for page tasks
+        result_queue (str): Queue URL for page results
+        staging_bucket (str): S3 bucket for staging the PDF and large results
+        timeout (float): Seconds to wait for the page results
+
+    Returns:
+        tuple: (document ID, page records of the pages processed without errors)
+    """
+    logger.info("Steps 1-4: Processing pages on distributed workers")
+    coordinator = Coordinator(open_queue(task_queue), open_queue(result_queue))
+    doc_id, page_results = coordinator.process(pdf_path, dpi, staging_bucket, timeout)
+
+    records = {}
+    for result in page_results:
+        if 'error' in result:
+            logger.error(f"Error processing page {result['page']}: {result['error']}")
+            continue
+        records[result['page']] = {
+            'content_hash': content_hashes[result['page'] - 1],
+            'image_hash': None,
+            'dpi': dpi,
+            'text': result['text'],
+            'tables': result['tables'],
+            'key_values': result['key_values'],
+        }
+    return doc_id, records
+
+
+def _images_to_ocr(pdf_path, pages, scratch, images, dpi, adaptive_dpi):
+    """Rasterize pages into scratch storage, yielding the images that need OCR."""
+    for page, path in iter_preprocessed_pages(pdf_path, pages, scratch, dpi, adaptive_dpi, images.page_dpi):
+        if images.add(page, path):
+            yield path
+        else:
+            scratch.release(path)
+
+
+def process_steps(pdf_path, pages, content_hashes, previous=None, dpi=PDF_DPI, adaptive_dpi=False,
+                  region=AWS_REGION, mode='auto', s3_bucket=None, scratch_budget=None, scratch_tmpfs=False,
+                  feature_routing=False, reocr=False):
+    """
+    Process pages one step at a time: rasterize, OCR, correct text, extract tables.
+
+    Step 1 renders the pages into budgeted scratch storage; each image is
+    deleted as soon as Textract has read it. Step 2 runs Textract with the
+    planned strategy, steps 3 and 4 post-process the responses.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (list): Page numbers to process
+        content_hashes (list): Content hash of every page of the document
+        previous (dict): Page manifest of an earlier run, to reuse pages that
+            render identically (optional)
+        dpi (int): DPI for image conversion
+        adaptive_dpi (bool): Choose each page's DPI, up to dpi, from a thumbnail
+        region (str): AWS region
+        mode (str): 'auto', 'sync' or 'async' Textract execution
+        s3_bucket (str): S3 bucket for asynchronous Textract jobs
+        scratch_budget (int): Max bytes of page images on disk at once (None: unlimited)
+        scratch_tmpfs (bool): Keep page images on tmpfs
+        feature_routing (bool): Choose the Textract features of each page from its image
+        reocr (bool): Re-read low-confidence words and cells as high-DPI crops
+
+    Returns:
+        tuple: (page records of the processed pages, run report entries)
+    """
+    logger.info("Step 1: Preprocessing PDF")
+    images = _PageImages(content_hashes, dpi, previous)
+    scratch = ScratchSpace(scratch_budget, scratch_tmpfs)
+    report = {}
+
+    logger.info("Step 2: Processing with AWS Textract")
+    try:
+        textract_client = TextractClient(region_name=region)
+        planner = ExecutionPlanner()
+        if scratch_budget is None:
+            image_paths = list(_images_to_ocr(pdf_path, pages, scratch, images, dpi, adaptive_dpi))
+            logger.info(f"Created {len(image_paths)} preprocessed images")
+            plan = planner.plan(
+                len(image_paths),
+                [os.path.getsize(path) for path in image_paths],
+                async_available=bool(s3_bucket),
+                mode=mode
+            )
+        else:
+            # Async jobs need all their pages at once, which the budget
+            # may not allow, so pages are streamed to synchronous calls
+            image_paths = _images_to_ocr(pdf_path, pages, scratch, images, dpi, adaptive_dpi)
+            plan = planner.plan(len(pages), async_available=False, mode='sync')
+            plan['reason'] += '; scratch budget streams pages to sync calls'
+        logger.info(f"Execution plan: {plan['mode']} ({plan['reason']})")
+
+        textract_start = time.time()
+        responses = execute_plan(plan, textract_client, image_paths, s3_bucket,
+                                 history=planner.history, on_page_done=scratch.release,
+                                 features_for=images.features_for if feature_routing else None)
+        responses = {page: response for page, response in zip(images.ocr_pages, responses)
+                     if response is not None}
+        report['plan'] = plan
+        report['actual_seconds'] = round(time.time() - textract_start, 2)
+        logger.info(f"Textract took {report['actual_seconds']}s (predicted {plan['predicted_seconds']}s)")
+
+        if reocr and responses:
+            # Re-read low-confidence regions and merge them into the page blocks
+            logger.info("Re-reading low-confidence regions as high-DPI crops")
+            sizes = page_sizes(pdf_path)
+            with ThreadPoolExecutor(max_workers=plan['sync_concurrency']) as executor:
+                page_stats = list(executor.map(
+                    lambda page: reocr_page(responses[page], pdf_path, page, sizes[page - 1], textract_client),
+                    sorted(responses)
+                ))
+            report['reocr'] = _sum_stats(page_stats)
+            logger.info(f"Re-read {report['reocr']['regions']} regions, updated {report['reocr']['words']} words "
+                        f"({report['reocr']['crop_pixels'] / max(1, report['reocr']['page_pixels']):.1%} "
+                        f"of full-page pixels)")
+    finally:
+        scratch.cleanup()
+    report['scratch'] = scratch.stats()
+    report.update(images.report(adaptive_dpi, feature_routing))
+
+    # Step 3: Process and correct text with Swedish character fixes
+    logger.info("Step 3: Post-processing text with Swedish character fixes")
+    texts = {}
+    with StageSummary("Step 3", logger) as step:
+        for page, response in responses.items():
+            logger.debug(f"Post-processing page {page}/{len(content_hashes)}")
+            texts[page] = process_textract_response(response)['text']
+            step.add(pages=1, characters=len(texts[page]))
+    report['stages'] = {'postprocess': step.summary()}
+
+    # Step 4: Extract tables and form fields
+    logger.info("Step 4: Extracting tables and form fields")
+    table_extractor = TableExtractor()
+    records = dict(images.reused)
+    with StageSummary("Step 4", logger) as step:
+        for page in sorted(responses):
+            logger.debug(f"Extracting tables from page {page}/{len(content_hashes)}")
+            # One block store serves both extractors
+            store = BlockStore.from_blocks(responses[page]['Blocks'])
+            records[page] = images.record(page, {
+                'text': texts[page],
+                'tables': table_extractor.extract_tables(store),
+                'key_values': extract_key_values(store),
+            })
+            step.add(pages=1, tables=len(records[page]['tables']),
+                     key_value_pairs=len(records[page]['key_values']))
+    report['stages']['tables'] = step.summary()
+    return records, report
+
+
+class _PipelineAnalyzer:
+    """Textract stage of the pipeline: store, hash, route and analyze one rendered page."""
+
+    def __init__(self, pdf_path, images, scratch, textract_client, history, feature_routing=False, reocr=False):
+        self.pdf_path = pdf_path
+        self.images = images
+        self.scratch = scratch
+        self.textract_client = textract_client
+        self.history = history
+        self.feature_routing = feature_routing
+        self.sizes = page_sizes(pdf_path) if reocr else None
+        self.reocr_stats = []
+
+    def __call__(self, rendered):
+        page, render_dpi, image_bytes = rendered
+        self.images.page_dpi[page] = render_dpi
+        path = self.scratch.save_bytes(image_bytes, f"page_{page}.{IMAGE_FORMAT.lower()}")
+        try:
+            if not self.images.add(page, path):
+                return None
+            features = self.images.features_for(path) if self.feature_routing else None
+            start_time = time.time()
+            response = self.textract_client.analyze_document(path, features)
+            self.history.record_sync_page(time.time() - start_time)
+        finally:
+            self.scratch.release(path)
+        if self.sizes is not None:
+            self.reocr_stats.append(
+                reocr_page(response, self.pdf_path, page, self.sizes[page - 1], self.textract_client)
+            )
+        return response
+
+
+def process_pipelined(pdf_path, pages, content_hashes, sink, earlier_records=None, previous=None, dpi=PDF_DPI,
+                      adaptive_dpi=False, region=AWS_REGION, scratch_budget=None, scratch_tmpfs=False,
+                      feature_routing=False, reocr=False):
+    """
+    Process pages in a pipeline of stages, writing each page as it finishes (steps 1-4).
+
+    Pages are rasterized, analyzed with sync Textract calls, post-processed
+    and written to the sink while the following pages are still in flight.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (list): Page numbers to process
+        content_hashes (list): Content hash of every page of the document
+        sink (PageSink): Receives the finished pages in page order
+        earlier_records (dict): Records of pages settled before (reused or
+            extracted locally), written to the sink between the processed ones
+        previous (dict): Page manifest of an earlier run, to reuse pages that
+            render identically (optional)
+        dpi (int): DPI for image conversion
+        adaptive_dpi (bool): Choose each page's DPI, up to dpi, from a thumbnail
+        region (str): AWS region
+        scratch_budget (int): Max bytes of page images on disk at once (None: unlimited)
+        scratch_tmpfs (bool): Keep page images on tmpfs
+        feature_routing (bool): Choose the Textract features of each page from its image
+        reocr (bool): Re-read low-confidence words and cells as high-DPI crops
+
+    Returns:
+        tuple: (page records of the processed pages, run report entries)
+    """
+    logger.info("Steps 1-4: Processing pages in a pipeline")
+    earlier_records = earlier_records or {}
+    images = _PageImages(content_hashes, dpi, previous)
+    scratch = ScratchSpace(scratch_budget, scratch_tmpfs)
+    textract_client = TextractClient(region_name=region)
+    planner = ExecutionPlanner()
+    plan = planner.plan(len(pages), async_available=False, mode='sync')
+    plan['reason'] += '; pipelined pages use sync calls'
+    logger.info(f"Execution plan: {plan['mode']} ({plan['reason']})")
+
+    analyzer = _PipelineAnalyzer(pdf_path, images, scratch, textract_client, planner.history,
+                                 feature_routing, reocr)
+    page_pipeline = Pipeline([
+        Stage('render', partial(render_page_png, pdf_path, dpi=dpi, adaptive=adaptive_dpi),
+              PIPELINE_RENDER_PROCESSES, processes=True),
+        Stage('textract', analyzer, plan['sync_concurrency']),
+        Stage('postprocess', extract_page_content, PIPELINE_POSTPROCESS_PROCESSES, processes=True),
+    ], skip_errors=True)
+
+    records = {}
+    # Earlier pages are written between the pipelined ones
+    earlier = deque(sorted(earlier_records))
+    textract_start = time.time()
+    try:
+        for page, content in zip(pages, page_pipeline.run(pages)):
+            if page in images.reused:
+                records[page] = images.reused[page]
+            elif content is not None:
+                records[page] = images.record(page, content)
+            while earlier and earlier[0] < page:
+                earlier_page = earlier.popleft()
+                sink.write(earlier_page, earlier_records[earlier_page])
+            if page in records:
+                sink.write(page, records[page])
+            logger.info(f"Finished page {page}/{len(content_hashes)}")
+    finally:
+        scratch.cleanup()
+    try:
+        planner.history.save()
+    except OSError as e:
+        logger.warning(f"Could not save latency history: {str(e)}")
+
+    report = {
+        'plan': plan,
+        'actual_seconds': round(time.time() - textract_start, 2),
+        'pipeline': page_pipeline.stats(),
+    }
+    logger.info(f"Pipeline took {report['actual_seconds']}s (Textract predicted {plan['predicted_seconds']}s)")
+    for name, stats in report['pipeline'].items():
+        logger.info(f"Stage {name}: {stats['items']} pages, {stats['busy_seconds']}s busy, "
+                    f"{stats['blocked_seconds']}s blocked by later stages")
+    if analyzer.reocr_stats:
+        report['reocr'] = _sum_stats(analyzer.reocr_stats)
+    report['scratch'] = scratch.stats()
+    report.update(images.report(adaptive_dpi, feature_routing))
+    return records, report
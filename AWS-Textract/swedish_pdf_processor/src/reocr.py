@@ -0,0 +1,323 @@
+"""
+Confidence-driven re-OCR of low-quality regions.
+
+After a page has been analyzed, the bounding boxes of WORD and CELL blocks
+whose Confidence is below a threshold are merged into regions. Each region
+is rendered from the PDF as a high-DPI crop (pdftoppm -x/-y/-W/-H) and
+read again with DetectDocumentText. The new words are merged back into the
+page's block graph:
+
+- an existing WORD keeps its Id and relationships; its Text and Confidence
+  are replaced when the crop reads it with higher confidence
+- LINE texts are rebuilt from their (updated) child words
+- words found in an empty low-confidence cell are added as new WORD
+  blocks and linked to the cell
+
+Only the crops are uploaded at high resolution, instead of whole pages.
+"""
+import os
+import uuid
+import logging
+import subprocess
+import tempfile
+
+import pdfplumber
+
+from config import REOCR_CONFIDENCE_THRESHOLD, REOCR_DPI, REOCR_PADDING, REOCR_MAX_REGIONS
+
+logger = logging.getLogger(__name__)
+
+# Smallest crop side in pixels; smaller images are rejected by Textract
+MIN_CROP_PIXELS = 50
+
+# Minimum overlap (intersection over union) to treat two words as the same
+MIN_WORD_IOU = 0.5
+
+
+def _box(block):
+    box = block['Geometry']['BoundingBox']
+    return box['Left'], box['Top'], box['Width'], box['Height']
+
+
+def _iou(a, b):
+    left = max(a[0], b[0])
+    top = max(a[1], b[1])
+    right = min(a[0] + a[2], b[0] + b[2])
+    bottom = min(a[1] + a[3], b[1] + b[3])
+    if right <= left or bottom <= top:
+        return 0.0
+    intersection = (right - left) * (bottom - top)
+    return intersection / (a[2] * a[3] + b[2] * b[3] - intersection)
+
+
+def _center_inside(box, region):
+    x = box[0] + box[2] / 2
+    y = box[1] + box[3] / 2
+    return region[0] <= x <= region[0] + region[2] and region[1] <= y <= region[1] + region[3]
+
+
+def low_confidence_regions(blocks, threshold=REOCR_CONFIDENCE_THRESHOLD, padding=REOCR_PADDING,
+                           max_regions=REOCR_MAX_REGIONS):
+    """
+    Find the page regions worth re-reading.
+
+    Args:
+        blocks (list): Blocks of one page
+        threshold (float): Confidence (0-100) below which a WORD or CELL is re-read
+        padding (float): Margin added around each box, as a fraction of the page
+        max_regions (int): Keep at most this many regions, lowest confidence first
+
+    Returns:
+        list: Regions as dicts with 'box' (left, top, width, height, normalized)
+            and 'confidence' (lowest confidence inside)
+    """
+    candidates = []
+    for block in blocks:
+        if block['BlockType'] in ('WORD', 'CELL') and block.get('Confidence', 100) < threshold \
+                and 'Geometry' in block:
+            left, top, width, height = _box(block)
+            left = max(0.0, left - padding)
+            top = max(0.0, top - padding)
+            candidates.append({
+                'box': [left, top, min(1.0, left + width + 2 * padding) - left,
+                        min(1.0, top + height + 2 * padding) - top],
+                'confidence': block['Confidence'],
+            })
+
+    # Merge overlapping boxes so that neighbouring words share one crop
+    regions = []
+    for candidate in sorted(candidates, key=lambda c: (c['box'][1], c['box'][0])):
+        for region in regions:
+            if _touching(region['box'], candidate['box']):
+                region['box'] = _union(region['box'], candidate['box'])
+                region['confidence'] = min(region['confidence'], candidate['confidence'])
+                break
+        else:
+            regions.append(candidate)
+
+    regions.sort(key=lambda r: r['confidence'])
+    if len(regions) > max_regions:
+        logger.debug(f"Re-reading the {max_regions} lowest-confidence of {len(regions)} regions")
+    return regions[:max_regions]
+
+
+def _touching(a, b):
+    return (a[0] <= b[0] + b[2] and b[0] <= a[0] + a[2]
+            and a[1] <= b[1] + b[3] and b[1] <= a[1] + a[3])
+
+
+def _union(a, b):
+    left = min(a[0], b[0])
+    top = min(a[1], b[1])
+    return [left, top, max(a[0] + a[2], b[0] + b[2]) - left, max(a[1] + a[3], b[1] + b[3]) - top]
+
+
+def page_sizes(pdf_path):
+    """
+    Read the size of every page of a PDF.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        list: (width, height) in points, one per page in page order
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        return [(page.width, page.height) for page in pdf.pages]
+
+
+def crop_pixels(box, page_size, dpi):
+    """
+    Convert a normalized region to a pixel crop at the given DPI.
+
+    Args:
+        box (list): (left, top, width, height), normalized to the page
+        page_size (tuple): Page (width, height) in points
+        dpi (int): Render resolution
+
+    Returns:
+        tuple: (x, y, width, height) in pixels
+    """
+    page_width = page_size[0] * dpi / 72
+    page_height = page_size[1] * dpi / 72
+    width = max(MIN_CROP_PIXELS, round(box[2] * page_width))
+    height = max(MIN_CROP_PIXELS, round(box[3] * page_height))
+    x = max(0, min(round(box[0] * page_width), round(page_width) - width))
+    y = max(0, min(round(box[1] * page_height), round(page_height) - height))
+    return x, y, width, height
+
+
+def render_crop(pdf_path, page_number, crop, dpi=REOCR_DPI):
+    """
+    Render a rectangle of a PDF page with pdftoppm.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        crop (tuple): (x, y, width, height) in pixels at dpi
+        dpi (int): Render resolution
+
+    Returns:
+        bytes: PNG image
+    """
+    x, y, width, height = crop
+    with tempfile.TemporaryDirectory() as work_dir:
+        prefix = os.path.join(work_dir, 'crop')
+        subprocess.run(
+            ['pdftoppm', '-f', str(page_number), '-l', str(page_number), '-r', str(dpi),
+             '-x', str(x), '-y', str(y), '-W', str(width), '-H', str(height),
+             '-gray', '-png', '-singlefile', str(pdf_path), prefix],
+            check=True, capture_output=True
+        )
+        with open(prefix + '.png', 'rb') as f:
+            return f.read()
+
+
+def merge_crop_words(blocks, crop_box, crop_blocks, cell_boxes=None):
+    """
+    Merge words read from a crop back into the page's blocks, in place.
+
+    Args:
+        blocks (list): Blocks of the page
+        crop_box (list): The crop as (left, top, width, height), normalized to the page
+        crop_blocks (list): Blocks of the crop's DetectDocumentText response
+        cell_boxes (dict): Id -> box of empty low-confidence CELL blocks that
+            unmatched words may be added to (optional)
+
+    Returns:
+        int: Number of words replaced or added
+    """
+    # Map the crop's words to page coordinates
+    new_words = []
+    for block in crop_blocks:
+        if block['BlockType'] != 'WORD':
+            continue
+        left, top, width, height = _box(block)
+        new_words.append({
+            'box': (crop_box[0] + left * crop_box[2], crop_box[1] + top * crop_box[3],
+                    width * crop_box[2], height * crop_box[3]),
+            'text': block['Text'],
+            'confidence': block.get('Confidence', 0),
+            'used': False,
+        })
+    if not new_words:
+        return 0
+
+    changed = 0
+    changed_ids = set()
+    for block in blocks:
+        if block['BlockType'] != 'WORD' or 'Geometry' not in block:
+            continue
+        box = _box(block)
+        if not _center_inside(box, crop_box):
+            continue
+        best = max(new_words, key=lambda word: _iou(box, word['box']))
+        if _iou(box, best['box']) < MIN_WORD_IOU:
+            continue
+        best['used'] = True
+        if best['confidence'] > block.get('Confidence', 0):
+            if best['text'] != block['Text']:
+                changed_ids.add(block['Id'])
+            block['Text'] = best['text']
+            block['Confidence'] = best['confidence']
+            changed += 1
+
+    if changed_ids:
+        _rebuild_line_text(blocks, changed_ids)
+
+    # Words in empty cells that Textract missed on the first pass
+    if cell_boxes:
+        cells = {block['Id']: block for block in blocks if block['Id'] in cell_boxes}
+        for word in new_words:
+            if word['used']:
+                continue
+            for cell_id, cell_box in cell_boxes.items():
+                if _center_inside(word['box'], cell_box):
+                    blocks.append(_word_block(word, cells[cell_id].get('Page')))
+                    _add_child(cells[cell_id], blocks[-1]['Id'])
+                    changed += 1
+                    break
+    return changed
+
+
+def _word_block(word, page):
+    left, top, width, height = word['box']
+    block = {
+        'BlockType': 'WORD',
+        'Id': str(uuid.uuid4()),
+        'Text': word['text'],
+        'TextType': 'PRINTED',
+        'Confidence': word['confidence'],
+        'Geometry': {'BoundingBox': {'Left': left, 'Top': top, 'Width': width, 'Height': height}},
+    }
+    if page is not None:
+        block['Page'] = page
+    return block
+
+
+def _add_child(block, child_id):
+    for relationship in block.setdefault('Relationships', []):
+        if relationship['Type'] == 'CHILD':
+            relationship['Ids'].append(child_id)
+            return
+    block['Relationships'].append({'Type': 'CHILD', 'Ids': [child_id]})
+
+
+def _rebuild_line_text(blocks, changed_ids):
+    words = {block['Id']: block for block in blocks if block['BlockType'] == 'WORD'}
+    for block in blocks:
+        if block['BlockType'] != 'LINE':
+            continue
+        child_ids = [child_id for relationship in block.get('Relationships', [])
+                     if relationship['Type'] == 'CHILD' for child_id in relationship['Ids']]
+        if changed_ids.intersection(child_ids):
+            block['Text'] = ' '.join(words[child_id]['Text'] for child_id in child_ids if child_id in words)
+
+
+def reocr_page(response, pdf_path, page_number, page_size, textract_client,
+               threshold=REOCR_CONFIDENCE_THRESHOLD, dpi=REOCR_DPI, render=render_crop):
+    """
+    Re-read the low-confidence regions of one page and merge the results in place.
+
+    Args:
+        response (dict): The page's Textract response; its Blocks are updated
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number
+        page_size (tuple): Page (width, height) in points
+        textract_client (TextractClient): Textract client
+        threshold (float): Confidence below which WORD and CELL blocks are re-read
+        dpi (int): Resolution of the crops
+        render (callable): render(pdf_path, page_number, crop, dpi) returning PNG bytes
+
+    Returns:
+        dict: Statistics: regions, words (replaced or added), crop_pixels and
+            page_pixels (what the whole page would be at dpi)
+    """
+    blocks = response['Blocks']
+    regions = low_confidence_regions(blocks, threshold)
+    cell_boxes = {}
+    for block in blocks:
+        if block['BlockType'] == 'CELL' and block.get('Confidence', 100) < threshold \
+                and not block.get('Relationships'):
+            cell_boxes[block['Id']] = _box(block)
+
+    stats = {
+        'regions': len(regions),
+        'words': 0,
+        'crop_pixels': 0,
+        'page_pixels': round(page_size[0] * dpi / 72) * round(page_size[1] * dpi / 72),
+    }
+    for region in regions:
+        crop = crop_pixels(region['box'], page_size, dpi)
+        # The rendered crop may be larger than the region (minimum size, page edges)
+        crop_box = [crop[0] / (page_size[0] * dpi / 72), crop[1] / (page_size[1] * dpi / 72),
+                    crop[2] / (page_size[0] * dpi / 72), crop[3] / (page_size[1] * dpi / 72)]
+        try:
+            image_bytes = render(pdf_path, page_number, crop, dpi)
+            crop_response = textract_client.detect_document_text(image_bytes)
+        except Exception as e:
+            logger.warning(f"Re-OCR of a region on page {page_number} failed: {str(e)}")
+            continue
+        stats['crop_pixels'] += crop[2] * crop[3]
+        stats['words'] += merge_crop_words(blocks, crop_box, crop_response['Blocks'], cell_boxes)
+    return stats
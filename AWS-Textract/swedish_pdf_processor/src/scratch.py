@@ -0,0 +1,212 @@
+"""
+Managed scratch storage for rasterized page images.
+
+ScratchSpace keeps page images in a per-run directory, either on tmpfs or
+under TEMP_DIR, and enforces a byte budget. Writers block when the budget
+is full and resume as consumers release pages, so rasterization can never
+run further ahead of OCR than the budget allows. Run directories are
+removed on exit (including SIGTERM), and directories left behind by
+crashed runs are swept when a new ScratchSpace is created.
+"""
+import io
+import os
+import atexit
+import shutil
+import time
+import signal
+import logging
+import threading
+import uuid
+from pathlib import Path
+
+from config import TEMP_DIR, TMPFS_DIR, IMAGE_FORMAT, SCRATCH_BUDGET_BYTES, SCRATCH_USE_TMPFS
+
+logger = logging.getLogger(__name__)
+
+# Prefix of per-run scratch directories; the owning PID follows it
+RUN_DIR_PREFIX = 'scratch_'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_stale(base_dir):
+    """
+    Remove scratch directories whose owning process no longer exists.
+
+    Args:
+        base_dir (str): Directory containing per-run scratch directories
+
+    Returns:
+        int: Number of directories removed
+    """
+    removed = 0
+    base_dir = Path(base_dir)
+    if not base_dir.is_dir():
+        return removed
+    for run_dir in base_dir.glob(f"{RUN_DIR_PREFIX}*"):
+        try:
+            pid = int(run_dir.name[len(RUN_DIR_PREFIX):].split('_')[0])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            shutil.rmtree(run_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale scratch directories from {base_dir}")
+    return removed
+
+
+def install_signal_cleanup():
+    """
+    Turn SIGTERM into a normal interpreter exit so atexit cleanup runs.
+
+    Only call this from the main thread of an application entry point.
+    """
+    def handle_sigterm(signum, frame):
+        raise SystemExit(128 + signum)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+class ScratchSpace:
+    """Budgeted, self-cleaning storage for page images."""
+
+    def __init__(self, budget_bytes=SCRATCH_BUDGET_BYTES, use_tmpfs=SCRATCH_USE_TMPFS, base_dir=None):
+        """
+        Create a scratch directory for this run.
+
+        Args:
+            budget_bytes (int): Maximum bytes of page images held at once (None: unlimited)
+            use_tmpfs (bool): Place the directory on tmpfs (TMPFS_DIR) if available
+            base_dir (str): Parent directory (default: tmpfs or TEMP_DIR)
+        """
+        if base_dir is None:
+            if use_tmpfs and Path(TMPFS_DIR).is_dir():
+                base_dir = Path(TMPFS_DIR) / 'swedish_pdf_processor'
+            else:
+                if use_tmpfs:
+                    logger.warning(f"tmpfs directory {TMPFS_DIR} not found, using {TEMP_DIR}")
+                base_dir = TEMP_DIR
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        sweep_stale(self.base_dir)
+
+        self.dir = self.base_dir / f"{RUN_DIR_PREFIX}{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.dir.mkdir()
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.wait_seconds = 0.0
+        self._sizes = {}
+        self._condition = threading.Condition()
+        atexit.register(self.cleanup)
+
+    def reserve(self, nbytes):
+        """
+        Reserve budget for a new file, blocking while the budget is full.
+
+        A single item larger than the whole budget is admitted once the
+        scratch space is empty, so oversized pages cannot deadlock.
+
+        Args:
+            nbytes (int): Bytes to reserve
+        """
+        with self._condition:
+            start_time = time.time()
+            while (self.budget_bytes is not None and self.used_bytes
+                   and self.used_bytes + nbytes > self.budget_bytes):
+                self._condition.wait()
+            self.wait_seconds += time.time() - start_time
+            self.used_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+    def save_image(self, image, name, image_format=IMAGE_FORMAT):
+        """
+        Encode and store an image within the budget.
+
+        Args:
+            image (PIL.Image): Image to save
+            name (str): File name without extension
+            image_format (str): PIL image format
+
+        Returns:
+            str: Path to the stored image
+        """
+        buffer = io.BytesIO()
+        image.save(buffer, image_format)
+        data = buffer.getvalue()
+        return self.save_bytes(data, f"{name}.{image_format.lower()}")
+
+    def save_bytes(self, data, filename):
+        """
+        Store raw bytes within the budget.
+
+        Args:
+            data (bytes): File content
+            filename (str): File name inside the scratch directory
+
+        Returns:
+            str: Path to the stored file
+        """
+        self.reserve(len(data))
+        path = str(self.dir / filename)
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+        except Exception:
+            with self._condition:
+                self.used_bytes -= len(data)
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self._sizes[path] = len(data)
+        return path
+
+    def release(self, path):
+        """
+        Delete a stored file and return its bytes to the budget.
+
+        Args:
+            path (str): Path returned by save_image or save_bytes
+        """
+        with self._condition:
+            size = self._sizes.pop(str(path), None)
+            if size is None:
+                return
+            self.used_bytes -= size
+            self._condition.notify_all()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self):
+        """Delete the scratch directory and everything in it."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+        with self._condition:
+            self._sizes.clear()
+            self.used_bytes = 0
+            self._condition.notify_all()
+        atexit.unregister(self.cleanup)
+
+    def stats(self):
+        """Return budget usage statistics for run reports."""
+        return {
+            'directory': str(self.dir),
+            'budget_bytes': self.budget_bytes,
+            'peak_bytes': self.peak_bytes,
+            'backpressure_seconds': round(self.wait_seconds, 2),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
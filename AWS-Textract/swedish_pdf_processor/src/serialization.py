@@ -0,0 +1,200 @@
+"""
+Serialization helpers for Textract responses and processed output.
+
+JSON goes through the fastest available backend (orjson, then msgspec, then
+the standard library), so callers never import a JSON library directly.
+Internal caches can use msgpack, which is smaller and faster to decode.
+"""
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+elif msgspec is not None:
+    JSON_BACKEND = 'msgspec'
+else:
+    JSON_BACKEND = 'json'
+
+if msgspec is not None:
+    MSGPACK_BACKEND = 'msgspec'
+elif msgpack is not None:
+    MSGPACK_BACKEND = 'msgpack'
+else:
+    MSGPACK_BACKEND = None
+
+
+def _default(obj):
+    """Serialize types the fast backends do not handle natively."""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(obj, compact=False, backend=None):
+    """
+    Serialize an object to UTF-8 encoded JSON.
+
+    Non-ASCII characters (å, ä, ö) are written as-is, like
+    ``json.dump(..., ensure_ascii=False)``.
+
+    Args:
+        obj: Object to serialize
+        compact (bool): Omit indentation and whitespace
+        backend (str): Force 'orjson', 'msgspec' or 'json' (optional)
+
+    Returns:
+        bytes: JSON document
+    """
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    if backend == 'msgspec':
+        data = msgspec.json.encode(obj, enc_hook=_default)
+        return data if compact else msgspec.json.format(data, indent=2)
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+    return text.encode('utf-8')
+
+
+def loads(data, backend=None):
+    """
+    Deserialize a JSON document.
+
+    Args:
+        data (bytes or str): JSON document
+        backend (str): Force 'orjson', 'msgspec' or 'json' (optional)
+
+    Returns:
+        Deserialized object
+    """
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'msgspec':
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dump(obj, path, compact=False):
+    """
+    Write an object to a JSON file.
+
+    Args:
+        obj: Object to serialize
+        path (str): Output file path
+        compact (bool): Omit indentation and whitespace
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, compact=compact))
+
+
+def load(path):
+    """
+    Read a JSON file.
+
+    Args:
+        path (str): Input file path
+
+    Returns:
+        Deserialized object
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def _require_msgpack():
+    if MSGPACK_BACKEND is None:
+        raise ImportError("msgpack serialization requires 'msgspec' or 'msgpack' to be installed")
+
+
+def packb(obj):
+    """
+    Serialize an object to msgpack for internal caches.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        bytes: msgpack document
+    """
+    _require_msgpack()
+    if MSGPACK_BACKEND == 'msgspec':
+        return msgspec.msgpack.encode(obj, enc_hook=_default)
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def unpackb(data):
+    """
+    Deserialize a msgpack document.
+
+    Args:
+        data (bytes): msgpack document
+
+    Returns:
+        Deserialized object
+    """
+    _require_msgpack()
+    if MSGPACK_BACKEND == 'msgspec':
+        return msgspec.msgpack.decode(data)
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def dump_cache(obj, path):
+    """
+    Write an object to an internal cache file.
+
+    Uses msgpack when available and falls back to compact JSON, so callers
+    must read the file back with ``load_cache``.
+
+    Args:
+        obj: Object to serialize
+        path (str): Output file path
+    """
+    data = packb(obj) if MSGPACK_BACKEND else dumps(obj, compact=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def load_cache(path):
+    """
+    Read a file written by ``dump_cache``.
+
+    Args:
+        path (str): Cache file path
+
+    Returns:
+        Deserialized object
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if MSGPACK_BACKEND:
+        return unpackb(data)
+    return loads(data)
@@ -6,6 +6,8 @@ import pandas as pd
 from collections import defaultdict
 
 from src.postprocess import fix_swedish_characters
+from src.block_store import BlockStore
+from src.layout import assign_to_cells
 
 logger = logging.getLogger(__name__)
 
@@ -15,30 +17,39 @@ class TableExtractor:
     def __init__(self):
         """Initialize the table extractor."""
         self.blocks_map = {}
+        self.stray_words = {}
     
     def extract_tables(self, blocks):
         """
         Extract tables from Textract blocks.
         
         Args:
-            blocks (list): List of Textract blocks
+            blocks (list or BlockStore): Textract blocks, or a BlockStore
+                built from them
             
         Returns:
             list: List of extracted tables
         """
-        logger.info("Extracting tables from Textract blocks")
+        logger.debug("Extracting tables from Textract blocks")
         
-        # Reset blocks map
-        self.blocks_map = {block['Id']: block for block in blocks}
+        # Reset blocks map; a BlockStore is reused as-is rather than
+        # copying every block into another dict
+        if isinstance(blocks, BlockStore):
+            self.blocks_map = blocks
+        else:
+            self.blocks_map = BlockStore.from_blocks(blocks)
+        
+        # Words inside a cell that are not linked to it
+        self.stray_words = assign_to_cells(self.blocks_map.values())
         
         # Find table blocks
-        table_blocks = [block for block in blocks if block['BlockType'] == 'TABLE']
-        logger.info(f"Found {len(table_blocks)} tables")
+        table_blocks = list(self.blocks_map.blocks('TABLE'))
+        logger.debug(f"Found {len(table_blocks)} tables")
         
         # Extract each table
         tables = []
         for i, table_block in enumerate(table_blocks):
-            logger.info(f"Processing table {i+1}")
+            logger.debug(f"Processing table {i+1}")
             table = self._process_table(table_block)
             if table:
                 # Apply Swedish character fixes to each cell
@@ -120,11 +131,8 @@ class TableExtractor:
         Returns:
             str: Cell content
         """
-        if 'Relationships' not in cell:
-            return ''
-        
         content = []
-        for relationship in cell['Relationships']:
+        for relationship in cell.get('Relationships', ()):
             if relationship['Type'] == 'CHILD':
                 for id in relationship['Ids']:
                     if id in self.blocks_map:
@@ -134,6 +142,9 @@ class TableExtractor:
                         elif block['BlockType'] == 'LINE':
                             content.append(block['Text'])
         
+        for word_id in self.stray_words.get(cell['Id'], ()):
+            content.append(self.blocks_map[word_id]['Text'])
+        
         return ' '.join(content)
     
     def tables_to_dataframes(self, tables):
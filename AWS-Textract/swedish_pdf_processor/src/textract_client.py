@@ -1,12 +1,287 @@
 # src/ocr_engine.py
 
+import io
 import boto3
 import time
+import queue
 import logging
+import threading
+
+from PIL import Image
+
+from config import AWS_REGION, TEXTRACT_FEATURES
+from src.block_store import BlockStore
 
 logger = logging.getLogger(__name__)
 client = boto3.client("textract")
 
+# Marks the end of a prefetched result stream
+_END = object()
+
+def iter_paginated(fetch, first_response=None, prefetch=True):
+    """
+    Yield the pages of a paginated Textract result as they arrive.
+
+    With prefetch enabled, the request for the next NextToken page is made
+    on a background thread while the caller handles the current page.
+    At most three result pages are in memory at a time: the one the
+    caller holds, one waiting in the hand-off queue and one being fetched.
+
+    Args:
+        fetch (callable): fetch(next_token) returns one result page;
+            next_token is None for the first page
+        first_response (dict): First page if it was already fetched (optional)
+        prefetch (bool): Fetch the next page in the background
+
+    Yields:
+        dict: Result pages in order
+    """
+    def pages():
+        response = first_response if first_response is not None else fetch(None)
+        yield response
+        while "NextToken" in response:
+            response = fetch(response["NextToken"])
+            yield response
+
+    if not prefetch:
+        yield from pages()
+        return
+
+    buffer = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for response in pages():
+                while not stop.is_set():
+                    try:
+                        buffer.put(response, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            item = _END
+        except Exception as e:
+            item = e
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=producer, name="textract-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+def group_blocks_by_page(responses):
+    """
+    Regroup paginated result pages into per-document-page block lists.
+
+    Textract returns the blocks of a job in page order, but NextToken pages
+    do not line up with document pages. Each document page is yielded as
+    soon as the first block of the next page arrives.
+
+    Args:
+        responses (iterable): Result pages, e.g. from iter_paginated
+
+    Yields:
+        tuple: (page number, list of blocks)
+    """
+    current_page = None
+    blocks = []
+    for response in responses:
+        for block in response["Blocks"]:
+            page = block.get("Page", 1)
+            if page != current_page and blocks:
+                yield current_page, blocks
+                blocks = []
+            current_page = page
+            blocks.append(block)
+    if blocks:
+        yield current_page, blocks
+
+class TextractClient:
+    """Textract client for synchronous, single-page analysis of page images."""
+
+    def __init__(self, region_name=AWS_REGION, cache=None):
+        """
+        Initialize the client.
+
+        Args:
+            region_name (str): AWS region for Textract
+            cache (ResponseCache): Cache for responses of identical page images (optional)
+        """
+        self.region_name = region_name
+        self.cache = cache
+        self.client = boto3.client("textract", region_name=region_name)
+
+    def analyze_document(self, image_path, features=None):
+        """
+        Analyze a single page image with AnalyzeDocument.
+
+        An empty feature list reads the text only, with DetectDocumentText;
+        its response has the same shape without TABLE, CELL and
+        KEY_VALUE_SET blocks.
+
+        Args:
+            image_path (str): Path to the page image
+            features (list): Textract feature types (default: TEXTRACT_FEATURES)
+
+        Returns:
+            dict: Textract response
+        """
+        with open(image_path, "rb") as f:
+            image_bytes = f.read()
+        if features is not None and not features:
+            return self.detect_document_text(image_bytes)
+        features = features or TEXTRACT_FEATURES
+
+        if self.cache is not None:
+            cache_key = self.cache.key(image_bytes, features)
+            response = self.cache.get(cache_key)
+            if response is not None:
+                return response
+
+        response = self.client.analyze_document(
+            Document={"Bytes": image_bytes},
+            FeatureTypes=features,
+        )
+        if self.cache is not None:
+            response.pop("ResponseMetadata", None)
+            self.cache.put(cache_key, response)
+        return response
+
+    def detect_document_text(self, image_bytes):
+        """
+        Read the text of an image with DetectDocumentText.
+        
+        Args:
+            image_bytes (bytes): Encoded image, e.g. a cropped page region
+        
+        Returns:
+            dict: Textract response
+        """
+        if self.cache is not None:
+            cache_key = self.cache.key(image_bytes, ["DETECT_TEXT"])
+            response = self.cache.get(cache_key)
+            if response is not None:
+                return response
+
+        response = self.client.detect_document_text(Document={"Bytes": image_bytes})
+        if self.cache is not None:
+            response.pop("ResponseMetadata", None)
+            self.cache.put(cache_key, response)
+        return response
+
+    def start_document_analysis(self, bucket, key, features=None):
+        """
+        Start an asynchronous AnalyzeDocument job on an S3 object.
+
+        An empty feature list starts a text detection job instead.
+
+        Args:
+            bucket (str): S3 bucket name
+            key (str): S3 object key (PDF or multi-page TIFF)
+            features (list): Textract feature types (default: TEXTRACT_FEATURES)
+
+        Returns:
+            str: Job ID
+        """
+        if features is not None and not features:
+            response = self.client.start_document_text_detection(
+                DocumentLocation={"S3Object": {"Bucket": bucket, "Name": key}},
+            )
+            return response["JobId"]
+        response = self.client.start_document_analysis(
+            DocumentLocation={"S3Object": {"Bucket": bucket, "Name": key}},
+            FeatureTypes=features or TEXTRACT_FEATURES,
+        )
+        return response["JobId"]
+
+    def iter_document_analysis(self, job_id, poll_interval=5, prefetch=True, text_only=False):
+        """
+        Wait for an analysis job and yield its result pages as they arrive.
+
+        Args:
+            job_id (str): Job ID
+            poll_interval (float): Seconds between status checks
+            prefetch (bool): Fetch the next result page in the background
+            text_only (bool): The job is a text detection job
+
+        Yields:
+            dict: Result pages in order
+        """
+        get_results = (self.client.get_document_text_detection if text_only
+                       else self.client.get_document_analysis)
+        while True:
+            response = get_results(JobId=job_id)
+            status = response["JobStatus"]
+            if status == "SUCCEEDED":
+                break
+            if status == "FAILED":
+                raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage')}")
+            logger.debug(f"Textract job {job_id} status: {status}")
+            time.sleep(poll_interval)
+
+        def fetch(next_token):
+            return get_results(JobId=job_id, NextToken=next_token)
+
+        # The first result page is the response that reported SUCCEEDED
+        yield from iter_paginated(fetch, first_response=response, prefetch=prefetch)
+
+    def analyze_pages_async(self, image_paths, bucket, key, features=None, s3_client=None):
+        """
+        Analyze page images with one asynchronous job.
+
+        The pages are packed into a multi-page TIFF, uploaded to S3 and
+        analyzed with StartDocumentAnalysis. The result is split back into
+        one response per page so it can be handled like synchronous output.
+
+        Args:
+            image_paths (list): Page images, in page order
+            bucket (str): S3 bucket for the TIFF
+            key (str): S3 object key for the TIFF
+            features (list): Textract feature types (default: TEXTRACT_FEATURES;
+                an empty list detects text only)
+            s3_client: boto3 S3 client (optional)
+
+        Returns:
+            list: One response dict with a 'Blocks' list per page
+        """
+        images = [Image.open(path) for path in image_paths]
+        try:
+            tiff = io.BytesIO()
+            images[0].save(tiff, format="TIFF", save_all=True, append_images=images[1:],
+                           compression="tiff_deflate")
+        finally:
+            for image in images:
+                image.close()
+
+        s3_client = s3_client or boto3.client("s3", region_name=self.region_name)
+        tiff.seek(0)
+        s3_client.upload_fileobj(tiff, bucket, key)
+        try:
+            job_id = self.start_document_analysis(bucket, key, features)
+            logger.info(f"Started Textract job {job_id} for {len(image_paths)} pages")
+            responses = [{"Blocks": []} for _ in image_paths]
+            text_only = features is not None and not features
+            for page, blocks in group_blocks_by_page(self.iter_document_analysis(job_id, text_only=text_only)):
+                responses[page - 1]["Blocks"].extend(blocks)
+        finally:
+            s3_client.delete_object(Bucket=bucket, Key=key)
+        return responses
+
 def start_text_detection(bucket, document):
     logger.info(f"Starting Textract job on {document}")
     response = client.start_document_text_detection(
@@ -23,27 +298,41 @@ def wait_for_job(job_id):
             return status == "SUCCEEDED"
         time.sleep(5)
 
-def get_job_results(job_id):
-    pages = []
-    response = client.get_document_text_detection(JobId=job_id)
-    pages.append(response)
+def iter_job_results(job_id, prefetch=True):
+    # Yield each NextToken page as it arrives, fetching the next one in the background
+    def fetch(next_token):
+        if next_token is None:
+            return client.get_document_text_detection(JobId=job_id)
+        return client.get_document_text_detection(JobId=job_id, NextToken=next_token)
+
+    return iter_paginated(fetch, prefetch=prefetch)
+
+def iter_job_blocks(job_id, prefetch=True):
+    for response in iter_job_results(job_id, prefetch):
+        yield from response["Blocks"]
 
-    while "NextToken" in response:
-        token = response["NextToken"]
-        response = client.get_document_text_detection(JobId=job_id, NextToken=token)
-        pages.append(response)
+def iter_job_pages(job_id, prefetch=True):
+    # Yield (page number, blocks) per document page
+    return group_blocks_by_page(iter_job_results(job_id, prefetch))
+
+def get_job_results(job_id):
+    return list(iter_job_results(job_id, prefetch=False))
 
-    return pages
+def get_job_results_store(job_id):
+    # Fold each NextToken page into a compact BlockStore as it arrives, so
+    # at most three raw responses are held in memory (see iter_paginated)
+    store = BlockStore()
+    for response in iter_job_results(job_id):
+        store.extend(response["Blocks"])
+    return store
 
 def run_s3_ocr(bucket, key):
     job_id = start_text_detection(bucket, key)
     logger.info(f"Started Textract job with ID: {job_id}")
 
     if wait_for_job(job_id):
-        results = get_job_results(job_id)
-        for page in results:
-            for block in page["Blocks"]:
-                if block["BlockType"] == "LINE":
-                    print(block["Text"])
+        for block in iter_job_blocks(job_id):
+            if block["BlockType"] == "LINE":
+                print(block["Text"])
     else:
         logger.error("Textract job failed.")
@@ -27,24 +27,21 @@ def CheckJobComplete(jobId):
         print("Job status: {}".format(status))
     return status
 
-def JobResults(jobId):
-    pages = []
+def IterJobResults(jobId):
+    ## Yields each result page as soon as it is received, instead of collecting them all
     client = boto3.client('textract')
     response = client.get_document_text_detection(JobId=jobId)
- 
-    pages.append(response)
-    print("Resultset page recieved: {}".format(len(pages)))
-    nextToken = None
-    if('NextToken' in response):
-        nextToken = response['NextToken']
-        while(nextToken):
-            response = client.get_document_text_detection(JobId=jobId, NextToken=nextToken)
-            pages.append(response)
-            print("Resultset page recieved: {}".format(len(pages)))
-            nextToken = None
-            if('NextToken' in response):
-                nextToken = response['NextToken']
-    return pages
+    pageCount = 1
+    print("Resultset page recieved: {}".format(pageCount))
+    yield response
+    while('NextToken' in response):
+        response = client.get_document_text_detection(JobId=jobId, NextToken=response['NextToken'])
+        pageCount += 1
+        print("Resultset page recieved: {}".format(pageCount))
+        yield response
+
+def JobResults(jobId):
+    return list(IterJobResults(jobId))
 
 # S3 Document Data
 s3BucketName = "swedishtestcorpus"
@@ -54,8 +51,7 @@ documentName = "Swedish Corpus.pdf"
 jobId = InvokeTextDetectJob(s3BucketName, documentName)
 print("Started job with id: {}".format(jobId))
 if(CheckJobComplete(jobId)):
-    response = JobResults(jobId)
-    for resultPage in response:
+    for resultPage in IterJobResults(jobId):
         for item in resultPage["Blocks"]:
             if item["BlockType"] == "LINE":
                 print ('\033[94m' + item["Text"] + '\033[0m')
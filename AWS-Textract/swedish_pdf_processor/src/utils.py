@@ -2,33 +2,171 @@
 Utility functions for the Swedish PDF processor.
 """
 import os
+import time
+import queue
+import atexit
 import logging
+import logging.handlers
+import threading
 import json
 import csv
 import boto3
+from collections import Counter
 from pathlib import Path
-import pandas as pd
 from datetime import datetime
 
-from config import OUTPUT_DIR
+from config import OUTPUT_DIR, LOG_FORMAT, LOG_RATE_BURST, LOG_RATE_PER_SECOND
 
 logger = logging.getLogger(__name__)
 
-def setup_logging(log_level=logging.INFO):
+class RateLimitFilter(logging.Filter):
+    """
+    Rate limit log records per call site.
+    
+    Each call site (source file and line) may log a burst of records, and
+    then records at a fixed rate (a token bucket), so a message logged for
+    every page or table cannot flood the log. Warnings, errors and stage
+    summaries (records with a 'summary' attribute, which StageSummary logs
+    from a single line for every stage) always pass. The first record to
+    pass after some were dropped says how many.
+    """
+    
+    def __init__(self, burst=LOG_RATE_BURST, rate=LOG_RATE_PER_SECOND):
+        """
+        Initialize the filter.
+        
+        Args:
+            burst (int): Records a call site may log at once
+            rate (float): Records per second a call site may log after its burst
+        """
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self.suppressed = 0
+        # Call site -> [tokens, time of the last record, records dropped since the last one passed]
+        self._sites = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or hasattr(record, 'summary'):
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [self.burst, record.created, 0]
+            tokens = min(self.burst, site[0] + (record.created - site[1]) * self.rate)
+            site[1] = record.created
+            if tokens < 1:
+                site[0] = tokens
+                site[2] += 1
+                self.suppressed += 1
+                return False
+            site[0] = tokens - 1
+            dropped, site[2] = site[2], 0
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+        return True
+
+class StageSummary:
+    """
+    Count the work of a processing stage and log it as one record.
+    
+    Used as a context manager instead of logging every page, table or
+    cell. The summary record carries the stage name and counts in its
+    'stage' and 'summary' attributes, for handlers that write structured
+    logs.
+    """
+    
+    def __init__(self, name, stage_logger=None):
+        """
+        Initialize the summary.
+        
+        Args:
+            name (str): Stage name
+            stage_logger (logging.Logger): Logger for the summary (default: this module's)
+        """
+        self.name = name
+        self.logger = stage_logger or logger
+        self.counts = Counter()
+        self.seconds = 0.0
+        self._start = None
+    
+    def add(self, **counts):
+        """Add to the stage's counts, e.g. add(pages=1, tables=3)."""
+        self.counts.update(counts)
+    
+    def summary(self):
+        """Return the counts and duration of the stage."""
+        return dict(self.counts, seconds=self.seconds)
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = round(time.perf_counter() - self._start, 2)
+        counts = ', '.join(f"{value} {key.replace('_', ' ')}" for key, value in self.counts.items())
+        self.logger.info(f"{self.name}: {counts or 'nothing to do'} in {self.seconds}s",
+                         extra={'stage': self.name, 'summary': self.summary()})
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that writes directly in forked worker processes."""
+    
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self._pid = os.getpid()
+        self._handlers = handlers
+    
+    def emit(self, record):
+        if os.getpid() == self._pid:
+            super().emit(record)
+            return
+        # The listener thread only runs in the parent process
+        for handler in self._handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+def setup_logging(log_level=logging.INFO, log_file=None, stream=None):
     """
     Set up logging configuration.
     
+    Records are put on a queue and written to the console and the log file
+    by a background thread, so slow terminals and disks do not hold up
+    processing. Forked worker processes, which have no listener thread,
+    write their records directly. Each call site is rate limited (see
+    RateLimitFilter).
+    
     Args:
         log_level: Logging level
+        log_file (str): Log file (default: output/log_<timestamp>.log)
+        stream: Console stream (default: sys.stderr)
+        
+    Returns:
+        logging.handlers.QueueListener: The listener writing the records,
+            stopped (and flushed) at exit; None if logging was already set up
     """
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(OUTPUT_DIR / f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-        ]
-    )
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    if log_file is None:
+        log_file = OUTPUT_DIR / f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(stream), logging.FileHandler(log_file)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue, handlers)
+    queue_handler.addFilter(RateLimitFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(log_level)
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
 def upload_to_s3(file_path, bucket, object_key=None):
     """
@@ -77,6 +215,87 @@ def download_from_s3(bucket, object_key, output_path):
         logger.error(f"Error downloading from S3: {str(e)}")
         raise
 
+class StreamingExcelWriter:
+    """
+    Write tables to an Excel workbook one sheet at a time.
+
+    Rows are streamed straight from the 2D lists using xlsxwriter's
+    constant_memory mode when available, or openpyxl's write-only mode
+    otherwise, so memory use does not grow with the number of tables.
+    The workbook is created lazily on the first table.
+    """
+    
+    def __init__(self, output_path):
+        """
+        Initialize the writer.
+        
+        Args:
+            output_path (str): Output file path (the suffix is set to .xlsx)
+        """
+        self.excel_path = Path(output_path).with_suffix('.xlsx')
+        self.table_count = 0
+        self._workbook = None
+        self._engine = None
+    
+    def _open(self):
+        try:
+            import xlsxwriter
+            self._workbook = xlsxwriter.Workbook(str(self.excel_path), {'constant_memory': True})
+            self._engine = 'xlsxwriter'
+        except ImportError:
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._engine = 'openpyxl'
+        logger.debug(f"Streaming Excel output to {self.excel_path} with {self._engine}")
+    
+    def add_table(self, table):
+        """
+        Append a table as a new sheet named Table_<n>.
+        
+        Args:
+            table (list): 2D table data; the first row is written as the header
+        """
+        if self._workbook is None:
+            self._open()
+        self.table_count += 1
+        sheet_name = f'Table_{self.table_count}'
+        
+        if self._engine == 'xlsxwriter':
+            worksheet = self._workbook.add_worksheet(sheet_name)
+            for r, row in enumerate(table):
+                worksheet.write_row(r, 0, row)
+        else:
+            worksheet = self._workbook.create_sheet(sheet_name)
+            for row in table:
+                worksheet.append(row)
+    
+    def add_tables(self, tables):
+        """Append several tables, one sheet each."""
+        for table in tables:
+            self.add_table(table)
+    
+    def close(self):
+        """
+        Finish the workbook.
+        
+        Returns:
+            Path: Path to the Excel file, or None if no tables were added
+        """
+        if self._workbook is None:
+            return None
+        if self._engine == 'xlsxwriter':
+            self._workbook.close()
+        else:
+            self._workbook.save(self.excel_path)
+        self._workbook = None
+        return self.excel_path
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 def save_tables_to_excel(tables, output_path):
     """
     Save tables to Excel file, one sheet per table.
@@ -89,20 +308,12 @@ def save_tables_to_excel(tables, output_path):
         logger.warning("No tables to save to Excel")
         return
     
-    output_path = Path(output_path)
-    excel_path = output_path.with_suffix('.xlsx')
-    
     try:
-        with pd.ExcelWriter(excel_path) as writer:
-            for i, table in enumerate(tables):
-                df = pd.DataFrame(table)
-                # Use first row as header if table has more than one row
-                if len(table) > 1:
-                    df = pd.DataFrame(table[1:], columns=table[0])
-                df.to_excel(writer, sheet_name=f'Table_{i+1}', index=False)
+        with StreamingExcelWriter(output_path) as writer:
+            writer.add_tables(tables)
         
-        logger.info(f"Saved tables to Excel file: {excel_path}")
-        return excel_path
+        logger.info(f"Saved tables to Excel file: {writer.excel_path}")
+        return writer.excel_path
     except Exception as e:
         logger.error(f"Error saving tables to Excel: {str(e)}")
         raise
@@ -0,0 +1,22 @@
+"""
+Shared test setup.
+"""
+import os
+
+import pytest
+
+# src.textract_client creates its boto3 client at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-north-1')
+
+
+@pytest.fixture(autouse=True, scope='session')
+def lexicon_restorer(tmp_path_factory):
+    """Build the shared diacritic lexicon in a temporary directory, without a word list."""
+    from src import lexicon
+    from src.postprocess import _domain_terms
+
+    restorer = lexicon.get_restorer(_domain_terms(), index_path=tmp_path_factory.mktemp('lexicon') / 'lexicon.idx',
+                                    wordlist_path=None)
+    yield restorer
+    restorer.close()
+    lexicon._restorer = None
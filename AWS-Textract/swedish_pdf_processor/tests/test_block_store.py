@@ -0,0 +1,122 @@
+"""
+Tests for the columnar Textract block store.
+"""
+import pytest
+
+from src.block_store import BlockStore
+
+
+def _blocks():
+    return [
+        {
+            'Id': 'table-1',
+            'BlockType': 'TABLE',
+            'Confidence': 99.12345678901234,
+            'Geometry': {'BoundingBox': {'Width': 0.5, 'Height': 0.25, 'Left': 0.125, 'Top': 0.5}},
+            'Relationships': [{'Type': 'CHILD', 'Ids': ['cell-1', 'cell-2']}],
+            'EntityTypes': ['STRUCTURED_TABLE'],
+        },
+        {
+            'Id': 'cell-1',
+            'BlockType': 'CELL',
+            'Confidence': 87.5,
+            'RowIndex': 1,
+            'ColumnIndex': 1,
+            'Relationships': [{'Type': 'CHILD', 'Ids': ['word-1']}],
+        },
+        {
+            'Id': 'cell-2',
+            'BlockType': 'CELL',
+            'Confidence': 80.0,
+            'RowIndex': 1,
+            'ColumnIndex': 2,
+            'RowSpan': 2,
+            'ColumnSpan': 1,
+        },
+        {
+            'Id': 'word-1',
+            'BlockType': 'WORD',
+            'Confidence': 95.25,
+            'Text': 'Åtgärd',
+            'TextType': 'PRINTED',
+            'Page': 3,
+            'SelectionStatus': 'SELECTED',
+        },
+    ]
+
+
+def test_views_round_trip_blocks():
+    blocks = _blocks()
+    store = BlockStore.from_blocks(blocks)
+
+    assert len(store) == len(blocks)
+    assert list(store) == [block['Id'] for block in blocks]
+    assert dict(store['cell-2']) == blocks[2]
+    assert dict(store['word-1']) == blocks[3]
+    assert store['table-1']['Relationships'] == blocks[0]['Relationships']
+    assert store['table-1']['Geometry'] == blocks[0]['Geometry']
+    assert store['table-1']['EntityTypes'] == ['STRUCTURED_TABLE']
+
+
+def test_cell_without_spans_lists_only_stored_keys():
+    store = BlockStore.from_blocks(_blocks())
+
+    view = store['cell-1']
+    assert set(view) == {'Id', 'BlockType', 'Confidence', 'RowIndex', 'ColumnIndex', 'Relationships'}
+    assert dict(view) == _blocks()[1]
+    assert 'RowSpan' not in view
+    with pytest.raises(KeyError):
+        view['RowSpan']
+    assert store.cell_position(view.row) == (1, 1, 1, 1)
+
+
+def test_confidence_is_exact():
+    store = BlockStore.from_blocks(_blocks())
+
+    assert store['table-1']['Confidence'] == 99.12345678901234
+
+
+def test_bounding_box_is_exact():
+    # None of these values can be represented exactly as a float32
+    bbox = {'Width': 0.1, 'Height': 0.0123456789, 'Left': 0.3333333333333333, 'Top': 0.7}
+    store = BlockStore.from_blocks([{'Id': 'w', 'BlockType': 'WORD', 'Geometry': {'BoundingBox': bbox}}])
+
+    assert store['w']['Geometry'] == {'BoundingBox': bbox}
+    assert store.bbox(store.index('w')) == bbox
+
+
+def test_relationships_to_missing_blocks_are_skipped():
+    store = BlockStore.from_blocks([
+        {'Id': 'line-1', 'BlockType': 'LINE', 'Relationships': [{'Type': 'CHILD', 'Ids': ['word-1', 'gone']}]},
+        {'Id': 'word-1', 'BlockType': 'WORD', 'Text': 'Tak'},
+    ])
+
+    assert [store.block_id(row) for row in store.children(store.index('line-1'))] == ['word-1']
+    assert 'gone' not in store
+    assert store['line-1']['Relationships'] == [{'Type': 'CHILD', 'Ids': ['word-1', 'gone']}]
+
+
+def test_page_defaults_and_duplicates():
+    store = BlockStore.from_responses([
+        {'Blocks': [{'Id': 'a', 'BlockType': 'PAGE'}]},
+        {'Blocks': [{'Id': 'b', 'BlockType': 'PAGE'}]},
+    ])
+
+    assert store['b']['Page'] == 2
+    assert [view['Id'] for view in store.blocks('PAGE')] == ['a', 'b']
+    with pytest.raises(ValueError):
+        store.add_block({'Id': 'a', 'BlockType': 'PAGE'})
+
+
+def test_from_blocks_keeps_the_last_duplicate():
+    blocks = [
+        {'Id': 'a', 'BlockType': 'WORD', 'Text': 'Fönster'},
+        {'Id': 'b', 'BlockType': 'WORD', 'Text': 'Tak'},
+        {'Id': 'a', 'BlockType': 'WORD', 'Text': 'Fasad'},
+    ]
+
+    store = BlockStore.from_blocks(blocks)
+
+    blocks_map = {block['Id']: block for block in blocks}
+    assert list(store) == list(blocks_map)
+    assert {block_id: dict(view) for block_id, view in store.items()} == blocks_map
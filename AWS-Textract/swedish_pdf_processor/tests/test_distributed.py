@@ -0,0 +1,144 @@
+"""
+Tests for the page task queues, the worker loop and the coordinator.
+"""
+import pytest
+
+from src import distributed
+from src.distributed import SQLiteQueue, Coordinator, open_queue, run_worker
+
+
+@pytest.fixture
+def queues(tmp_path):
+    path = tmp_path / 'queue.db'
+    return SQLiteQueue(path, 'tasks', poll_interval=0.01), SQLiteQueue(path, 'results', poll_interval=0.01)
+
+
+class _FakeTextractClient:
+    def __init__(self, region_name=None):
+        pass
+
+
+def _fake_process_page_task(task, textract_client, table_extractor, work_dir):
+    if task['page'] == 2:
+        raise RuntimeError("throttled")
+    return {'text': f"Sida {task['page']}", 'tables': [], 'key_values': []}
+
+
+def test_send_and_receive_in_order(queues):
+    tasks, results = queues
+    tasks.send({'page': 1, 'text': 'Åtgärd'})
+    tasks.send({'page': 2})
+
+    receipt, message = tasks.receive()
+    assert message == {'page': 1, 'text': 'Åtgärd'}
+    tasks.delete(receipt)
+    assert tasks.receive()[1] == {'page': 2}
+    assert tasks.receive() is None
+    # Queues sharing a database file are separate
+    assert results.receive() is None
+
+
+def test_unacknowledged_message_is_redelivered(tmp_path):
+    queue = SQLiteQueue(tmp_path / 'queue.db', visibility_timeout=0.2, poll_interval=0.01)
+    queue.send({'page': 1})
+
+    first_receipt, _ = queue.receive()
+    assert queue.receive() is None
+    received = queue.receive(wait_seconds=2)
+    assert received is not None
+    assert received[1] == {'page': 1}
+    assert received[0] != first_receipt
+
+    # Deleting with the stale receipt does not remove the redelivered message
+    queue.delete(first_receipt)
+    queue.release(received[0])
+    assert queue.receive()[1] == {'page': 1}
+
+
+def test_open_queue(tmp_path):
+    queue = open_queue(f"sqlite://{tmp_path / 'queue.db'}#results")
+    assert isinstance(queue, SQLiteQueue)
+    assert queue.name == 'results'
+    assert open_queue(f"sqlite://{tmp_path / 'queue.db'}").name == 'tasks'
+    with pytest.raises(ValueError):
+        open_queue('amqp://localhost/tasks')
+
+
+def test_worker_and_coordinator_round_trip(queues, monkeypatch):
+    monkeypatch.setattr(distributed, 'TextractClient', _FakeTextractClient)
+    monkeypatch.setattr(distributed, 'process_page_task', _fake_process_page_task)
+    tasks, results = queues
+    coordinator = Coordinator(tasks, results)
+
+    doc_id = coordinator.submit('/data/plan.pdf', 3, 150)
+    assert run_worker(tasks, results, idle_timeout=0, wait_seconds=0) == 3
+    page_results = coordinator.collect(doc_id, 3, timeout=5, wait_seconds=0)
+
+    assert [result['page'] for result in page_results] == [1, 2, 3]
+    assert page_results[0] == {'document_id': doc_id, 'page': 1, 'text': 'Sida 1', 'tables': [], 'key_values': []}
+    assert page_results[1]['error'] == 'throttled'
+    assert tasks.receive() is None
+
+
+def test_malformed_task_gets_an_error_result(queues, monkeypatch):
+    monkeypatch.setattr(distributed, 'TextractClient', _FakeTextractClient)
+    monkeypatch.setattr(distributed, 'process_page_task', _fake_process_page_task)
+    tasks, results = queues
+    tasks.send({'document_id': 'doc'})
+    tasks.send({'document_id': 'doc', 'page': 1})
+
+    assert run_worker(tasks, results, idle_timeout=0, wait_seconds=0) == 2
+
+    assert results.receive()[1] == {'document_id': 'doc', 'page': None, 'error': "'page'"}
+    assert results.receive()[1]['text'] == 'Sida 1'
+    assert tasks.receive() is None
+
+
+def test_collect_leaves_other_documents_and_times_out(queues):
+    tasks, results = queues
+    results.send({'document_id': 'other', 'page': 1})
+    results.send({'document_id': 'mine', 'page': 1, 'text': ''})
+
+    with pytest.raises(TimeoutError):
+        Coordinator(tasks, results).collect('mine', 2, timeout=0.3, wait_seconds=0)
+    assert results.receive()[1] == {'document_id': 'other', 'page': 1}
+
+
+def test_oversized_result_becomes_error(queues, monkeypatch):
+    monkeypatch.setattr(distributed, 'TextractClient', _FakeTextractClient)
+    monkeypatch.setattr(distributed, 'process_page_task',
+                        lambda task, *args: {'text': 'x' * 1000, 'tables': [], 'key_values': []})
+    tasks, results = queues
+    results.max_message_bytes = 500
+    coordinator = Coordinator(tasks, results)
+
+    doc_id = coordinator.submit('/data/plan.pdf', 1, 150)
+    run_worker(tasks, results, idle_timeout=0, wait_seconds=0)
+    page_results = coordinator.collect(doc_id, 1, timeout=5, wait_seconds=0)
+
+    assert 'no staging bucket' in page_results[0]['error']
+    assert 'text' not in page_results[0]
+
+
+def test_unpublishable_result_releases_task(queues, monkeypatch):
+    monkeypatch.setattr(distributed, 'TextractClient', _FakeTextractClient)
+    monkeypatch.setattr(distributed, 'process_page_task', _fake_process_page_task)
+    tasks, results = queues
+
+    def fail(message):
+        raise ConnectionError("queue unavailable")
+
+    receive = tasks.receive
+    received = []
+
+    def receive_once(wait_seconds=0):
+        # The released task is visible again at once; hand it out only once
+        received.append(wait_seconds)
+        return receive(wait_seconds) if len(received) == 1 else None
+
+    monkeypatch.setattr(results, 'send', fail)
+    monkeypatch.setattr(tasks, 'receive', receive_once)
+    Coordinator(tasks, results).submit('/data/plan.pdf', 1, 150)
+
+    assert run_worker(tasks, results, idle_timeout=0, wait_seconds=0) == 0
+    assert receive()[1]['page'] == 1
@@ -0,0 +1,213 @@
+"""
+Tests for the document processing service and its HTTP endpoints.
+"""
+import json
+import threading
+import http.client
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.document_service import DocumentService, make_handler
+from src.metrics import Metrics
+
+RESULT = {'document_id': 'doc', 'content': {'text': 'Underhållsplan'}}
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = DocumentService('eu-north-1', raster_workers=1, max_jobs=1,
+                              cache_dir=tmp_path / 'cache', work_dir=tmp_path / 'work',
+                              max_upload_bytes=1024)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def server(service):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def _post_raw(server, header_lines):
+    """Send a POST /documents with hand-written headers and no body."""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest('POST', '/documents', skip_accept_encoding=True)
+        for name, value in header_lines:
+            connection.putheader(name, value)
+        connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_submit_poll_result(service, server, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def process_document(pdf_path, source_file, doc_id=None):
+        calls.append((pdf_path.read_bytes(), source_file, doc_id))
+        started.set()
+        release.wait(5)
+        return RESULT
+
+    monkeypatch.setattr(service, 'process_document', process_document)
+
+    status, body = _request(server, 'POST', '/documents', b'%PDF-1.4',
+                            {'Content-Type': 'application/pdf', 'X-Filename': 'plan 2024/ä.pdf'})
+    assert status == 202
+    job = json.loads(body)
+    assert job['status'] in ('queued', 'running')
+    assert job['source_file'] == 'plan 2024_ä.pdf'
+    assert 'future' not in job
+
+    assert started.wait(5)
+    status, body = _request(server, 'GET', f"/jobs/{job['job_id']}")
+    assert status == 200
+    assert json.loads(body)['status'] == 'running'
+
+    release.set()
+    service.get_job(job['job_id'])['future'].result(5)
+    status, body = _request(server, 'GET', f"/jobs/{job['job_id']}")
+    polled = json.loads(body)
+    assert polled['status'] == 'succeeded'
+    assert polled['result'] == RESULT
+    assert 'finished_at' in polled
+
+    assert calls == [(b'%PDF-1.4', 'plan 2024_ä.pdf', job['job_id'])]
+    # The upload is deleted once the job has finished
+    assert list(service.work_dir.glob('*.pdf')) == []
+
+
+def test_submit_with_wait(service, server, monkeypatch):
+    monkeypatch.setattr(service, 'process_document', lambda *args: RESULT)
+
+    status, body = _request(server, 'POST', '/documents?wait=true', b'%PDF-1.4')
+
+    assert status == 200
+    assert json.loads(body) == RESULT
+
+
+def test_failed_job(service, server, monkeypatch):
+    def process_document(*args):
+        raise RuntimeError("No pages were successfully processed")
+
+    monkeypatch.setattr(service, 'process_document', process_document)
+
+    status, body = _request(server, 'POST', '/documents?wait=1', b'%PDF-1.4')
+
+    assert status == 500
+    job = json.loads(body)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'No pages were successfully processed'
+    assert service.metrics.value('documents_total', {'status': 'failed'}) == 1
+
+
+def test_unknown_job_and_path(server):
+    assert _request(server, 'GET', '/jobs/missing')[0] == 404
+    assert _request(server, 'GET', '/unknown')[0] == 404
+    assert _request(server, 'POST', '/unknown', b'')[0] == 404
+    status, body = _request(server, 'GET', '/health')
+    assert (status, json.loads(body)) == (200, {'status': 'ok'})
+
+
+@pytest.mark.parametrize('header_lines, status', [
+    ([], 411),
+    ([('Content-Length', 'abc')], 400),
+    ([('Content-Length', '-1')], 400),
+    ([('Content-Length', '1025')], 413),
+])
+def test_content_length_validation(server, service, header_lines, status):
+    response_status, body = _post_raw(server, header_lines)
+
+    assert response_status == status
+    assert 'error' in body
+    assert service.jobs == {}
+
+
+def test_empty_body_and_bad_s3_uri(server, service):
+    status, body = _request(server, 'POST', '/documents', b'')
+    assert status == 400
+    assert json.loads(body) == {'error': 'Empty request body'}
+
+    status, body = _request(server, 'POST', '/documents', json.dumps({'s3_uri': 'http://x/y'}),
+                            {'Content-Type': 'application/json'})
+    assert status == 400
+    assert 'Invalid S3 URI' in json.loads(body)['error']
+    assert service.jobs == {}
+
+
+def test_job_summary_is_a_copy(service):
+    job = {'job_id': 'a', 'status': 'running', 'future': object()}
+
+    summary = service.job_summary(job)
+    service._update_job(job, status='succeeded', result=RESULT)
+
+    assert summary == {'job_id': 'a', 'status': 'running'}
+
+
+def test_cache_hit_and_miss(service, tmp_path):
+    image_path = tmp_path / 'page.png'
+    image_path.write_bytes(b'page image')
+    calls = []
+
+    class FakeTextract:
+        def analyze_document(self, **kwargs):
+            calls.append(kwargs['FeatureTypes'])
+            return {'Blocks': [{'Id': 'p', 'BlockType': 'PAGE'}], 'ResponseMetadata': {}}
+
+    service.textract_client.client = FakeTextract()
+
+    first = service.textract_client.analyze_document(image_path, ['TABLES'])
+    second = service.textract_client.analyze_document(image_path, ['TABLES'])
+    service.textract_client.analyze_document(image_path, ['TABLES', 'FORMS'])
+
+    assert first == second == {'Blocks': [{'Id': 'p', 'BlockType': 'PAGE'}]}
+    assert calls == [['TABLES'], ['TABLES', 'FORMS']]
+    assert (service.cache.hits, service.cache.misses) == (1, 2)
+
+    text = service.render_metrics()
+    assert 'swedish_pdf_cache_hits 1\n' in text
+    assert 'swedish_pdf_cache_misses 2\n' in text
+
+
+def test_metrics_render():
+    metrics = Metrics(prefix='test')
+    metrics.describe('documents_total', 'Documents processed, by status')
+    metrics.inc('documents_total', labels={'status': 'succeeded'})
+    metrics.inc('documents_total', 2, labels={'status': 'succeeded'})
+    metrics.inc('documents_total', labels={'status': 'failed'})
+    metrics.add('jobs_in_progress', 2)
+    metrics.add('jobs_in_progress', -1)
+    metrics.observe('document_seconds', 1.5)
+    metrics.observe('document_seconds', 0.5)
+
+    assert metrics.render() == (
+        '# HELP test_documents_total Documents processed, by status\n'
+        '# TYPE test_documents_total counter\n'
+        'test_documents_total{status="failed"} 1\n'
+        'test_documents_total{status="succeeded"} 3\n'
+        '# TYPE test_jobs_in_progress gauge\n'
+        'test_jobs_in_progress 1\n'
+        '# TYPE test_document_seconds summary\n'
+        'test_document_seconds_sum 2.0\n'
+        'test_document_seconds_count 2\n'
+    )
+    assert metrics.value('jobs_in_progress') == 1
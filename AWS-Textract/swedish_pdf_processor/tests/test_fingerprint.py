@@ -0,0 +1,73 @@
+"""
+Tests for page fingerprints and page manifests.
+"""
+from pathlib import Path
+
+from src.fingerprint import (page_content_hashes, file_hash, resolve_manifest_path, save_page_manifest,
+                             load_page_manifest, match_previous_pages)
+
+SAMPLE_PDF = Path(__file__).parent / 'sample_data' / 'Swedish Corpus.pdf'
+
+
+def _record(content_hash, image_hash=None, text=''):
+    return {'content_hash': content_hash, 'image_hash': image_hash, 'text': text, 'tables': [], 'key_values': []}
+
+
+PREVIOUS = {
+    'document_id': 'doc-1',
+    'source_file': 'plan.pdf',
+    'pages': [
+        dict(_record('a', 'img-a', 'Sida 1'), page=1),
+        dict(_record('b', 'img-b', 'Sida 2'), page=2),
+        dict(_record('c', None, 'Sida 3'), page=3),
+    ],
+}
+
+
+def test_pages_are_matched_by_content_not_position():
+    # A page was inserted at the front and page 2 changed
+    matched = match_previous_pages({1: 'new', 2: 'a', 3: 'b2', 4: 'c'}, PREVIOUS)
+
+    assert sorted(matched) == [2, 4]
+    assert matched[2] == _record('a', 'img-a', 'Sida 1')
+    assert 'page' not in matched[4]
+
+
+def test_pages_are_matched_by_image_hash():
+    matched = match_previous_pages({1: 'img-b', 2: None}, PREVIOUS, key='image_hash')
+
+    # Records without an image hash (e.g. extracted locally) never match
+    assert list(matched) == [1]
+    assert matched[1]['text'] == 'Sida 2'
+
+
+def test_manifest_round_trip(tmp_path):
+    output_base = tmp_path / 'plan_20250407_123456'
+    records = {2: _record('b', 'img-b', 'Åtgärd'), 1: _record('a')}
+
+    path = save_page_manifest(output_base, 'doc-1', 'plan.pdf', records)
+    manifest = load_page_manifest(output_base.with_suffix('.json'))
+
+    assert path == tmp_path / 'plan_20250407_123456_pages.json'
+    assert manifest['document_id'] == 'doc-1'
+    assert [record['page'] for record in manifest['pages']] == [1, 2]
+    assert match_previous_pages({5: 'b'}, manifest) == {5: records[2]}
+
+
+def test_manifest_is_found_from_any_output_file():
+    expected = Path('out/plan_20250407_123456_pages.json')
+
+    for name in ('plan_20250407_123456.json', 'plan_20250407_123456.txt', 'plan_20250407_123456.xlsx',
+                 'plan_20250407_123456_maintenance.json', 'plan_20250407_123456_report.json',
+                 'plan_20250407_123456_pages.json', 'plan_20250407_123456'):
+        assert resolve_manifest_path(Path('out') / name) == expected
+
+
+def test_hashes_are_stable():
+    hashes = page_content_hashes(SAMPLE_PDF)
+
+    assert len(hashes) == 1
+    assert len(hashes[0]) == 64
+    assert page_content_hashes(SAMPLE_PDF) == hashes
+    assert file_hash(SAMPLE_PDF) == file_hash(SAMPLE_PDF)
+    assert file_hash(SAMPLE_PDF) != hashes[0]
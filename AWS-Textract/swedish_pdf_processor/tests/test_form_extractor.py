@@ -0,0 +1,91 @@
+"""
+Tests for FORMS key-value extraction.
+"""
+from src.block_store import BlockStore
+from src.form_extractor import extract_key_values, document_key_values
+
+
+def _word(block_id, text):
+    return {'BlockType': 'WORD', 'Id': block_id, 'Text': text, 'Confidence': 99.0}
+
+
+def _key_value(key_id, key_words, value_words, confidence=91.26, page=None):
+    key = {
+        'BlockType': 'KEY_VALUE_SET',
+        'Id': key_id,
+        'EntityTypes': ['KEY'],
+        'Confidence': confidence,
+        'Relationships': [{'Type': 'VALUE', 'Ids': [f"{key_id}-value"]},
+                          {'Type': 'CHILD', 'Ids': [word['Id'] for word in key_words]}],
+    }
+    value = {
+        'BlockType': 'KEY_VALUE_SET',
+        'Id': f"{key_id}-value",
+        'EntityTypes': ['VALUE'],
+        'Confidence': confidence,
+        'Relationships': [{'Type': 'CHILD', 'Ids': [word['Id'] for word in value_words]}],
+    }
+    if page is not None:
+        key['Page'] = value['Page'] = page
+    return [key, value] + key_words + value_words
+
+
+def _form_blocks():
+    return (
+        _key_value('k1', [_word('k1w1', 'Org.nr:')], [_word('k1v1', '769600'), _word('k1v2', '1234')], page=1)
+        + _key_value('k2', [_word('k2w1', 'Planperiod')], [_word('k2v1', '2024 – 2033')], page=1)
+        + _key_value('k3', [_word('k3w1', 'Hiss')],
+                     [{'BlockType': 'SELECTION_ELEMENT', 'Id': 'k3s', 'SelectionStatus': 'SELECTED'}], page=1)
+        + _key_value('k4', [_word('k4w1', 'Kontakt')], [], page=2)
+    )
+
+
+def test_extract_key_values():
+    pairs = extract_key_values(_form_blocks())
+
+    assert pairs == [
+        {'key': 'Org.nr:', 'value': '769600 1234', 'confidence': 91.3, 'page': 1},
+        {'key': 'Planperiod', 'value': '2024 – 2033', 'confidence': 91.3, 'page': 1},
+        {'key': 'Hiss', 'value': '[X]', 'confidence': 91.3, 'page': 1},
+        {'key': 'Kontakt', 'value': '', 'confidence': 91.3, 'page': 2},
+    ]
+
+
+def test_extract_key_values_from_block_store():
+    blocks = _form_blocks()
+
+    assert extract_key_values(BlockStore.from_blocks(blocks)) == extract_key_values(blocks)
+
+
+def test_digraph_spellings_are_fixed():
+    blocks = _key_value('k1', [_word('k1w1', 'Aatgaerd')], [_word('k1v1', 'Byte'), _word('k1v2', 'foenster')])
+
+    assert extract_key_values(blocks)[0]['key'] == 'Åtgärd'
+    assert extract_key_values(blocks)[0]['value'] == 'Byte fönster'
+
+
+def test_key_without_value_block_or_words():
+    blocks = _key_value('k1', [], [_word('k1v1', 'x')]) + _key_value('k2', [_word('k2w1', 'Datum')], [])
+    blocks = [block for block in blocks if block['Id'] != 'k2-value']
+
+    assert extract_key_values(blocks) == [{'key': 'Datum', 'value': '', 'confidence': 91.3, 'page': None}]
+
+
+def test_document_key_values():
+    pairs = [
+        {'key': 'Org. nr:', 'value': '769600 1234'},
+        {'key': 'Planperiod', 'value': '2024 – 2033'},
+        {'key': 'Byggår', 'value': ''},
+        {'key': 'Byggnadsår:', 'value': '1972'},
+        {'key': 'Organisationsnummer', 'value': '556000-0000'},
+        {'key': 'Hiss', 'value': '[X]'},
+        {'key': 'Hiss', 'value': '[ ]'},
+    ]
+
+    assert document_key_values(pairs) == {
+        'organization_number': '769600-1234',
+        'plan_period': '2024-2033',
+        'construction_year': '1972',
+        'other': {'Hiss': '[X]'},
+    }
+    assert document_key_values([]) == {'other': {}}
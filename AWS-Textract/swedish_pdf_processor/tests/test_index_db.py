@@ -0,0 +1,79 @@
+"""
+Tests for the SQLite document index.
+"""
+import pytest
+
+from src.index_db import DocumentIndex, maintenance_rows
+
+RESULT = {'document_id': 'doc-1', 'source_file': 'plan.pdf', 'timestamp': '20250407_123456', 'page_count': 2}
+MAINTENANCE = {
+    'total_cost': 525000,
+    'yearly_maintenance': {
+        '2025': [{'category': 'Tak', 'action': 'Byte av takpapp', 'cost': 300000}],
+        '2027': [{'category': 'Övrigt', 'action': 'Översyn av fönster', 'cost': 150000},
+                 {'category': 'tak', 'action': 'Rensning av hängrännor', 'cost': 75000}],
+        'okänt': [{'category': 'Tak', 'action': 'Ignored', 'cost': 1}],
+    },
+}
+PAGES = [
+    {'page': 1, 'text': 'Underhållsplan för Brf Exempel. Nästa år byts taket.', 'tables': []},
+    {'page': 2, 'text': 'Fönster ar målade 2019.', 'tables': [[['År', 'Kostnad'], ['2025', '300 000']]]},
+]
+
+
+@pytest.fixture
+def index():
+    with DocumentIndex(':memory:') as index:
+        index.upsert_document(RESULT, MAINTENANCE, PAGES)
+        yield index
+
+
+def test_maintenance_rows_skip_unknown_years():
+    assert sorted(row[0] for row in maintenance_rows(MAINTENANCE)) == [2025, 2027, 2027]
+    assert maintenance_rows(None) == []
+
+
+def test_category_matches_ignore_case_beyond_ascii(index):
+    assert [item['action'] for item in index.find_maintenance(category='TAK')] == [
+        'Byte av takpapp', 'Rensning av hängrännor'
+    ]
+    assert [item['category'] for item in index.find_maintenance(category='övrigt')] == ['Övrigt']
+    assert index.summary_by_year(category='ÖVRIGT') == [{'year': 2027, 'items': 1, 'total_cost': 150000}]
+
+
+def test_find_maintenance_filters(index):
+    assert len(index.find_maintenance(year=2025, year_to=2027)) == 3
+    items = index.find_maintenance(year=2027, min_cost=100000)
+    assert [(item['category'], item['source_file']) for item in items] == [('Övrigt', 'plan.pdf')]
+    assert index.find_maintenance(max_cost=80000)[0]['cost'] == 75000
+    assert index.find_maintenance(action='fönster')[0]['year'] == 2027
+    assert len(index.find_maintenance(limit=1)) == 1
+
+
+def test_text_search_keeps_diacritics(index):
+    assert [hit['page'] for hit in index.search_text('år')] == [1]
+    assert [hit['page'] for hit in index.search_text('ar')] == [2]
+    assert '[fönster]' in index.search_text('fönster')[0]['snippet'].lower()
+
+
+def test_upsert_replaces_and_delete_removes(index):
+    index.upsert_document(dict(RESULT, page_count=1), None, PAGES[:1])
+
+    assert index.documents()[0]['page_count'] == 1
+    assert index.find_maintenance() == []
+    assert index.search_text('fönster') == []
+    index.delete_document('doc-1')
+    assert index.documents() == []
+    assert index.search_text('taket') == []
+    assert index.conn.execute("SELECT COUNT(*) FROM tables").fetchone()[0] == 0
+
+
+def test_reopened_database_keeps_documents(tmp_path):
+    path = tmp_path / 'index.db'
+    with DocumentIndex(path) as index:
+        index.upsert_document(RESULT, None, [{'page': 1, 'text': 'Nästa år', 'tables': []}])
+
+    with DocumentIndex(path) as index:
+        assert [document['document_id'] for document in index.documents()] == ['doc-1']
+        assert index.search_text('ar') == []
+        assert index.search_text('år')[0]['page'] == 1
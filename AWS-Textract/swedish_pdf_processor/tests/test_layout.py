@@ -0,0 +1,131 @@
+"""
+Tests for layout-aware reading order and cell assignment.
+"""
+from src.block_store import BlockStore
+from src.layout import reading_order, assign_to_cells, detect_columns, GridIndex
+from src.postprocess import extract_text_from_blocks
+
+
+def _block(block_type, block_id, box, text=None, page=None, **fields):
+    block = {
+        'BlockType': block_type,
+        'Id': block_id,
+        'Geometry': {'BoundingBox': dict(zip(('Left', 'Top', 'Width', 'Height'), box))},
+        **fields,
+    }
+    if text is not None:
+        block['Text'] = text
+    if page is not None:
+        block['Page'] = page
+    return block
+
+
+def _line(text, left, top, width, page=None):
+    return _block('LINE', text, (left, top, width, 0.015), text, page)
+
+
+def _texts(blocks):
+    return [block['Text'] for block in blocks]
+
+
+def _two_column_page():
+    left = [_line(f"vänster {i}", 0.05, 0.1 + 0.03 * i, 0.4) for i in range(10)]
+    # The right column's lines sit between those of the left column
+    right = [_line(f"höger {i}", 0.55, 0.115 + 0.03 * i, 0.4) for i in range(10)]
+    heading = _line('Underhållsplan', 0.05, 0.05, 0.9)
+    footer = _line('Sida 1', 0.05, 0.95, 0.9)
+    # Textract interleaves the columns
+    return [heading] + [line for pair in zip(left, right) for line in pair] + [footer]
+
+
+def test_text_columns_are_read_one_after_the_other():
+    ordered = _texts(reading_order(_two_column_page()))
+
+    assert ordered == (['Underhållsplan'] + [f"vänster {i}" for i in range(10)]
+                       + [f"höger {i}" for i in range(10)] + ['Sida 1'])
+
+
+def test_text_output_follows_the_layout_by_default():
+    text = extract_text_from_blocks(_two_column_page())
+
+    assert text.split('\n')[:3] == ['Underhållsplan', 'vänster 0', 'vänster 1']
+    assert extract_text_from_blocks(_two_column_page(), layout=False).split('\n')[1:3] == ['vänster 0', 'höger 0']
+
+
+def test_labels_and_values_are_read_as_rows():
+    blocks = []
+    for i, (label, value) in enumerate([('Namn:', 'Brf Exempel'), ('Org.nr:', '769600-1234'),
+                                        ('Adress:', 'Storgatan 1'), ('Byggår:', '1972')]):
+        blocks.append(_line(value, 0.4, 0.2 + 0.04 * i, 0.2))
+        blocks.append(_line(label, 0.1, 0.2 + 0.04 * i, 0.1))
+
+    assert _texts(reading_order(blocks)) == [
+        'Namn:', 'Brf Exempel', 'Org.nr:', '769600-1234', 'Adress:', 'Storgatan 1', 'Byggår:', '1972'
+    ]
+
+
+def test_table_lines_are_read_by_cell():
+    table = _block('TABLE', 'table', (0.1, 0.5, 0.8, 0.1))
+    cells = [
+        _block('CELL', f"cell-{row}-{col}", (0.1 + 0.4 * (col - 1), 0.5 + 0.05 * (row - 1), 0.4, 0.05),
+               RowIndex=row, ColumnIndex=col)
+        for row in (1, 2) for col in (1, 2)
+    ]
+    lines = [
+        _line('2025', 0.55, 0.56, 0.1),
+        _line('År', 0.55, 0.51, 0.1),
+        _line('Tak', 0.15, 0.56, 0.1),
+        _line('Åtgärd', 0.15, 0.51, 0.1),
+    ]
+    above = _line('Planerade åtgärder', 0.1, 0.4, 0.5)
+
+    ordered = _texts(reading_order(lines + [table, above] + cells))
+
+    assert ordered == ['Planerade åtgärder', 'Åtgärd', 'År', 'Tak', '2025']
+
+
+def test_pages_are_ordered_page_by_page():
+    blocks = [_line('andra', 0.1, 0.1, 0.3, page=2), _line('första', 0.1, 0.5, 0.3, page=1)]
+
+    assert _texts(reading_order(blocks)) == ['första', 'andra']
+
+
+def test_block_store_views():
+    store = BlockStore.from_blocks(_two_column_page())
+
+    assert _texts(reading_order(list(store.blocks()))) == _texts(reading_order(_two_column_page()))
+
+
+def test_detect_columns():
+    boxes = [(0.05, 0.1 * i, 0.4, 0.02) for i in range(5)] + [(0.55, 0.1 * i, 0.4, 0.02) for i in range(5)]
+
+    columns = detect_columns(boxes)
+
+    assert len(columns) == 2
+
+
+def test_stray_words_are_assigned_to_the_smallest_cell():
+    blocks = [
+        _block('CELL', 'cell-1', (0.1, 0.1, 0.4, 0.1), Relationships=[{'Type': 'CHILD', 'Ids': ['linked']}]),
+        _block('CELL', 'cell-2', (0.5, 0.1, 0.4, 0.1)),
+        _block('CELL', 'merged', (0.1, 0.1, 0.8, 0.2)),
+        _block('WORD', 'linked', (0.15, 0.12, 0.1, 0.02), 'Tak'),
+        _block('WORD', 'second', (0.7, 0.12, 0.1, 0.02), 'byte'),
+        _block('WORD', 'first', (0.55, 0.12, 0.1, 0.02), 'Planerat'),
+        _block('WORD', 'below', (0.3, 0.25, 0.1, 0.02), '2025'),
+        _block('WORD', 'outside', (0.3, 0.8, 0.1, 0.02), 'Sida'),
+    ]
+
+    assert assign_to_cells(blocks) == {'cell-2': ['first', 'second'], 'merged': ['below']}
+    assert assign_to_cells(blocks[3:]) == {}
+
+
+def test_grid_index():
+    index = GridIndex()
+    index.insert('page', (0.0, 0.0, 1.0, 1.0))
+    index.insert('cell', (0.1, 0.1, 0.1, 0.1))
+
+    assert index.at(0.15, 0.15) == ['cell', 'page']
+    assert index.at(0.5, 0.5) == ['page']
+    assert sorted(index.overlapping((0.19, 0.19, 0.5, 0.5))) == ['cell', 'page']
+    assert index.overlapping((0.3, 0.3, 0.1, 0.1)) == ['page']
@@ -0,0 +1,120 @@
+"""
+Tests for lexicon-backed diacritic restoration.
+"""
+import os
+
+import pytest
+
+from config import DOMAIN_VOCABULARY_PATH, LEXICON_STOPWORDS_PATH
+from src import lexicon
+from src.lexicon import (DiacriticRestorer, build_index, build_entries, write_index, get_restorer,
+                         FLAG_PLAIN_WORD, FLAG_AMBIGUOUS)
+
+WORDLIST = """\
+# word count
+år 5000
+är 20000
+åtgärd 300
+nästa 800
+vår 900
+var 4000
+för 30000
+hål 40
+fönster 200
+"""
+
+
+@pytest.fixture
+def restorer_without_wordlist(tmp_path):
+    index_path = tmp_path / 'lexicon.idx'
+    build_index(index_path, domain_path=DOMAIN_VOCABULARY_PATH, stopwords_path=LEXICON_STOPWORDS_PATH)
+    restorer = DiacriticRestorer(index_path)
+    yield restorer
+    restorer.close()
+
+
+@pytest.fixture
+def restorer(tmp_path):
+    wordlist_path = tmp_path / 'wordlist.txt'
+    wordlist_path.write_text(WORDLIST, encoding='utf-8')
+    index_path = tmp_path / 'lexicon.idx'
+    build_index(index_path, wordlist_path, DOMAIN_VOCABULARY_PATH, stopwords_path=LEXICON_STOPWORDS_PATH)
+    restorer = DiacriticRestorer(index_path)
+    yield restorer
+    restorer.close()
+
+
+def test_digraphs_are_restored_without_a_wordlist(restorer_without_wordlist):
+    assert restorer_without_wordlist.restore_text('Byte av foenster, FOENSTER') == 'Byte av fönster, FÖNSTER'
+    assert restorer_without_wordlist.restore_text('Underhaallsplan') == 'Underhållsplan'
+
+
+@pytest.mark.parametrize('text', ['Var host plat', 'Ett ar', 'atgard', 'for 2025'])
+def test_plain_words_are_kept_without_a_wordlist(restorer_without_wordlist, text):
+    assert restorer_without_wordlist.restore_text(text) == text
+
+
+def test_stripped_forms_are_restored_with_a_wordlist(restorer):
+    assert restorer.restore_text('Nasta atgard: byte av fonster') == 'Nästa åtgärd: byte av fönster'
+    assert restorer.restore_text('ATGARD 2027') == 'ÅTGÄRD 2027'
+
+
+@pytest.mark.parametrize('text', [
+    'ar',  # "år" or "är"
+    'var',  # a word itself, and in the stop list
+    'hal',  # in the stop list
+    'for',  # "för", but also a word in the stop list
+    'fönster',  # already has diacritics
+])
+def test_tokens_that_are_not_restored(restorer, text):
+    assert restorer.restore_text(text) == text
+
+
+def test_entry_flags():
+    entries = build_entries({'år': 5000, 'är': 20000, 'åtgärd': 300, 'var': 10, 'vår': 900}, plain_words=['hal'])
+
+    assert entries['ar'] == ('är', FLAG_AMBIGUOUS)
+    assert entries['atgard'] == ('åtgärd', 0)
+    assert entries['aatgaerd'] == ('åtgärd', 0)
+    assert entries['var'] == ('vår', FLAG_PLAIN_WORD)
+    assert entries['hal'] == ('hal', FLAG_PLAIN_WORD)
+    assert 'atgard' not in build_entries({'åtgärd': 1}, stripped=False)
+
+
+def test_index_lookup(tmp_path):
+    entries = {f"ord{i}": (f"örd{i}", i % 4) for i in range(5000)}
+    write_index(entries, tmp_path / 'lexicon.idx', b'fingerprint')
+    restorer = DiacriticRestorer(tmp_path / 'lexicon.idx')
+    try:
+        assert restorer.entry_count == 5000
+        assert restorer.fingerprint == b'fingerprint'
+        assert all(restorer.lookup(key) == value for key, value in entries.items())
+        assert restorer.lookup('saknas') is None
+    finally:
+        restorer.close()
+
+
+def test_invalid_index_is_rejected(tmp_path):
+    path = tmp_path / 'lexicon.idx'
+    path.write_bytes(b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        DiacriticRestorer(path)
+
+
+def test_index_is_rebuilt_when_sources_change(tmp_path, monkeypatch):
+    domain_path = tmp_path / 'domain.txt'
+    domain_path.write_text('fönster\n', encoding='utf-8')
+    index_path = tmp_path / 'lexicon.idx'
+    options = dict(index_path=index_path, wordlist_path=None, domain_path=domain_path, stopwords_path=None)
+
+    monkeypatch.setattr(lexicon, '_restorer', None)
+    assert get_restorer(**options).restore_text('foenster doerr') == 'fönster doerr'
+    get_restorer(**options).close()
+
+    domain_path.write_text('fönster\ndörr\n', encoding='utf-8')
+    os.utime(domain_path, ns=(0, 0))
+    monkeypatch.setattr(lexicon, '_restorer', None)
+    restorer = get_restorer(**options)
+    assert restorer.restore_text('foenster doerr') == 'fönster dörr'
+    restorer.close()
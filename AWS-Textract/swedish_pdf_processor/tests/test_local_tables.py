@@ -0,0 +1,101 @@
+"""
+Tests for local table extraction from the PDF text layer.
+"""
+from pathlib import Path
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+import pdfplumber
+
+from src import local_tables
+from src.local_tables import expand_table, extract_page, extract_tables_local, _image_share
+
+SAMPLE_PDF = Path(__file__).parent / 'sample_data' / 'Swedish Corpus.pdf'
+
+_pdfplumber_open = pdfplumber.open
+
+
+def _table(rows):
+    """Fake pdfplumber table from rows of (bbox, text) cells; None marks covered positions."""
+    return SimpleNamespace(
+        rows=[SimpleNamespace(cells=[cell and cell[0] for cell in row]) for row in rows],
+        extract=lambda: [[cell and cell[1] for cell in row] for row in rows],
+    )
+
+
+def test_merged_cells_are_repeated():
+    table = _table([
+        [((0, 0, 200, 10), 'Åtgärd'), None, ((200, 0, 300, 10), 'År')],
+        [((0, 10, 100, 20), 'Tak'), ((100, 10, 200, 20), 'Byte av\ntakpapp'), ((200, 10, 300, 30), '2025')],
+        [((0, 20, 100, 30), 'Fasad'), ((100, 20, 200, 30), None), None],
+    ])
+
+    assert expand_table(table) == [
+        ['Åtgärd', 'Åtgärd', 'År'],
+        ['Tak', 'Byte av takpapp', '2025'],
+        ['Fasad', '', '2025'],
+    ]
+
+
+def test_nearly_aligned_edges_snap_to_one_grid_line():
+    table = _table([
+        [((0, 0, 100, 10), 'a'), ((100.3, 0, 200, 10), 'b')],
+        [((0.2, 10.4, 100, 20), 'c'), ((100, 10, 200, 20), 'd')],
+    ])
+
+    assert expand_table(table) == [['a', 'b'], ['c', 'd']]
+    assert expand_table(_table([[None]])) == []
+
+
+def _page(images, bbox=(0, 0, 600, 800)):
+    return SimpleNamespace(bbox=bbox, images=[dict(zip(('x0', 'top', 'x1', 'bottom'), box)) for box in images])
+
+
+def test_image_share():
+    assert _image_share(_page([])) == 0.0
+    assert _image_share(_page([(0, 0, 600, 80)])) == pytest.approx(0.1)
+    # Parts outside the page do not count, and the share is capped at 1
+    assert _image_share(_page([(-100, -100, 300, 400)])) == pytest.approx(0.25)
+    assert _image_share(_page([(0, 0, 600, 800), (0, 0, 600, 800)])) == 1.0
+
+
+def test_page_without_text_layer():
+    page = SimpleNamespace(chars=[])
+
+    assert extract_page(page) == {'text': '', 'tables': [], 'confidence': 0.0, 'reason': 'no text layer'}
+
+
+def test_born_digital_page():
+    results = extract_tables_local(SAMPLE_PDF, [1], max_workers=1)
+
+    assert list(results) == [1]
+    assert results[1]['confidence'] == 1.0
+    assert results[1]['reason'] == ''
+    assert results[1]['text'].startswith('Teknikens framväxt')
+
+
+class _PageWithoutClose:
+    """pdfplumber page as in releases before 0.10, which had no Page.close."""
+
+    def __init__(self, page):
+        self._page = page
+
+    def __getattr__(self, name):
+        if name == 'close':
+            raise AttributeError(name)
+        return getattr(self._page, name)
+
+
+@contextmanager
+def _open_without_page_close(pdf_path):
+    with _pdfplumber_open(pdf_path) as pdf:
+        yield SimpleNamespace(pages=[_PageWithoutClose(page) for page in pdf.pages])
+
+
+def test_pdfplumber_without_page_close(monkeypatch):
+    monkeypatch.setattr(local_tables.pdfplumber, 'open', _open_without_page_close)
+
+    results = extract_tables_local(SAMPLE_PDF, [1], max_workers=1)
+
+    assert results[1]['text'].startswith('Teknikens framväxt')
@@ -0,0 +1,122 @@
+"""
+Tests for per-page Textract feature routing.
+"""
+import pytest
+from PIL import Image, ImageDraw
+
+from src.page_classifier import choose_route, layout_metrics, route_features
+
+
+def _metrics(**overrides):
+    metrics = {'horizontal_rules': 0, 'vertical_rules': 0, 'aligned_columns': 0, 'column_fill': None,
+               'key_value_rows': 0}
+    metrics.update(overrides)
+    return metrics
+
+
+@pytest.mark.parametrize('metrics, route', [
+    (_metrics(), 'text'),
+    (_metrics(horizontal_rules=2), 'text'),
+    (_metrics(horizontal_rules=3), 'tables'),
+    (_metrics(horizontal_rules=2, vertical_rules=2), 'tables'),
+    # Unruled table: aligned columns with space between them
+    (_metrics(aligned_columns=3, column_fill=0.3), 'tables'),
+    # Two columns of prose
+    (_metrics(aligned_columns=2, column_fill=0.9), 'text'),
+    (_metrics(key_value_rows=3), 'tables_forms'),
+    (_metrics(horizontal_rules=5, key_value_rows=4), 'tables_forms'),
+])
+def test_choose_route(metrics, route):
+    assert choose_route(metrics) == route
+
+
+def _page():
+    image = Image.new('L', (1200, 1600), 255)
+    return image, ImageDraw.Draw(image)
+
+
+def _words(draw, left, top, right):
+    """Draw a text line as word-sized blocks of ink."""
+    x = left
+    for i in range(1000):
+        word_width = 30 + 20 * (i % 4)
+        draw.rectangle([x, top, min(x + word_width, right), top + 16], fill=0)
+        x += word_width + 14
+        if x >= right:
+            return
+
+
+def _prose(draw, top, lines, left=100, right=1100):
+    for i in range(lines):
+        _words(draw, left, top + 40 * i, right)
+
+
+def test_prose_page():
+    image, draw = _page()
+    _prose(draw, 100, 30)
+
+    metrics = layout_metrics(image)
+
+    assert metrics['horizontal_rules'] == 0
+    assert metrics['aligned_columns'] == 0
+    assert choose_route(metrics) == 'text'
+
+
+def test_ruled_table_page():
+    image, draw = _page()
+    _prose(draw, 100, 5)
+    for i in range(6):
+        draw.line([100, 500 + 60 * i, 1100, 500 + 60 * i], fill=0, width=3)
+    for x in (100, 500, 800, 1100):
+        draw.line([x, 500, x, 800], fill=0, width=3)
+
+    metrics = layout_metrics(image)
+
+    assert metrics['horizontal_rules'] == 6
+    assert metrics['vertical_rules'] >= 2
+    assert choose_route(metrics) == 'tables'
+
+
+def test_unruled_table_page():
+    image, draw = _page()
+    for i in range(8):
+        for left, right in ((100, 260), (500, 600), (850, 950)):
+            _words(draw, left, 300 + 40 * i, right)
+
+    metrics = layout_metrics(image)
+
+    assert metrics['horizontal_rules'] == 0
+    assert metrics['aligned_columns'] == 2
+    assert choose_route(metrics) == 'tables'
+
+
+def test_two_column_prose_page():
+    image, draw = _page()
+    _prose(draw, 100, 30, 100, 560)
+    _prose(draw, 100, 30, 640, 1100)
+
+    assert choose_route(layout_metrics(image)) == 'text'
+
+
+def test_key_value_page():
+    image, draw = _page()
+    for i, label_width in enumerate([200, 120, 260, 160]):
+        top = 200 + 50 * i
+        _words(draw, 100, top, 100 + label_width)
+        _words(draw, 500, top, 800)
+
+    metrics = layout_metrics(image)
+
+    assert metrics['key_value_rows'] == 4
+    assert choose_route(metrics) == 'tables_forms'
+
+
+def test_route_features_respects_allowed_features(tmp_path):
+    image, draw = _page()
+    for i in range(6):
+        draw.line([100, 500 + 60 * i, 1100, 500 + 60 * i], fill=0, width=3)
+    path = tmp_path / 'page.png'
+    image.save(path)
+
+    assert route_features(path) == ('tables', ['TABLES'])
+    assert route_features(path, allowed=['FORMS']) == ('tables', [])
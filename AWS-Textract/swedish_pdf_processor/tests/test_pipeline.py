@@ -0,0 +1,117 @@
+"""
+Tests for the pipelined stage executor.
+"""
+import threading
+import time
+
+import pytest
+
+from src.pipeline import Pipeline, Stage
+
+
+def _sleep_inverse(item):
+    # Earlier items take longer, so they finish out of order
+    time.sleep(0.002 * (20 - item % 20))
+    return item * 10
+
+
+def _fail_on_three(item):
+    if item == 3:
+        raise ValueError("page 3 is unreadable")
+    return item
+
+
+def test_results_come_out_in_input_order():
+    pipeline = Pipeline([Stage('slow', _sleep_inverse, workers=4), Stage('add', lambda item: item + 1, workers=2)],
+                        queue_size=2)
+
+    assert list(pipeline.run(range(40))) == [item * 10 + 1 for item in range(40)]
+    stats = pipeline.stats()
+    assert stats['slow']['items'] == stats['add']['items'] == 40
+    assert stats['slow']['workers'] == 4
+
+
+def test_process_stage():
+    pipeline = Pipeline([Stage('negate', abs, workers=2, processes=True)])
+
+    assert list(pipeline.run([-1, -2, 3])) == [1, 2, 3]
+    assert pipeline.stats()['negate']['processes'] is True
+
+
+def test_none_items_pass_through():
+    calls = []
+    pipeline = Pipeline([Stage('record', lambda item: calls.append(item) or item)])
+
+    assert list(pipeline.run([1, None, 2])) == [1, None, 2]
+    assert calls == [1, 2]
+
+
+def test_failed_item_stops_the_pipeline():
+    pipeline = Pipeline([Stage('check', _fail_on_three), Stage('next', lambda item: item)])
+    results = []
+
+    with pytest.raises(ValueError, match='unreadable'):
+        for item in pipeline.run(range(1, 10)):
+            results.append(item)
+    assert results == [1, 2]
+
+
+def test_failed_items_are_skipped():
+    second_stage = []
+    pipeline = Pipeline([Stage('check', _fail_on_three, workers=2),
+                         Stage('next', lambda item: second_stage.append(item) or item)], skip_errors=True)
+
+    assert list(pipeline.run(range(1, 6))) == [1, 2, None, 4, 5]
+    assert sorted(second_stage) == [1, 2, 4, 5]
+
+
+def test_error_of_the_input_is_raised():
+    def items():
+        yield 1
+        raise OSError("PDF truncated")
+
+    with pytest.raises(OSError, match='truncated'):
+        list(Pipeline([Stage('copy', lambda item: item)]).run(items()))
+
+
+def test_slow_consumer_holds_back_the_source():
+    pulled = []
+
+    def items():
+        for item in range(1000):
+            pulled.append(item)
+            yield item
+
+    pipeline = Pipeline([Stage('fast', lambda item: item, workers=2)], queue_size=2)
+    results = pipeline.run(items())
+    assert next(results) == 0
+    time.sleep(0.5)
+
+    # The yielded item, the ones in flight, and one taken from the source
+    # that waits for room
+    assert len(pulled) == 1 + pipeline.max_in_flight + 1
+    results.close()
+
+
+def test_slow_stage_blocks_earlier_stages():
+    pipeline = Pipeline([Stage('fast', lambda item: item), Stage('slow', lambda item: time.sleep(0.02) or item)],
+                        queue_size=1)
+
+    assert list(pipeline.run(range(20))) == list(range(20))
+    stats = pipeline.stats()
+    assert stats['fast']['blocked_seconds'] > stats['slow']['blocked_seconds']
+    assert stats['slow']['busy_seconds'] >= 0.3
+
+
+def test_closing_early_stops_the_workers():
+    before = threading.active_count()
+    results = Pipeline([Stage('copy', lambda item: item, workers=3)]).run(range(1000))
+    assert next(results) == 0
+    results.close()
+
+    assert threading.active_count() == before
+
+
+def test_pipeline_needs_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
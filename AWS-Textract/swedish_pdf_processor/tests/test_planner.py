@@ -0,0 +1,87 @@
+"""
+Tests for the sync vs. async execution planner.
+"""
+import pytest
+
+from config import TEXTRACT_SYNC_MAX_BYTES
+from src.planner import ExecutionPlanner, LatencyHistory, split_page_ranges, DEFAULT_LATENCIES, SMOOTHING
+
+
+@pytest.fixture
+def planner(tmp_path):
+    # Default latencies: 3s per sync call, 20s + 0.5s per page per async job
+    return ExecutionPlanner(LatencyHistory(tmp_path / 'latency.json'), sync_tps=1, async_job_slots=4,
+                            min_pages_per_job=50)
+
+
+def test_small_document_uses_sync(planner):
+    plan = planner.plan(10)
+
+    assert plan['mode'] == 'sync'
+    assert plan['page_ranges'] == [[1, 10]]
+    assert plan['sync_concurrency'] == 3
+    # Four waves of three 3s calls
+    assert plan['candidates'] == {'sync': 12.0, 'async': 25.0}
+    assert plan['predicted_seconds'] == 12.0
+
+
+def test_large_document_is_split_into_parallel_jobs(planner):
+    plan = planner.plan(200)
+
+    assert plan['mode'] == 'async_split'
+    assert plan['page_ranges'] == [[1, 50], [51, 100], [101, 150], [151, 200]]
+    assert plan['predicted_seconds'] == 45.0
+    assert set(plan['candidates']) == {'sync', 'async', 'async_split'}
+
+
+def test_async_needs_a_bucket(planner):
+    plan = planner.plan(200, async_available=False)
+
+    assert plan['mode'] == 'sync'
+    assert 'no S3 bucket' in plan['reason']
+
+
+def test_oversized_pages_rule_out_sync(planner):
+    page_bytes = [1000, TEXTRACT_SYNC_MAX_BYTES + 1, 1000]
+
+    assert planner.plan(3, page_bytes)['mode'] == 'async'
+    plan = planner.plan(3, page_bytes, async_available=False)
+    assert plan['mode'] == 'sync'
+    assert 'falling back to sync' in plan['reason']
+
+
+@pytest.mark.parametrize('mode', ['sync', 'async'])
+def test_forced_mode(planner, mode):
+    plan = planner.plan(200 if mode == 'sync' else 10, mode=mode)
+
+    assert plan['mode'] == mode
+    assert f"forced {mode}" in plan['reason']
+
+
+def test_measurements_change_the_plan(planner):
+    for _ in range(20):
+        planner.history.record_sync_page(30.0)
+
+    assert planner.plan(10)['mode'] == 'async'
+
+
+def test_history_round_trip(tmp_path):
+    history = LatencyHistory(tmp_path / 'latency.json')
+    history.record_sync_page(1.0)
+    history.save()
+
+    expected = (1 - SMOOTHING) * DEFAULT_LATENCIES['sync_page_seconds'] + SMOOTHING * 1.0
+    assert LatencyHistory(tmp_path / 'latency.json').get('sync_page_seconds') == pytest.approx(expected)
+
+
+def test_unreadable_history_uses_defaults(tmp_path):
+    path = tmp_path / 'latency.json'
+    path.write_text('not json')
+
+    assert LatencyHistory(path).latencies == DEFAULT_LATENCIES
+
+
+def test_split_page_ranges():
+    assert split_page_ranges(10, 3) == [[1, 4], [5, 7], [8, 10]]
+    assert split_page_ranges(2, 5) == [[1, 1], [2, 2]]
+    assert split_page_ranges(7, 1) == [[1, 7]]
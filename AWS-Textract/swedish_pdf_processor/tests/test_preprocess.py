@@ -0,0 +1,58 @@
+"""
+Tests for adaptive per-page DPI selection.
+"""
+import pytest
+from PIL import Image, ImageDraw
+
+from src.preprocess import estimate_text_metrics, choose_dpi
+
+
+def _metrics(small_text_pt, ink_rows=0.3):
+    return {'lines': 40, 'small_text_pt': small_text_pt, 'median_text_pt': small_text_pt, 'ink_rows': ink_rows}
+
+
+@pytest.mark.parametrize('small_text_pt, expected', [(12, 150), (9, 200), (8, 250), (6, 300), (4, 300)])
+def test_lowest_dpi_that_renders_small_text_large_enough(small_text_pt, expected):
+    # 24 px lines: 12 pt needs 144 DPI, 8 pt 216 DPI, 6 pt 288 DPI
+    assert choose_dpi(_metrics(small_text_pt)) == expected
+
+
+def test_max_dpi_caps_the_choice():
+    assert choose_dpi(_metrics(6), max_dpi=200) == 200
+    assert choose_dpi(_metrics(6), max_dpi=100) == 100
+
+
+def test_dense_pages_get_one_step_more():
+    assert choose_dpi(_metrics(12, ink_rows=0.9)) == 200
+    assert choose_dpi(_metrics(6, ink_rows=0.9)) == 300
+
+
+def test_pages_without_text_lines():
+    assert choose_dpi(_metrics(None, ink_rows=0.0)) == 150
+    assert choose_dpi(_metrics(None, ink_rows=0.95)) == 300
+
+
+def test_text_metrics_from_row_projection():
+    image = Image.new('L', (200, 400), 255)
+    draw = ImageDraw.Draw(image)
+    for top in (20, 50, 80):
+        draw.rectangle([10, top, 150, top + 9], fill=0)
+    draw.rectangle([10, 110, 150, 115], fill=0)
+    # A one-row rule and a picture taller than a text line are not text
+    draw.line([10, 130, 150, 130], fill=0)
+    draw.rectangle([10, 200, 150, 299], fill=0)
+
+    metrics = estimate_text_metrics(image, 72)
+
+    assert metrics['lines'] == 4
+    assert metrics['small_text_pt'] == 6.0
+    assert metrics['median_text_pt'] == 10.0
+    assert metrics['ink_rows'] == pytest.approx((3 * 10 + 6 + 1 + 100) / 400, abs=0.001)
+    assert choose_dpi(metrics) == 300
+
+
+def test_blank_page():
+    metrics = estimate_text_metrics(Image.new('L', (100, 100), 255), 72)
+
+    assert metrics == {'lines': 0, 'small_text_pt': None, 'median_text_pt': None, 'ink_rows': 0.0}
+    assert choose_dpi(metrics) == 150
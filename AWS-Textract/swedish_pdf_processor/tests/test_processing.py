@@ -0,0 +1,47 @@
+"""
+Tests for the page processing paths.
+"""
+from pathlib import Path
+
+from src.processing import PageSink, extract_local_pages
+from src.fingerprint import page_content_hashes
+
+SAMPLE_PDF = Path(__file__).parent / 'sample_data' / 'Swedish Corpus.pdf'
+
+
+class _FakeExcelWriter:
+    def __init__(self):
+        self.tables = []
+
+    def add_tables(self, tables):
+        self.tables.extend(tables)
+
+
+def _record(page):
+    return {'text': f"Sida {page}", 'tables': [[[f"tabell {page}"]]], 'key_values': []}
+
+
+def test_page_sink_writes_remaining_pages_in_order():
+    sink = PageSink(_FakeExcelWriter())
+    records = {page: _record(page) for page in (4, 1, 3, 2)}
+    sink.write(1, records[1])
+    sink.write(2, records[2])
+
+    sink.write_remaining(records)
+
+    assert [page['page'] for page in sink.pages] == [1, 2, 3, 4]
+    assert sink.tables == [[['tabell 1']], [['tabell 2']], [['tabell 3']], [['tabell 4']]]
+    assert sink.excel_writer.tables == sink.tables
+    assert 'page' not in records[1]
+
+
+def test_extract_local_pages():
+    content_hashes = page_content_hashes(SAMPLE_PDF)
+
+    records, report = extract_local_pages(SAMPLE_PDF, [1], content_hashes)
+
+    assert report == {'pages': [1], 'fallback': {}}
+    assert records[1]['content_hash'] == content_hashes[0]
+    assert records[1]['source'] == 'local'
+    assert records[1]['image_hash'] is None
+    assert records[1]['text'].startswith('Teknikens framväxt')
@@ -0,0 +1,112 @@
+"""
+Tests for confidence-driven re-OCR of low-quality regions.
+"""
+from src.reocr import merge_crop_words, low_confidence_regions, crop_pixels, reocr_page
+
+
+def _block(block_type, block_id, box, confidence=99.0, text=None, children=None):
+    block = {
+        'BlockType': block_type,
+        'Id': block_id,
+        'Confidence': confidence,
+        'Geometry': {'BoundingBox': dict(zip(('Left', 'Top', 'Width', 'Height'), box))},
+    }
+    if text is not None:
+        block['Text'] = text
+    if children:
+        block['Relationships'] = [{'Type': 'CHILD', 'Ids': children}]
+    return block
+
+
+def _page_blocks():
+    return [
+        _block('LINE', 'line-1', (0.1, 0.1, 0.3, 0.02), text='Byte av fonster', children=['w1', 'w2', 'w3']),
+        _block('WORD', 'w1', (0.1, 0.1, 0.08, 0.02), 99.0, 'Byte'),
+        _block('WORD', 'w2', (0.2, 0.1, 0.04, 0.02), 60.0, 'av'),
+        _block('WORD', 'w3', (0.26, 0.1, 0.14, 0.02), 40.0, 'fonster'),
+        _block('CELL', 'cell-1', (0.5, 0.5, 0.2, 0.05), 30.0),
+    ]
+
+
+def _crop_word(text, box, confidence):
+    return _block('WORD', f"crop-{text}", box, confidence, text)
+
+
+CROP = [0.0, 0.0, 0.5, 0.5]
+
+
+def test_better_reading_replaces_word_and_line_text():
+    blocks = _page_blocks()
+    # Crop coordinates are relative to the crop, which is half the page
+    crop_blocks = [
+        _crop_word('fönster', (0.52, 0.2, 0.28, 0.04), 97.0),
+        _crop_word('Byle', (0.2, 0.2, 0.16, 0.04), 80.0),
+    ]
+
+    assert merge_crop_words(blocks, CROP, crop_blocks) == 1
+
+    words = {block['Id']: block for block in blocks}
+    assert (words['w3']['Text'], words['w3']['Confidence']) == ('fönster', 97.0)
+    # A worse reading does not replace a confident word
+    assert words['w1']['Text'] == 'Byte'
+    assert words['w2']['Text'] == 'av'
+    assert words['line-1']['Text'] == 'Byte av fönster'
+
+
+def test_words_in_empty_cells_are_added():
+    blocks = _page_blocks()
+    crop_box = [0.5, 0.5, 0.2, 0.05]
+    crop_blocks = [_crop_word('2025', (0.1, 0.2, 0.3, 0.6), 95.0)]
+
+    assert merge_crop_words(blocks, crop_box, crop_blocks, {'cell-1': (0.5, 0.5, 0.2, 0.05)}) == 1
+
+    cell = next(block for block in blocks if block['Id'] == 'cell-1')
+    added = blocks[-1]
+    assert added['Text'] == '2025'
+    assert cell['Relationships'] == [{'Type': 'CHILD', 'Ids': [added['Id']]}]
+    assert merge_crop_words(blocks, crop_box, crop_blocks) == 0
+
+
+def test_neighbouring_low_confidence_words_share_a_region():
+    regions = low_confidence_regions(_page_blocks(), threshold=80, padding=0.01)
+
+    assert len(regions) == 2
+    assert regions[0]['confidence'] == 30.0
+    assert regions[1]['confidence'] == 40.0
+    left, top, width, height = regions[1]['box']
+    assert (round(left, 3), round(top, 3), round(left + width, 3)) == (0.19, 0.09, 0.41)
+    assert len(low_confidence_regions(_page_blocks(), threshold=80, max_regions=1)) == 1
+    assert low_confidence_regions(_page_blocks(), threshold=20) == []
+
+
+def test_crop_pixels_are_clamped_to_the_page():
+    # A4 at 72 DPI is 595 x 842 pixels
+    assert crop_pixels([0.5, 0.5, 0.1, 0.1], (595, 842), 72) == (298, 421, 60, 84)
+    assert crop_pixels([0.99, 0.99, 0.001, 0.001], (595, 842), 72) == (545, 792, 50, 50)
+
+
+class _FakeTextractClient:
+    def __init__(self):
+        self.crops = []
+
+    def detect_document_text(self, image_bytes):
+        self.crops.append(image_bytes)
+        return {'Blocks': [_crop_word('fönster', (0.0, 0.0, 1.0, 1.0), 97.0)]}
+
+
+def test_reocr_page_reads_only_the_regions():
+    response = {'Blocks': _page_blocks()[:4]}
+    client = _FakeTextractClient()
+    rendered = []
+
+    def render(pdf_path, page_number, crop, dpi):
+        rendered.append(crop)
+        return b'png'
+
+    stats = reocr_page(response, 'plan.pdf', 1, (595, 842), client, threshold=50, dpi=72, render=render)
+
+    assert len(rendered) == len(client.crops) == 1
+    assert stats['regions'] == 1
+    assert stats['crop_pixels'] == rendered[0][2] * rendered[0][3]
+    assert stats['page_pixels'] == 595 * 842
+    assert stats['crop_pixels'] < stats['page_pixels'] / 10
@@ -0,0 +1,70 @@
+"""
+Tests for budgeted scratch storage.
+"""
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from src.scratch import ScratchSpace, sweep_stale, RUN_DIR_PREFIX
+
+
+def test_writer_blocks_until_budget_is_released(tmp_path):
+    with ScratchSpace(100, base_dir=tmp_path) as scratch:
+        first = scratch.save_bytes(b'x' * 60, 'page_1.png')
+        saved = []
+        writer = threading.Thread(target=lambda: saved.append(scratch.save_bytes(b'y' * 60, 'page_2.png')))
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert not saved
+
+        scratch.release(first)
+        writer.join(5)
+        assert not writer.is_alive()
+        assert not os.path.exists(first)
+        assert Path(saved[0]).read_bytes() == b'y' * 60
+        assert scratch.used_bytes == 60
+        assert scratch.stats()['peak_bytes'] == 60
+        assert scratch.stats()['backpressure_seconds'] > 0
+
+
+def test_oversized_file_is_admitted_when_empty(tmp_path):
+    with ScratchSpace(10, base_dir=tmp_path) as scratch:
+        path = scratch.save_bytes(b'x' * 50, 'page_1.png')
+
+        assert os.path.getsize(path) == 50
+        assert scratch.peak_bytes == 50
+
+
+def test_unlimited_budget_and_release_of_unknown_paths(tmp_path):
+    with ScratchSpace(None, base_dir=tmp_path) as scratch:
+        for page in range(5):
+            scratch.save_bytes(b'x' * 1000, f"page_{page}.png")
+        scratch.release(str(tmp_path / 'unknown.png'))
+
+        assert scratch.used_bytes == 5000
+
+
+def test_cleanup_removes_directory(tmp_path):
+    scratch = ScratchSpace(None, base_dir=tmp_path)
+    scratch.save_bytes(b'x', 'page_1.png')
+    scratch.cleanup()
+
+    assert not scratch.dir.exists()
+    assert scratch.used_bytes == 0
+
+
+def test_directories_of_dead_processes_are_swept(tmp_path):
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    stale = tmp_path / f"{RUN_DIR_PREFIX}{process.pid}_abcdef12"
+    stale.mkdir()
+    (stale / 'page_1.png').write_bytes(b'x')
+    live = tmp_path / f"{RUN_DIR_PREFIX}{os.getpid()}_abcdef12"
+    live.mkdir()
+
+    assert sweep_stale(tmp_path) == 1
+    assert not stale.exists()
+    assert live.exists()
@@ -0,0 +1,57 @@
+"""
+Tests for the JSON and cache serialization helpers.
+"""
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from src import serialization
+
+BACKENDS = ['json'] + [name for name, module in (('orjson', serialization.orjson),
+                                                 ('msgspec', serialization.msgspec)) if module is not None]
+
+DOCUMENT = {
+    'document_id': 'abc',
+    'text': 'Åtgärd: byte av fönster, översyn av tak',
+    'pages': [{'page': 1, 'confidence': 98.5, 'tables': [[['År', 'Kostnad'], ['2025', '150 000']]]}],
+    'empty': None,
+    'ok': True,
+}
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('compact', [False, True])
+def test_json_round_trip(backend, compact):
+    data = serialization.dumps(DOCUMENT, compact=compact, backend=backend)
+
+    assert isinstance(data, bytes)
+    assert 'Åtgärd'.encode('utf-8') in data
+    assert serialization.loads(data, backend=backend) == DOCUMENT
+    assert serialization.loads(data, backend='json') == DOCUMENT
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_compact_output_has_no_whitespace(backend):
+    assert serialization.dumps({'a': [1, 2]}, compact=True, backend=backend) == b'{"a":[1,2]}'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_extra_types(backend):
+    data = serialization.dumps({'path': Path('output/x.json'), 'date': date(2025, 4, 7), 'pages': {3}},
+                               backend=backend)
+
+    assert serialization.loads(data) == {'path': 'output/x.json', 'date': '2025-04-07', 'pages': [3]}
+
+
+def test_file_and_cache_round_trip(tmp_path):
+    serialization.dump(DOCUMENT, tmp_path / 'doc.json')
+    serialization.dump_cache(DOCUMENT, tmp_path / 'doc.cache')
+
+    assert serialization.load(tmp_path / 'doc.json') == DOCUMENT
+    assert serialization.load_cache(tmp_path / 'doc.cache') == DOCUMENT
+
+
+def test_unserializable_object_raises():
+    with pytest.raises(TypeError):
+        serialization.dumps({'x': object()}, backend='json')
@@ -0,0 +1,119 @@
+"""
+Tests for paginated Textract results and their prefetch thread.
+"""
+import time
+import threading
+
+import pytest
+
+from src.textract_client import iter_paginated, group_blocks_by_page
+
+
+def _fetcher(page_count, calls, fail_at=None, delay=0):
+    """Fetch function serving page_count result pages linked by NextToken."""
+    def fetch(next_token):
+        index = 0 if next_token is None else int(next_token)
+        calls.append(index)
+        if delay:
+            time.sleep(delay)
+        if index == fail_at:
+            raise RuntimeError(f"GetDocumentAnalysis failed on page {index}")
+        response = {'Blocks': [{'Id': f"b{index}"}], 'Index': index}
+        if index + 1 < page_count:
+            response['NextToken'] = str(index + 1)
+        return response
+    return fetch
+
+
+def _prefetch_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'textract-prefetch']
+
+
+def _wait_for_prefetch_threads(timeout=5):
+    deadline = time.monotonic() + timeout
+    while _prefetch_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return _prefetch_threads()
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_pages_in_order(prefetch):
+    calls = []
+
+    pages = list(iter_paginated(_fetcher(5, calls), prefetch=prefetch))
+
+    assert [page['Index'] for page in pages] == [0, 1, 2, 3, 4]
+    assert calls == [0, 1, 2, 3, 4]
+    assert _wait_for_prefetch_threads() == []
+
+
+def test_first_response_is_not_fetched_again():
+    calls = []
+    fetch = _fetcher(3, calls)
+    first = fetch(None)
+
+    pages = list(iter_paginated(fetch, first_response=first))
+
+    assert [page['Index'] for page in pages] == [0, 1, 2]
+    assert calls == [0, 1, 2]
+
+
+def test_fetch_error_is_raised_to_the_caller():
+    calls = []
+    pages = iter_paginated(_fetcher(5, calls, fail_at=2))
+
+    assert next(pages)['Index'] == 0
+    assert next(pages)['Index'] == 1
+    with pytest.raises(RuntimeError, match='failed on page 2'):
+        next(pages)
+    assert _wait_for_prefetch_threads() == []
+
+
+def test_closing_early_stops_the_prefetch_thread():
+    calls = []
+    pages = iter_paginated(_fetcher(1000, calls, delay=0.01))
+
+    assert next(pages)['Index'] == 0
+    pages.close()
+
+    assert _wait_for_prefetch_threads() == []
+    # The thread stops after the fetch in progress at most
+    fetched = len(calls)
+    time.sleep(0.1)
+    assert len(calls) == fetched < 1000
+
+
+def test_prefetch_holds_at_most_three_pages():
+    calls = []
+    pages = iter_paginated(_fetcher(10, calls))
+
+    next(pages)
+    time.sleep(0.2)
+
+    # The page the caller holds, one in the hand-off queue and one being fetched
+    assert len(calls) == 3
+    pages.close()
+
+
+def test_group_blocks_by_page():
+    responses = [
+        {'Blocks': [{'Id': 'a', 'Page': 1}, {'Id': 'b', 'Page': 1}]},
+        {'Blocks': [{'Id': 'c', 'Page': 1}, {'Id': 'd', 'Page': 2}]},
+        {'Blocks': []},
+        {'Blocks': [{'Id': 'e', 'Page': 3}]},
+    ]
+
+    grouped = [(page, [block['Id'] for block in blocks]) for page, blocks in group_blocks_by_page(responses)]
+
+    assert grouped == [(1, ['a', 'b', 'c']), (2, ['d']), (3, ['e'])]
+
+
+def test_group_blocks_by_page_yields_pages_as_they_complete():
+    def responses():
+        yield {'Blocks': [{'Id': 'a', 'Page': 1}]}
+        yield {'Blocks': [{'Id': 'b', 'Page': 2}]}
+        raise AssertionError("read past page 2")
+
+    grouped = group_blocks_by_page(responses())
+
+    assert next(grouped)[0] == 1
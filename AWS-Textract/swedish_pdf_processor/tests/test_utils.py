@@ -0,0 +1,187 @@
+"""
+Tests for the log rate limiting, stage summaries and Excel output.
+"""
+import io
+import sys
+import logging
+
+import pytest
+from openpyxl import load_workbook
+
+from src import utils
+from src.utils import RateLimitFilter, StageSummary, StreamingExcelWriter, setup_logging
+
+
+def _record(created, level=logging.INFO, lineno=10, msg='Processed page'):
+    record = logging.LogRecord('test', level, 'worker.py', lineno, msg, None, None)
+    record.created = created
+    return record
+
+
+def test_rate_limit_allows_burst_then_drops():
+    rate_filter = RateLimitFilter(burst=3, rate=1)
+
+    passed = [rate_filter.filter(_record(100.0)) for _ in range(5)]
+
+    assert passed == [True, True, True, False, False]
+    assert rate_filter.suppressed == 2
+
+
+def test_rate_limit_refills_over_time():
+    rate_filter = RateLimitFilter(burst=2, rate=1)
+    for _ in range(3):
+        rate_filter.filter(_record(100.0))
+
+    assert not rate_filter.filter(_record(100.5))
+    assert rate_filter.filter(_record(101.0))
+
+
+def test_rate_limit_reports_suppressed_count():
+    rate_filter = RateLimitFilter(burst=1, rate=1)
+    rate_filter.filter(_record(100.0))
+    rate_filter.filter(_record(100.0))
+    rate_filter.filter(_record(100.0))
+
+    record = _record(102.0)
+    assert rate_filter.filter(record)
+    assert record.msg == 'Processed page (2 similar messages suppressed)'
+
+    record = _record(104.0)
+    assert rate_filter.filter(record)
+    assert record.msg == 'Processed page'
+
+
+def test_rate_limit_is_per_call_site():
+    rate_filter = RateLimitFilter(burst=1, rate=1)
+
+    assert rate_filter.filter(_record(100.0, lineno=10))
+    assert rate_filter.filter(_record(100.0, lineno=20))
+    assert not rate_filter.filter(_record(100.0, lineno=10))
+
+
+def test_rate_limit_passes_warnings():
+    rate_filter = RateLimitFilter(burst=1, rate=1)
+    rate_filter.filter(_record(100.0))
+
+    assert rate_filter.filter(_record(100.0, level=logging.WARNING))
+    assert rate_filter.filter(_record(100.0, level=logging.ERROR))
+    assert rate_filter.suppressed == 0
+
+
+def test_rate_limit_passes_stage_summaries():
+    rate_filter = RateLimitFilter(burst=1, rate=1)
+
+    for stage in ('Rasterize', 'Textract', 'Tables'):
+        record = _record(100.0)
+        record.summary = {'pages': 1}
+        assert rate_filter.filter(record), stage
+    assert rate_filter.suppressed == 0
+
+
+def test_stage_summary_logs_one_record(caplog):
+    stage_logger = logging.getLogger('test.stage')
+    with caplog.at_level(logging.INFO, logger='test.stage'):
+        with StageSummary('Table extraction', stage_logger) as stage:
+            stage.add(pages=1, tables=2)
+            stage.add(pages=1, empty_cells=5)
+
+    [record] = caplog.records
+    assert record.getMessage().startswith('Table extraction: 2 pages, 2 tables, 5 empty cells in ')
+    assert record.stage == 'Table extraction'
+    assert record.summary == {'pages': 2, 'tables': 2, 'empty_cells': 5, 'seconds': stage.seconds}
+
+
+def test_stage_summary_without_work(caplog):
+    stage_logger = logging.getLogger('test.stage')
+    with caplog.at_level(logging.INFO, logger='test.stage'):
+        with StageSummary('Re-OCR', stage_logger):
+            pass
+
+    assert 'Re-OCR: nothing to do in ' in caplog.records[0].getMessage()
+
+
+def test_setup_logging_writes_through_the_listener(tmp_path, monkeypatch):
+    root = logging.getLogger()
+    # Start from an unconfigured root logger; pytest adds its own handlers
+    monkeypatch.setattr(root, 'handlers', [])
+    monkeypatch.setattr(root, 'level', root.level)
+    at_exit = []
+    monkeypatch.setattr(utils.atexit, 'register', at_exit.append)
+    stream = io.StringIO()
+    log_file = tmp_path / 'run.log'
+
+    listener = setup_logging(logging.INFO, log_file, stream)
+    try:
+        assert setup_logging(logging.INFO, log_file, stream) is None
+        assert at_exit == [listener.stop]
+        stage_logger = logging.getLogger('test.setup')
+        stage_logger.debug("Not written")
+        for page in range(1, 4):
+            with StageSummary(f"Page {page}", stage_logger) as stage:
+                stage.add(tables=page)
+        stage_logger.warning("Sista raden")
+    finally:
+        # Stopping the listener writes the records still on the queue
+        listener.stop()
+
+    for handler in listener.handlers:
+        handler.close()
+    for text in (stream.getvalue(), log_file.read_text(encoding='utf-8')):
+        lines = text.splitlines()
+        assert len(lines) == 4
+        assert ' - INFO - Page 1: 1 tables in ' in lines[0]
+        assert ' - INFO - Page 3: 3 tables in ' in lines[2]
+        assert lines[3].endswith(' - WARNING - Sista raden')
+
+
+TABLES = [
+    [['Åtgärd', 'År', 'Kostnad'], ['Byte av fönster', '2025', '120000'], ['Takomläggning', '2027', '450000']],
+    [['Byggdel'], ['Fasad']],
+]
+
+
+@pytest.fixture(params=['xlsxwriter', 'openpyxl'])
+def excel_engine(request, monkeypatch):
+    if request.param == 'xlsxwriter':
+        pytest.importorskip('xlsxwriter')
+    else:
+        # Make the xlsxwriter import fail so the openpyxl fallback is used
+        monkeypatch.setitem(sys.modules, 'xlsxwriter', None)
+    return request.param
+
+
+def _read_workbook(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return {sheet.title: [list(row) for row in sheet.iter_rows(values_only=True)]
+                for sheet in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+def test_excel_writer_writes_one_sheet_per_table(excel_engine, tmp_path):
+    writer = StreamingExcelWriter(tmp_path / 'plan.json')
+    writer.add_tables(TABLES)
+
+    excel_path = writer.close()
+
+    assert excel_path == tmp_path / 'plan.xlsx'
+    assert writer._engine == excel_engine
+    assert _read_workbook(excel_path) == {'Table_1': TABLES[0], 'Table_2': TABLES[1]}
+
+
+def test_excel_writer_without_tables(excel_engine, tmp_path):
+    with StreamingExcelWriter(tmp_path / 'plan') as writer:
+        pass
+
+    assert writer.close() is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_excel_writer_is_closed_on_errors(excel_engine, tmp_path):
+    with pytest.raises(RuntimeError):
+        with StreamingExcelWriter(tmp_path / 'plan') as writer:
+            writer.add_table(TABLES[0])
+            raise RuntimeError("Textract failed")
+
+    assert _read_workbook(tmp_path / 'plan.xlsx') == {'Table_1': TABLES[0]}
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Page worker for distributed processing of Swedish PDFs.
+
+Run any number of these, on one or many hosts, against the same task and
+result queues that main.py is given with --task-queue/--result-queue.
+"""
+import sys
+import argparse
+import logging
+
+from src.distributed import open_queue, run_worker
+from src.utils import setup_logging
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Process PDF page tasks from a queue')
+    parser.add_argument('--task-queue', type=str, required=True,
+                        help='Queue URL to receive page tasks from')
+    parser.add_argument('--result-queue', type=str, required=True,
+                        help='Queue URL to publish page results to')
+    parser.add_argument('--region', type=str, default='eu-north-1',
+                        help='AWS region for Textract (default: eu-north-1)')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='Exit after this many seconds without tasks (default: run forever)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    return parser.parse_args()
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+
+    log_level = logging.DEBUG if args.debug else logging.INFO
+    setup_logging(log_level)
+
+    logger = logging.getLogger(__name__)
+    logger.info("Swedish PDF Processor page worker")
+
+    try:
+        processed = run_worker(
+            open_queue(args.task_queue),
+            open_queue(args.result_queue),
+            region=args.region,
+            idle_timeout=args.idle_timeout
+        )
+        logger.info(f"Processed {processed} page tasks")
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+    except Exception as e:
+        logger.error(f"Worker failed: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()